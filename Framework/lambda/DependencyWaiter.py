@@ -0,0 +1,31 @@
+from common.clients import client, resource
+from common.scheduler import register_waiter
+
+"""
+  INFO: Called at the start of a test with dependencies. Stores this task's sfn token against the test, the token is released by the TestFinisher of its last dependency (or right away if the dependencies are already finished).
+
+  Input Format:  ! denotes optional item
+  ? denotes info
+  event = {
+    "token": "<this task's sfn token>",
+    "test_group_id": "<Id of this test group>",
+    "log_table_name": "<Name of table for logging>",
+    "test_id": "<file name of the waiting test>"
+  }
+
+  Output Format: null
+  ? the task output is sent with the token once all dependencies finish
+    {
+      "status": "SUCCESS",
+      "response": "Dependencies of <test_id> finished"
+    }
+"""
+
+def handler(event, context):
+  # Get the service resources.
+  ddb = resource('dynamodb')
+  sfn = client("stepfunctions")
+  # Get the log table
+  table = ddb.Table(event["log_table_name"])
+
+  register_waiter(table, sfn, event["test_group_id"], event["test_id"], event["token"])
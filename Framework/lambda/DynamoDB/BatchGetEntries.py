@@ -0,0 +1,94 @@
+from common.clients import resource
+from common.aggregate import Aggregator, projection
+from concurrent.futures import ThreadPoolExecutor
+from common.claimcheck import claim_checked
+from common.retry import pause, retried
+from common.timing import timed
+
+"""
+  Input Format: ! denotes optional item
+  ? denotes info
+  event = {
+    "table_name": "<Your Table Name>",
+    "keys": [
+      {"<hash key name>": <hash key value>, !"<sort|range key name>": <sort|range key value>},
+      ? any number of keys, read with batch_get_item in chunks of 100, a key given more than once is read once and counted each time
+    ],
+    !"projection": ["<attribute name>", ...] ? attributes to read, must include the key attributes
+    !"aggregate": {<check common/aggregate.py>},
+    !"workers": <number of parallel chunks> ? default 4
+    !"mock": <true|false>
+  }
+
+  Output Format:
+    {
+      "status": "<FAILED|SUCCESS>",
+      !"response": {<aggregation result>, "missing": <keys not found>, "missing_sample": [<keys>], "calls": <batch_get_item calls>}
+      !"message": "<The service error>"
+    }
+"""
+
+CHUNK_SIZE = 100
+MAX_RETRIES = 8
+SAMPLE_MISSING = 5
+
+@claim_checked
+@timed
+@retried
+def handler(event, context):
+  # Mock if needed
+  if 'mock' in event and event['mock'] == True:
+    return {
+      "status": "SUCCESS",
+      "response": "mocked"
+    }
+
+  tableName = event["table_name"]
+  keys = event["keys"]
+  calls = []
+
+  def get_chunk(chunk):
+    ddb = resource('dynamodb')
+    keyNames = list(chunk[0])
+    def identity(key):
+      return tuple(str(key.get(name)) for name in keyNames)
+    # batch_get_item rejects a request with the same key twice, each key is read once
+    unique = list({identity(key): key for key in chunk}.values())
+    request = dict(projection(event.get("projection")), Keys=unique)
+    found = {}
+    retries = 0
+    while request:
+      response = ddb.batch_get_item(RequestItems={tableName: request})
+      calls.append(1)
+      for item in response["Responses"].get(tableName, []):
+        found[identity(item)] = item
+      request = response.get("UnprocessedKeys", {}).get(tableName)
+      if request:
+        retries += 1
+        if retries > MAX_RETRIES or not pause(retries, service="dynamodb"):
+          raise RuntimeError(f'{len(request["Keys"])} keys could not be read from {tableName} after {retries - 1} retries')
+    # Results in the order of the input keys, a key given twice counts twice
+    aggregator.add([found[identity(key)] for key in chunk if identity(key) in found])
+    # Keys without an item
+    return [key for key in chunk if identity(key) not in found]
+
+  try:
+    aggregator = Aggregator(event.get("aggregate"))
+    chunks = [keys[start:start + CHUNK_SIZE] for start in range(0, len(keys), CHUNK_SIZE)]
+    with ThreadPoolExecutor(max_workers=max(1, min(event.get("workers", 4), len(chunks)))) as pool:
+      missing = [key for chunkMissing in pool.map(get_chunk, chunks) for key in chunkMissing]
+    response = aggregator.result()
+    response["missing"] = len(missing)
+    response["missing_sample"] = missing[:SAMPLE_MISSING]
+    response["calls"] = len(calls)
+  except Exception as e:
+    print("The Following error occurred during the process:")
+    print(e)
+    return {
+      "status": "FAILED",
+      "message": "Error: " + str(type(e).__name__) + " - "+ str(e)
+    }
+  return {
+      "status": "SUCCESS",
+      "response": response
+    }
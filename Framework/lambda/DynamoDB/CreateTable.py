@@ -1,4 +1,8 @@
-import boto3
+from common.clients import client
+from common.readiness import table_ready, timeout_for, wait_until_ready
+from common.claimcheck import claim_checked
+from common.retry import retried
+from common.timing import timed
 
 """
   Input Format: ! denotes optional item
@@ -19,16 +23,21 @@ import boto3
       "read_capacity": "<initial provisioned read capacity units>",
       "write_capacity": "<initial provisioned write capacity units>"
     },
+    !"wait_until_ready": <true|false> ? return only once the table is ACTIVE, default false
+    !"ready_timeout": <seconds> ? deadline for wait_until_ready, default 120 (and the lambda time left)
     !"mock": <true|false>
   }
 
   Output Format:
     {
       "status": "<FAILED|SUCCESS>",
-      !"response": "<Output of process on success>"
+      !"response": {"ready_seconds": <seconds until ACTIVE>} ? with wait_until_ready
       !"message": "<The service error>"
     }
 """
+@claim_checked
+@timed
+@retried
 def handler(event, context):
   # Mock if needed
   if 'mock' in event and event['mock'] == True:
@@ -38,7 +47,7 @@ def handler(event, context):
     }
   
   # Get the service resource.
-  ddb = boto3.client('dynamodb')
+  ddb = client('dynamodb')
 
   # Extract the primary key(s)
   keySchema = [{
@@ -65,11 +74,8 @@ def handler(event, context):
     writeCap = event["provisioned_throughput"]["write_capacity"]
 
   try:
-    # Get the service resource.
-    dynamodb = boto3.resource("dynamodb")
-
     # Create the DynamoDB table.
-    response = dynamodb.create_table(
+    response = ddb.create_table(
       TableName=event["table_name"],
       KeySchema=keySchema,
       AttributeDefinitions=attributeDefinitions,
@@ -78,13 +84,17 @@ def handler(event, context):
         "WriteCapacityUnits": writeCap
       }
     )
-    
-    # Delete irrelevant info
-    response.pop("ResponseMetadata")
+
+    if event.get("wait_until_ready"):
+      readySeconds = wait_until_ready(lambda: table_ready(ddb, event["table_name"]), timeout_for(event, context), "table")
+      return {
+        "status": "SUCCESS",
+        "response": {"ready_seconds": readySeconds}
+      }
   except Exception as e:
     return {
       "status": "FAILED",
-      "message": "Error: " + str(type(e).__name__) + str(e)
+      "message": "Error: " + str(type(e).__name__) + " - "+ str(e)
     }
   return {
       "status": "SUCCESS"
@@ -0,0 +1,164 @@
+from common.clients import client, resource
+from common.batching import Pacer
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from queue import Queue, Full
+from threading import Event, Lock
+import codecs, csv, json, math, time
+from common.claimcheck import claim_checked
+from common.retry import pause, retried
+from common.timing import timed
+
+"""
+  Input Format: ! denotes optional item
+  ? denotes info
+  event = {
+    "table_name": "<Your Table Name>",
+    "bucket_name": "<Bucket of the fixture file>",
+    "file_name": "<Key of the fixture file>",
+    !"format": "<ndjson|csv>",
+    ? default from the file extension (.csv is csv, anything else ndjson)
+    ? ndjson: one item (json object) per line, dynamoDB conventions to be followed
+    ? csv: the first row holds the attribute names, all values are strings unless typed with "csv_types"
+    !"csv_types": {"<attribute name>": "<S|N|BOOL>"},
+    !"segments": <number of parallel writers> ? default 8
+    !"wcu": <target write capacity units per second> ? default unlimited, an item uses 1 WCU per started KB
+    !"mock": <true|false>
+  }
+  The file is streamed, at most a few batches (25 items each) per writer are held in memory.
+
+  Output Format:
+    {
+      "status": "<FAILED|SUCCESS>",
+      !"response": {"items": <items written>, "batches": <write calls>, "unprocessed_retries": <number>, "consumed_wcu": <reported by ddb>, "seconds": <number>, "items_per_second": <number>}
+      !"message": "<The service error>"
+    }
+"""
+
+BATCH_SIZE = 25
+MAX_RETRIES = 8
+CSV_TYPES = {
+  "S": str,
+  "N": Decimal,
+  "BOOL": lambda value: value.strip().lower() in ("true", "1", "yes")
+}
+
+def read_items(body, fileFormat, csvTypes):
+  lines = codecs.getreader("utf-8")(body)
+  if fileFormat == "csv":
+    for row in csv.DictReader(lines):
+      yield {name: CSV_TYPES[csvTypes.get(name, "S")](value) for name, value in row.items() if value != ""}
+  else:
+    for line in lines:
+      if line.strip():
+        yield json.loads(line, parse_float=Decimal)
+
+def write_units(item):
+  return math.ceil(len(json.dumps(item, default=str).encode()) / 1024) or 1
+
+@claim_checked
+@timed
+@retried
+def handler(event, context):
+  # Mock if needed
+  if 'mock' in event and event['mock'] == True:
+    return {
+      "status": "SUCCESS",
+      "response": "mocked"
+    }
+
+  tableName = event["table_name"]
+  fileFormat = event.get("format", "csv" if event["file_name"].lower().endswith(".csv") else "ndjson")
+  segments = event.get("segments", 8)
+  pacer = Pacer(event["wcu"]) if event.get("wcu") else None
+  stats = {"items": 0, "batches": 0, "unprocessed_retries": 0, "consumed_wcu": 0}
+  # Bounded, the reader waits for the writers
+  batches = Queue(maxsize=segments * 2)
+  stop = Event()
+  errors = []
+  lock = Lock()
+
+  def count(**values):
+    with lock:
+      for name, value in values.items():
+        stats[name] += value
+
+  def write(batch):
+    ddb = resource('dynamodb')
+    requests = [{"PutRequest": {"Item": item}} for item in batch]
+    retries = 0
+    while requests:
+      if pacer is not None:
+        pacer.wait(sum(write_units(request["PutRequest"]["Item"]) for request in requests))
+      response = ddb.batch_write_item(RequestItems={tableName: requests}, ReturnConsumedCapacity="TOTAL")
+      count(batches=1, consumed_wcu=sum(capacity.get("CapacityUnits", 0) for capacity in response.get("ConsumedCapacity", [])))
+      requests = response.get("UnprocessedItems", {}).get(tableName, [])
+      if requests:
+        retries += 1
+        count(unprocessed_retries=1)
+        if retries > MAX_RETRIES or not pause(retries, service="dynamodb"):
+          raise RuntimeError(f"{len(requests)} items could not be written to {tableName} after {retries - 1} retries")
+    count(items=len(batch))
+
+  def writer():
+    while True:
+      batch = batches.get()
+      if batch is None:
+        return
+      if stop.is_set():
+        continue
+      try:
+        write(batch)
+      except Exception as e:
+        errors.append(e)
+        stop.set()
+
+  def put(batch):
+    while not stop.is_set():
+      try:
+        batches.put(batch, timeout=0.5)
+        return
+      except Full:
+        pass
+
+  try:
+    keys = [key["AttributeName"] for key in resource('dynamodb').Table(tableName).key_schema]
+    body = client('s3').get_object(Bucket=event["bucket_name"], Key=event["file_name"])["Body"]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=segments) as pool:
+      for _ in range(segments):
+        pool.submit(writer)
+      try:
+        # A batch cannot hold the same key twice, the latest item wins
+        batch = {}
+        for item in read_items(body, fileFormat, event.get("csv_types", {})):
+          if stop.is_set():
+            break
+          batch[tuple(str(item[key]) for key in keys)] = item
+          if len(batch) == BATCH_SIZE:
+            put(list(batch.values()))
+            batch = {}
+        if batch:
+          put(list(batch.values()))
+      except Exception:
+        stop.set()
+        raise
+      finally:
+        for _ in range(segments):
+          batches.put(None)
+    if errors:
+      raise errors[0]
+    seconds = time.perf_counter() - start
+    stats["seconds"] = round(seconds, 3)
+    stats["items_per_second"] = round(stats["items"] / seconds, 2) if seconds else None
+  except Exception as e:
+    print("The Following error occurred while creating the entity:")
+    print(e)
+    return {
+      "status": "FAILED",
+      "message": "Error: " + str(type(e).__name__) + " - "+ str(e)
+    }
+  return {
+      "status": "SUCCESS",
+      "response": stats
+    }
@@ -0,0 +1,105 @@
+from common.clients import resource
+from common.aggregate import Aggregator, projection
+from common.claimcheck import claim_checked
+from common.retry import retried
+from common.timing import timed
+
+"""
+  Input Format: ! denotes optional item
+  ? denotes info
+  event = {
+    "table_name": "<Your Table Name>",
+    "key": {"<hash key name>": <hash key value>},
+    !"sort_key": {"name": "<sort|range key name>", "op": "<eq|lt|le|gt|ge|between|begins_with>", "value": <value>},
+    ? "value" is a list of 2 values for between
+    !"index_name": "<global or local secondary index to query>",
+    !"projection": ["<attribute name>", ...] ? attributes to read
+    !"aggregate": {<check common/aggregate.py>},
+    !"mock": <true|false>
+  }
+  All the pages of the query are read and aggregated.
+
+  Output Format:
+    {
+      "status": "<FAILED|SUCCESS>",
+      !"response": {<aggregation result>, "pages": <query calls>, "scanned": <items read by ddb>}
+      !"message": "<The service error>"
+    }
+"""
+
+# Sort key ops of the input and their boto3 Key methods
+SORT_KEY_OPS = {
+  "eq": "eq",
+  "lt": "lt",
+  "le": "lte",
+  "gt": "gt",
+  "ge": "gte",
+  "begins_with": "begins_with"
+}
+
+def key_condition(event):
+  # Imported here, boto3 is loaded with the first client (check common/clients.py)
+  from boto3.dynamodb.conditions import Key
+  (name, value), = event["key"].items()
+  condition = Key(name).eq(value)
+  if "sort_key" in event:
+    sortKey = event["sort_key"]
+    if sortKey["op"] == "between":
+      condition = condition & Key(sortKey["name"]).between(*sortKey["value"])
+    elif sortKey["op"] in SORT_KEY_OPS:
+      condition = condition & getattr(Key(sortKey["name"]), SORT_KEY_OPS[sortKey["op"]])(sortKey["value"])
+    else:
+      raise ValueError(f'Unknown sort key op "{sortKey["op"]}", use one of {sorted(SORT_KEY_OPS) + ["between"]}')
+  return condition
+
+@claim_checked
+@timed
+@retried
+def handler(event, context):
+  # Mock if needed
+  if 'mock' in event and event['mock'] == True:
+    return {
+      "status": "SUCCESS",
+      "response": "mocked"
+    }
+
+  # Get the service resource.
+  ddb = resource('dynamodb')
+  # Get the table
+  table = ddb.Table(event["table_name"])
+
+  try:
+    aggregator = Aggregator(event.get("aggregate"))
+    params = {"KeyConditionExpression": key_condition(event)}
+    if "index_name" in event:
+      params["IndexName"] = event["index_name"]
+    if aggregator.count_only():
+      params["Select"] = "COUNT"
+    else:
+      params.update(projection(event.get("projection")))
+
+    pages = 0
+    scanned = 0
+    while True:
+      response = table.query(**params)
+      pages += 1
+      scanned += response["ScannedCount"]
+      aggregator.add(response.get("Items", []), response["Count"] if "Select" in params else None)
+      if "LastEvaluatedKey" not in response:
+        break
+      params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    response = aggregator.result()
+    response["pages"] = pages
+    response["scanned"] = scanned
+  except Exception as e:
+    print("The Following error occurred during the process:")
+    print(e)
+    return {
+      "status": "FAILED",
+      "message": "Error: " + str(type(e).__name__) + " - "+ str(e)
+    }
+  return {
+      "status": "SUCCESS",
+      "response": response
+    }
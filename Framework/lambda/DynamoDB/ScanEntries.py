@@ -0,0 +1,79 @@
+from common.clients import resource
+from common.aggregate import Aggregator, projection
+from concurrent.futures import ThreadPoolExecutor
+from common.claimcheck import claim_checked
+from common.retry import retried
+from common.timing import timed
+
+"""
+  Input Format: ! denotes optional item
+  ? denotes info
+  event = {
+    "table_name": "<Your Table Name>",
+    !"segments": <number of parallel scan segments (TotalSegments)> ? default 8
+    !"index_name": "<secondary index to scan>",
+    !"projection": ["<attribute name>", ...] ? attributes to read
+    !"aggregate": {<check common/aggregate.py>},
+    !"mock": <true|false>
+  }
+  Every segment is scanned to the end by its own thread, the pages are aggregated as they arrive.
+
+  Output Format:
+    {
+      "status": "<FAILED|SUCCESS>",
+      !"response": {<aggregation result>, "pages": <scan calls>, "segments": <number>}
+      !"message": "<The service error>"
+    }
+"""
+
+@claim_checked
+@timed
+@retried
+def handler(event, context):
+  # Mock if needed
+  if 'mock' in event and event['mock'] == True:
+    return {
+      "status": "SUCCESS",
+      "response": "mocked"
+    }
+
+  segments = event.get("segments", 8)
+  params = {}
+
+  def scan_segment(segment):
+    # Resources are not thread safe, each segment gets its own
+    table = resource('dynamodb').Table(event["table_name"])
+    segmentParams = dict(params, Segment=segment, TotalSegments=segments)
+    pages = 0
+    while True:
+      response = table.scan(**segmentParams)
+      pages += 1
+      aggregator.add(response.get("Items", []), response["Count"] if "Select" in params else None)
+      if "LastEvaluatedKey" not in response:
+        return pages
+      segmentParams["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+  try:
+    aggregator = Aggregator(event.get("aggregate"))
+    if "index_name" in event:
+      params["IndexName"] = event["index_name"]
+    if aggregator.count_only():
+      params["Select"] = "COUNT"
+    else:
+      params.update(projection(event.get("projection")))
+    with ThreadPoolExecutor(max_workers=segments) as pool:
+      pages = sum(pool.map(scan_segment, range(segments)))
+    response = aggregator.result()
+    response["pages"] = pages
+    response["segments"] = segments
+  except Exception as e:
+    print("The Following error occurred during the process:")
+    print(e)
+    return {
+      "status": "FAILED",
+      "message": "Error: " + str(type(e).__name__) + " - "+ str(e)
+    }
+  return {
+      "status": "SUCCESS",
+      "response": response
+    }
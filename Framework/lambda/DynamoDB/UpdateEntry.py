@@ -1,4 +1,7 @@
-import boto3
+from common.clients import resource
+from common.claimcheck import claim_checked
+from common.retry import retried
+from common.timing import timed
 
 """
   Input Format: ! denotes optional item\
@@ -25,6 +28,9 @@ import boto3
     }
 """
 
+@claim_checked
+@timed
+@retried
 def handler(event, context):
   # Mock if needed
   if 'mock' in event and event['mock'] == True:
@@ -34,7 +40,7 @@ def handler(event, context):
     }
   
   # Get the service resource.
-  ddb = boto3.resource('dynamodb')
+  ddb = resource('dynamodb')
   # Get the table
   table = ddb.Table(event["table_name"])
 
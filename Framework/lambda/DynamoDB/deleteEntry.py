@@ -1,4 +1,7 @@
-import boto3
+from common.clients import deferred_resource
+from common.claimcheck import claim_checked
+from common.retry import retried
+from common.timing import timed
 
 """
   Input Format: ! denotes optional item
@@ -19,8 +22,11 @@ import boto3
     }
 """
 
-ddb = boto3.resource('dynamodb')
+ddb = deferred_resource('dynamodb')
 
+@claim_checked
+@timed
+@retried
 def lambda_handler(event, context):
     if 'mock' in event and event['mock'] == True:
         return {
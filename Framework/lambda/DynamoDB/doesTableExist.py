@@ -1,4 +1,7 @@
-import boto3
+from common.clients import deferred_client
+from common.claimcheck import claim_checked
+from common.retry import retried
+from common.timing import timed
 
 """
   Input Format: ! denotes optional item
@@ -14,8 +17,11 @@ import boto3
     }
 """
 
-ddb = boto3.client('dynamodb')
+ddb = deferred_client('dynamodb')
 
+@claim_checked
+@timed
+@retried
 def lambda_handler(event, context):
     table_name = event['table_name']
     
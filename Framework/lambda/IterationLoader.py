@@ -1,15 +1,21 @@
 from typing import Any
-import boto3
-import time
+from common.claimcheck import offload, payload_size, resolve
+from common.logsink import LogSink
+from common.timing import timestamp
+import os
 
 """
   INFO: Loads the next iteration from the iteration list, also removing it from the list to eliminate redundancy. Parallel Processing starts after this Lambda.
+  The tests of the iteration are the input of the Map state, their size is bounded by ITERATION_MAX_BYTES (default 131072, half the 256 KB state limit):
+  - the steps of the largest tests are stored in the payload bucket (check common/claimcheck.py) until the iteration fits
+  - when the tests still do not fit (a very large group), the tests that do not fit are put back at the head of the iteration list and run in the next iteration, tests are in topological order so none of them is a dependency of a test of this iteration
 
   ? denotes info
   Input Format:
   event = {
     "test_group_id": "<Id of this test group>",
     "iterations": [<list of iterations to do>]
+    ? or a claim check reference to it (check common/claimcheck.py)
   }
   
   Output Format:
@@ -17,25 +23,50 @@ import time
     "completed": <true|false>,
     ? end iteration on true
     "tests": [<list of tests to run in parallel>],
-    ? each individual test is a list of steps for that test
+    ? each individual test is a list of steps for that test, or a claim check reference to it
     "iterations": [<list of remaining iterations>]
-    ? input minus the first iteration (except when it was already empty)
+    ? input minus the first iteration (except when it was already empty), a reference again when large
   }
 """
 
+ITERATION_MAX_BYTES = int(os.environ.get("ITERATION_MAX_BYTES", 128 * 1024))
+
+def bounded(iteration: list[dict[str, Any]], prefix: str) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+  # The tests to run now and the tests left for the next iteration
+  tests = list(iteration)
+  sizes = [payload_size(test) for test in tests]
+  total = sum(sizes) + len(tests) + 1
+  for index in sorted(range(len(tests)), key=lambda index: sizes[index], reverse=True):
+    if total <= ITERATION_MAX_BYTES:
+      return tests, []
+    tests[index] = dict(tests[index], steps=offload(tests[index]["steps"], prefix, threshold=0))
+    size = payload_size(tests[index])
+    total += size - sizes[index]
+    sizes[index] = size
+  if total <= ITERATION_MAX_BYTES:
+    return tests, []
+  count, total = 0, 1
+  for size in sizes:
+    total += size + 1
+    if total > ITERATION_MAX_BYTES:
+      break
+    count += 1
+  # At least one test, so the iteration list always shrinks
+  count = max(1, count)
+  return tests[:count], tests[count:]
+
 def handler(event, context):
-  iterations: list[list[Any]] = event["iterations"]
-  # Get the service resource.
-  ddb = boto3.resource('dynamodb')
-  # Get the log table
-  table = ddb.Table(event["log_table_name"])
+  # Copied, resolved payloads are shared by the cache
+  iterations: list[list[Any]] = list(resolve(event["iterations"]))
   if not len(iterations):
     return {
       "completed": True,
       "tests": None,
       "iterations": None
     }
-  iteration = iterations.pop(0)
+  iteration, rest = bounded(iterations.pop(0), f'{event["test_group_id"]}/steps')
+  if rest:
+    iterations.insert(0, rest)
   
   # Create Log item
   item = {
@@ -44,13 +75,14 @@ def handler(event, context):
     "Status": "START",
     "Input": "Remaining Iterations: " + str(len(iterations)),
     "Output": "Iteration Started",
-    "Timestamp": time.strftime("%DT%H:%M:%S", time.localtime())
+    "Timestamp": timestamp()
   }
   # Put log in table
-  response = table.put_item(Item=item)
+  with LogSink(event["log_table_name"]) as sink:
+    sink.put(item)
 
   return {
     "completed": False,
     "tests": iteration,
-    "iterations": iterations
+    "iterations": offload(iterations, f'{event["test_group_id"]}/iterations')
   }
\ No newline at end of file
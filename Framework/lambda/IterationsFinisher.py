@@ -1,5 +1,5 @@
-import boto3
-import time
+from common.logsink import LogSink
+from common.timing import timestamp
 
 """
   INFO: Called after the iteration list becomes empty. Logs the completion of the test group in the log table.
@@ -19,11 +19,6 @@ import time
   }
 """
 def handler(event, context):
-  # Get the service resource.
-  ddb = boto3.resource('dynamodb')
-  # Get the log table
-  table = ddb.Table(event["log_table_name"])
-
   # Create Log item
   inp=event
   item = {
@@ -32,11 +27,12 @@ def handler(event, context):
     "Status": "FINISH",
     "Input": inp,
     "Output": "Test Group Completed Successfully",
-    "Timestamp": time.strftime("%DT%H:%M:%S", time.localtime())
+    "Timestamp": timestamp()
   }
 
-  # Perform operation
-  response = table.put_item(Item=item)
+  # Put log in table
+  with LogSink(event["log_table_name"]) as sink:
+    sink.put(item)
   return {
     'status': "SUCCESS",
     'response': "Test Group Execution Completed"
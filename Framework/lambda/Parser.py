@@ -1,15 +1,26 @@
+from collections import Counter
 from contextlib import suppress
+from decimal import Decimal
 from typing import Any
-import boto3
-import json, time
+import json
+from common.claimcheck import offload
+from common.clients import client, resource
+from common.logkeys import LOG_SHARDS
+from common.logsink import LogSink
+from common.readiness import table_ready, timeout_for, wait_until_ready
+from common.scheduler import BARRIER, build_schedule, init_schedule
+from common.testfiles import fetch_tests
+from common.timing import timestamp
 
 """
-  INFO: The first function called by the sfn. Parses the input files and divides the tests in input into iteration lists as per their dependencies. Iteration list is a list of lists of tests where each sublist has tests which run in parallel. Each sublist is hereafter called an iteration.
+  INFO: The first function called by the sfn. Parses the input files and schedules the tests in input as per their dependencies. All tests are returned in a single iteration (in topological order), each test waits only for its own dependencies before starting (Await Dependencies state), so no test is held back by unrelated slow tests.
 
   Input Format:  ! denotes optional item
   event = {
     "test_group_id": "<Id of this test group>",
     "log_table_name": "<Name of the ddb logging table>"
+    !"log_table_capacity": "on_demand" or {"read": <RCU>, "write": <WCU>},
+    ? used only when the log table is created, default on_demand (provisioned with the given capacity units otherwise)
     "bucket_name": "<Your Bucket Name>",
     "test_group": {
       "<test_name>": [<dependencies>]
@@ -20,14 +31,47 @@ import json, time
   Output Format:
   {
     "iterations": [[<list of tests for ith iteration>],]
+    ? each test is {"test_id": "<file name>", "steps": [<steps>], "dependencies": <number of tests to wait for>, "dependents": [<tests waiting for this one>]}
+    ? large steps lists and a large iteration list are claim check references to the payload bucket (check common/claimcheck.py)
   }
 """
 
+def billing(capacity: Any) -> dict[str, Any]:
+  # create_table parameters of the log table capacity mode
+  if capacity in (None, "on_demand"):
+    return {"BillingMode": "PAY_PER_REQUEST"}
+  return {
+    "BillingMode": "PROVISIONED",
+    "ProvisionedThroughput": {
+      "ReadCapacityUnits": capacity.get("read", 10),
+      "WriteCapacityUnits": capacity.get("write", 10)
+    }
+  }
+
+SLOWEST_FETCHES = 10
+
+def fetch_summary(latencies: dict[str, float]) -> dict[str, Any]:
+  # Bounded whatever the size of the group: percentiles of the download times (ms) and the slowest files
+  values = sorted(latencies.values())
+  if not values:
+    return {"count": 0}
+  def percentile(percent: float) -> Decimal:
+    return Decimal(f"{values[min(len(values) - 1, int(len(values) * percent / 100))]:.3f}")
+  slowest = sorted(latencies.items(), key=lambda entry: entry[1], reverse=True)[:SLOWEST_FETCHES]
+  return {
+    "count": len(values),
+    "p50": percentile(50),
+    "p90": percentile(90),
+    "p99": percentile(99),
+    "max": Decimal(f"{values[-1]:.3f}"),
+    "slowest": {testFile: Decimal(f"{latency:.3f}") for testFile, latency in slowest}
+  }
+
 def handler(event: dict[str, Any], context):
   # To Log the start of Execution
   # Get the service resource.
-  ddb = boto3.resource('dynamodb')
-  ddbclient = boto3.client('dynamodb')
+  ddb = resource('dynamodb')
+  ddbclient = client('dynamodb')
   # Get the log table
   table = ddb.Table(event["log_table_name"])
 
@@ -56,82 +100,54 @@ def handler(event: dict[str, Any], context):
         "AttributeName": "TestScenarioID",
         "AttributeType": "S"
       }],
-      ProvisionedThroughput={
-        "ReadCapacityUnits": 10,
-        "WriteCapacityUnits": 10
-      }
+      **billing(event.get("log_table_capacity"))
     )
-    time.sleep(20)
+    # Wait only until the table is ACTIVE
+    wait_until_ready(lambda: table_ready(ddbclient, event["log_table_name"]), timeout_for({}, context), "table")
     table.load()
 
-  # Get s3 client
-  s3 = boto3.client('s3')
+  # Schedule records and the log item are written together in a single batch
+  sink = LogSink(event["log_table_name"], ddb)
 
-  # Sort file names into iteration list for map input, here is the sorting info:
-  """
-    eg input: test_group = {
-      "a_test_without_dependencies.json": [],
-      "a_test_with_dependencies.json": ["a_dependent_test.json", "another_dependent_test.json"],
-      "a_test_to_fill_space.json": ["*"],
-      "a_dependent_test.json": ["second_level_dependency.json"]
-    }
-    eg output iteration list = [["a_test_without_dependencies.json", "another_dependent_test.json", "second_level_dependency.json"], ["a_dependent_test.json"], ["a_test_with_dependencies.json"], ["a_test_to_fill_space.json"]]
+  # Get s3 client, the pooled client has a connection for each download thread
+  s3 = client('s3')
 
-    each subarray is a different iteration (batch for parallel processing), all items in a subarray are run parallely
-  """
+  # Order the tests by their dependencies, each test starts as soon as its own dependencies are finished (check common/scheduler.py)
   testGroup: dict[str, list[str]] = event["test_group"]
-  iterationsFilesList: list[list[str]] = [[]]
-  end: list[str] = []
-  preTestGroup = dict(testGroup)
-  for file in preTestGroup:
-    for depend in preTestGroup[file]:
-      if depend == "*":
-        end.append(file)
-        testGroup.pop(file)
-      elif depend not in testGroup:
-        iterationsFilesList[-1].append(depend)
+  schedule = build_schedule(testGroup)
+  init_schedule(sink, event["test_group_id"], schedule)
+  # The whole group runs in a single iteration, tests are in topological order so a test never waits for one which has not started
+  iterationsFilesList: list[list[str]] = [[test for test in schedule if test != BARRIER]]
 
-  while(testGroup):
-    for file in preTestGroup:
-      if not preTestGroup[file]:
-        iterationsFilesList[-1].append(file)
-        testGroup.pop(file)
-    preTestGroup = testGroup
-    for file in preTestGroup:
-      for depend in preTestGroup[file]:
-        if depend not in testGroup:
-          testGroup[file].remove(depend)
-    iterationsFilesList.append([])
-    preTestGroup = dict(testGroup)
+  # Download and parse all the test files concurrently, unchanged files come from the cache (check common/testfiles.py)
+  tests, latencies, sources = fetch_tests(s3, event["bucket_name"], [testFile for iterationFiles in iterationsFilesList for testFile in iterationFiles])
 
-  iterationsFilesList.pop(-1)
-  if end:
-    iterationsFilesList.append(end)
-  
   # Create Log item
   item = {
     "TestGroupID": event["test_group_id"],
     "TestScenarioID": 'T<Null>:S<Null>',
     "Status": "START",
-    "Input": event,
-    "Output": "Input Parsing Finished, Created Iteration List: " + str(iterationsFilesList) + "\n Started Downloading tests from S3 bucket",
-    "Timestamp": time.strftime("%DT%H:%M:%S", time.localtime())
+    # The input and the schedule of a large group are stored in the payload bucket, a log item is limited to 400 KB
+    "Input": offload(event, f'{event["test_group_id"]}/parser'),
+    "Output": offload("Input Parsing Finished, Created Test Schedule: " + str(iterationsFilesList) + "\n Downloaded tests from S3 bucket", f'{event["test_group_id"]}/parser'),
+    "FetchLatency": fetch_summary(latencies),
+    "FetchSource": dict(Counter(sources.values())),
+    "LogShards": LOG_SHARDS,
+    "Timestamp": timestamp()
   }
   # Put log in table
-  response = table.put_item(Item=item)
+  sink.put(item)
+  sink.flush()
 
   # Load the test steps with the same structure in output as in iteration list created above
   output: list[list[dict[str, Any]]] = []
   for iterationFiles in iterationsFilesList:
     output.append([])
     for testFile in iterationFiles:
-      # Download the test file > Parse it > Add to iteration
-      with open("/tmp/input.json", "wb") as f:
-        s3.download_fileobj(event["bucket_name"], testFile, f)
-      with open("/tmp/input.json", "r") as f:
-        test: dict[Any, Any] = json.load(f)
-        output[-1].append({"test_id": testFile,
-                           "steps": test["steps"]})
+      output[-1].append({"test_id": testFile,
+                         "steps": offload(tests[testFile]["steps"], f'{event["test_group_id"]}/steps'),
+                         "dependencies": schedule[testFile]["dependencies"],
+                         "dependents": schedule[testFile]["dependents"]})
   return {
-    "iterations": output
+    "iterations": offload(output, f'{event["test_group_id"]}/iterations')
   }
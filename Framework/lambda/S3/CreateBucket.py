@@ -1,4 +1,9 @@
-import boto3, os
+import os
+from common.clients import client
+from common.readiness import bucket_ready, timeout_for, wait_until_ready
+from common.claimcheck import claim_checked
+from common.retry import retried
+from common.timing import timed
 
 """
   Input Format: ! denotes optional item
@@ -7,6 +12,8 @@ import boto3, os
     "bucket_name": "<Your Bucket Name>",
     !"bucket_location": "<The region code where to create the bucket>"
     ? If not defined, the lambdas' region is used (eg. "us-east-1")
+    !"wait_until_ready": <true|false> ? return only once the bucket can be used, default false
+    !"ready_timeout": <seconds> ? deadline for wait_until_ready, default 120 (and the lambda time left)
     !"mock": <true|false>
   }
 
@@ -14,9 +21,13 @@ import boto3, os
     {
       "status": "<FAILED|SUCCESS>",
       !"response": "<Output of process on success>"
+      ? with wait_until_ready it also has "ready_seconds": <seconds until usable>
       !"message": "<The service error>"
     }
 """
+@claim_checked
+@timed
+@retried
 def handler(event, context):
   # Mock if needed
   if 'mock' in event and event['mock'] == True:
@@ -26,7 +37,7 @@ def handler(event, context):
     }
   
   # Get the service client.
-  s3 = boto3.client("s3")
+  s3 = client("s3")
   # Find lambdas' location
   loc = os.environ["AWS_REGION"]
   if "bucket_location" in event:
@@ -41,6 +52,8 @@ def handler(event, context):
     
     # Delete irrelevant info
     response.pop("ResponseMetadata")
+    if event.get("wait_until_ready"):
+      response["ready_seconds"] = wait_until_ready(lambda: bucket_ready(s3, event["bucket_name"]), timeout_for(event, context), "bucket")
   except Exception as e:
     return {
       "status": "FAILED",
@@ -1,4 +1,9 @@
-import boto3, json
+import io, json, random, time
+from concurrent.futures import ThreadPoolExecutor
+from common.clients import client
+from common.claimcheck import claim_checked
+from common.retry import retried
+from common.timing import timed
 
 """
   Input Format: ! denotes optional item
@@ -6,7 +11,18 @@ import boto3, json
   event = {
     "bucket_name": "<Your Bucket Name>",
     "file_name": "<Your File Name (to be used in the s3 bucket)>",
+    ? used as the key prefix with "generate"
     "file_contents": <json file contents as a json object>,
+    ? uploaded from memory, objects above 8 MB are sent as a parallel multipart upload
+    !"generate": {
+      ? writes "count" synthetic objects "<file_name><index, 6 digits>" concurrently, "file_contents" is not needed
+      "count": <number of objects>,
+      "size": <bytes> or {"distribution": "<uniform|lognormal>", "min": <bytes>, "max": <bytes>, !"median": <bytes>, !"sigma": <number>},
+      ? lognormal sizes have the given median (default (min+max)/2) and sigma (default 1), clipped to min and max
+      !"seed": <number> ? same seed, same sizes and contents, default 0
+      !"content_type": "<application/octet-stream|application/json|text/plain>" ? default application/octet-stream
+      !"workers": <parallel uploads> ? default 16
+    },
     !"mock": <true|false>
   }
 
@@ -14,9 +30,69 @@ import boto3, json
     {
       "status": "<FAILED|SUCCESS>",
       !"response": "<Output of process on success>"
+      ? with "generate": {"objects": <number>, "bytes": <total>, "min_size", "max_size", "seconds", "objects_per_second", "mb_per_second"}
       !"message": "<The service error>"
     }
 """
+
+MB = 1024 * 1024
+
+def transfer_config(concurrency: int):
+  # Imported here, boto3 is loaded with the first client (check common/clients.py)
+  from boto3.s3.transfer import TransferConfig
+  return TransferConfig(multipart_threshold=8 * MB, multipart_chunksize=8 * MB, max_concurrency=concurrency)
+
+def object_size(spec, rng):
+  if not isinstance(spec, dict):
+    return int(spec)
+  if spec.get("distribution", "uniform") == "lognormal":
+    median = spec.get("median", (spec["min"] + spec["max"]) / 2)
+    size = median * rng.lognormvariate(0, spec.get("sigma", 1))
+  else:
+    size = rng.uniform(spec["min"], spec["max"])
+  return int(min(spec["max"], max(spec["min"], size)))
+
+def payload(size, contentType, rng, index):
+  if contentType == "application/json":
+    # A json document of about the given size
+    body = json.dumps({"index": index, "data": ""})
+    return json.dumps({"index": index, "data": "".join(rng.choices("abcdefghijklmnopqrstuvwxyz0123456789", k=max(0, size - len(body))))}).encode()
+  if contentType.startswith("text/"):
+    return "".join(rng.choices("abcdefghijklmnopqrstuvwxyz0123456789 \n", k=size)).encode()
+  return rng.randbytes(size)
+
+def generate_files(s3, event):
+  spec = event["generate"]
+  seed = spec.get("seed", 0)
+  contentType = spec.get("content_type", "application/octet-stream")
+  workers = spec.get("workers", 16)
+  # The parts of concurrent multipart uploads share the connections of the pooled client
+  config = transfer_config(max(1, 40 // workers))
+
+  def put(index):
+    # One generator per object, the result does not depend on the order of the uploads
+    rng = random.Random(f"{seed}-{index}")
+    body = payload(object_size(spec["size"], rng), contentType, rng, index)
+    s3.upload_fileobj(io.BytesIO(body), event["bucket_name"], f'{event["file_name"]}{index:06d}', ExtraArgs={"ContentType": contentType}, Config=config)
+    return len(body)
+
+  start = time.perf_counter()
+  with ThreadPoolExecutor(max_workers=workers) as pool:
+    sizes = list(pool.map(put, range(spec["count"])))
+  seconds = time.perf_counter() - start
+  return {
+    "objects": len(sizes),
+    "bytes": sum(sizes),
+    "min_size": min(sizes, default=0),
+    "max_size": max(sizes, default=0),
+    "seconds": round(seconds, 3),
+    "objects_per_second": round(len(sizes) / seconds, 2) if seconds else None,
+    "mb_per_second": round(sum(sizes) / MB / seconds, 3) if seconds else None
+  }
+
+@claim_checked
+@timed
+@retried
 def handler(event, context):
   # Mock if needed
   if 'mock' in event and event['mock'] == True:
@@ -24,19 +100,19 @@ def handler(event, context):
       "status": "SUCCESS",
       "response": "mocked"
     }
-  
+
   # Get the service client.
-  s3 = boto3.client("s3")
-  # Put in contents a temp file
-  with open("/tmp/temp.json", "w") as f:
-    json.dump(event["file_contents"], f)
+  s3 = client("s3")
 
   try:
     response = None
-    # Upload the file
-    with open("/tmp/temp.json", "rb") as f:
-      response = s3.upload_fileobj(f, event["bucket_name"], event["file_name"])
-    
+    if "generate" in event:
+      response = generate_files(s3, event)
+    else:
+      # Upload the contents from memory
+      body = json.dumps(event["file_contents"]).encode()
+      response = s3.upload_fileobj(io.BytesIO(body), event["bucket_name"], event["file_name"], Config=transfer_config(10))
+
   except Exception as e:
     return {
       "status": "FAILED",
@@ -46,6 +122,3 @@ def handler(event, context):
       "status": "SUCCESS",
       "response": response
     }
-
-
-
@@ -1,4 +1,7 @@
-import boto3
+from common.clients import client
+from common.claimcheck import claim_checked
+from common.retry import retried
+from common.timing import timed
 
 """
   Input Format: ! denotes optional item
@@ -16,6 +19,9 @@ import boto3
       !"message": "<The service error>"
     }
 """
+@claim_checked
+@timed
+@retried
 def handler(event, context):
   # Mock if needed
   if 'mock' in event and event['mock'] == True:
@@ -25,7 +31,7 @@ def handler(event, context):
     }
   
   # Get the service client.
-  s3 = boto3.client("s3")
+  s3 = client("s3")
   # Put in contents a temp file
 
   try:
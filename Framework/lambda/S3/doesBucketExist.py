@@ -1,5 +1,8 @@
-import boto3
+from common.clients import deferred_client
 import json
+from common.claimcheck import claim_checked
+from common.retry import retried
+from common.timing import timed
 
 """
     Input Format: ! denotes optional item
@@ -15,8 +18,11 @@ import json
         }
 """
 
-s3 = boto3.client('s3')
+s3 = deferred_client('s3')
 
+@claim_checked
+@timed
+@retried
 def lambda_handler(event, context):
     bucket_name = event['bucket_name']
 
@@ -1,5 +1,8 @@
-import boto3
+from common.clients import deferred_client
 import re
+from common.claimcheck import claim_checked
+from common.retry import retried
+from common.timing import timed
 
 """
     Input Format: ! denotes optional item
@@ -17,8 +20,11 @@ import re
         }
 """
 
-s3 = boto3.client('s3')
+s3 = deferred_client('s3')
 
+@claim_checked
+@timed
+@retried
 def lambda_handler(event, context):
     bucket_name = event['bucket_name']
     file_name = event['file_name']
@@ -1,11 +1,23 @@
-import boto3
-import json
+from common.clients import deferred_client
+import hashlib, json
+from common.claimcheck import claim_checked
+from common.retry import retried
+from common.timing import timed
 
 """
     Input Format: ! denotes optional item
     event = {
         "bucket_name": "<Your Bucket Name>",
         "file_name": "<Your File Name (to be used in the s3 bucket)>",
+        !"stream": {
+            ? reads the object chunk by chunk with constant memory and returns only the results (works for binary and multi-GB objects)
+            !"hash": "<sha256|sha1|md5|...>" ? digest of the bytes read, default sha256
+            !"lines": <true|false> ? count the lines, default false
+            !"json_path": "<path, eg. $.order.items.0.id>" ? extracted from each line (ndjson), a json document must be on a single line
+            !"range": {"start": <first byte>, !"end": <last byte, included>} ? read only this byte range
+            !"expected_digest": "<hex digest>" ? adds "passed": <true|false>
+            !"chunk_size": <bytes> ? default 1048576
+        },
         !"mock": <true|false>
     }
 
@@ -13,12 +25,89 @@ import json
         {
         "status": "<FAILED|SUCCESS>",
         !"response": "<Output of process on success>",
+        ? with "stream": {"size": <bytes read>, "hash": "<algorithm>", "digest": "<hex>", !"lines": <number>,
+        ?   !"json_path": {"found": <lines with the path>, "missing": <lines without it>, "sample": [<first values>]}, !"passed": <true|false>}
         !"message": "<The service error>"
         }
 """
 
-s3 = boto3.client('s3')
+s3 = deferred_client('s3')
 
+CHUNK_SIZE = 1048576
+SAMPLE_VALUES = 5
+
+def extract(document, path):
+    value = document
+    for part in path.removeprefix('$').strip('.').split('.'):
+        if part == '':
+            continue
+        if isinstance(value, list) and part.lstrip('-').isdigit():
+            value = value[int(part)]
+        elif isinstance(value, dict):
+            value = value[part]
+        else:
+            raise KeyError(part)
+    return value
+
+def stream_object(bucket_name, file_name, options):
+    params = {'Bucket': bucket_name, 'Key': file_name}
+    if 'range' in options:
+        params['Range'] = f"bytes={options['range']['start']}-{options['range'].get('end', '')}"
+    body = s3.get_object(**params)['Body']
+
+    digest = hashlib.new(options.get('hash', 'sha256'))
+    size = 0
+    lines = 0
+    lastByte = b''
+    jsonPath = options.get('json_path')
+    found = missing = 0
+    sample = []
+    carry = b''
+
+    def extract_line(line):
+        nonlocal found, missing
+        if not line.strip():
+            return
+        try:
+            value = extract(json.loads(line), jsonPath)
+        except (KeyError, IndexError, ValueError):
+            missing += 1
+            return
+        found += 1
+        if len(sample) < SAMPLE_VALUES:
+            sample.append(value)
+
+    for chunk in body.iter_chunks(options.get('chunk_size', CHUNK_SIZE)):
+        digest.update(chunk)
+        size += len(chunk)
+        lines += chunk.count(b'\n')
+        lastByte = chunk[-1:]
+        if jsonPath is not None:
+            # Only the unfinished last line is kept between chunks
+            parts = (carry + chunk).split(b'\n')
+            carry = parts.pop()
+            for line in parts:
+                extract_line(line)
+    if jsonPath is not None:
+        extract_line(carry)
+
+    result = {
+        'size': size,
+        'hash': digest.name,
+        'digest': digest.hexdigest()
+    }
+    if options.get('lines'):
+        # A last line without a line break is counted too
+        result['lines'] = lines + (1 if lastByte not in (b'', b'\n') else 0)
+    if jsonPath is not None:
+        result['json_path'] = {'found': found, 'missing': missing, 'sample': sample}
+    if 'expected_digest' in options:
+        result['passed'] = result['digest'] == options['expected_digest'].lower()
+    return result
+
+@claim_checked
+@timed
+@retried
 def lambda_handler(event, context):
     if 'mock' in event and event['mock'] == True:
         return {
@@ -30,6 +119,12 @@ def lambda_handler(event, context):
     file_name = event['file_name']
 
     try:
+        if 'stream' in event:
+            return {
+                'status': 'SUCCESS',
+                'response': stream_object(bucket_name, file_name, event['stream'])
+            }
+
         response = s3.get_object(
             Bucket = bucket_name,
             Key = file_name
@@ -47,4 +142,4 @@ def lambda_handler(event, context):
         return {
             'status': 'FAILED',
             'message': "Error: " + str(type(e).__name__) + " - "+ str(e)
-        }
\ No newline at end of file
+        }
@@ -1,4 +1,9 @@
-import boto3
+from common.clients import client
+from common import resolver
+from common.readiness import topic_ready, timeout_for, wait_until_ready
+from common.claimcheck import claim_checked
+from common.retry import retried
+from common.timing import timed
 
 """
   Input Format: ! denotes optional item
@@ -7,6 +12,8 @@ import boto3
     "topic_name": "<Your Topic Name>",
     !"fifo": <true|false>,
     !"content_based_deduplication": <true|false> ? used only when "fifo" is true, default true, "message_deduplication id" must be provided with each message if false,
+    !"wait_until_ready": <true|false> ? return only once the topic can be used, default false
+    !"ready_timeout": <seconds> ? deadline for wait_until_ready, default 120 (and the lambda time left)
     !"mock": <true|false>
   }
 
@@ -14,10 +21,14 @@ import boto3
     {
       "status": "<FAILED|SUCCESS>",
       !"response": "<Output of process on success>"
+      ? with wait_until_ready it also has "ready_seconds": <seconds until usable>
       !"message": "<The service error>"
     }
 """
 
+@claim_checked
+@timed
+@retried
 def handler(event, context):
   # Mock if needed
   if 'mock' in event and event['mock'] == True:
@@ -27,30 +38,29 @@ def handler(event, context):
     }
   
   # Get the service resource.
-  sns = boto3.client('sns')
-  # Get the event system
-  event_system = sns.meta.events
+  sns = client('sns')
 
   # Put values in params dict
-  def param_injector(params, **kwargs):
-    topicName = event["topic_name"]
-    attributes = {"DisplayName":event["topic_name"]}
-    if "fifo" in event and event["fifo"] == True:
-      topicName += ".fifo"
-      attributes["FifoTopic"] = "true"
-      attributes["ContentBasedDeduplication"] = "true"
-    if "content_based_deduplication" in event and event["content_based_deduplication"] == False:
-      attributes["ContentBasedDeduplication"] = "false"
-    params["Attributes"] = attributes
-    params["Name"] = topicName
-  event_system.register('provide-client-params.sns.CreateTopic', param_injector)
+  topicName = event["topic_name"]
+  attributes = {"DisplayName":event["topic_name"]}
+  if "fifo" in event and event["fifo"] == True:
+    topicName += ".fifo"
+    attributes["FifoTopic"] = "true"
+    attributes["ContentBasedDeduplication"] = "true"
+  if "content_based_deduplication" in event and event["content_based_deduplication"] == False:
+    attributes["ContentBasedDeduplication"] = "false"
+  params = {"Name": topicName, "Attributes": attributes}
 
   try:
     # Perform operation
-    response = sns.create_topic()
+    response = sns.create_topic(**params)
 
     # Delete irrelevant info
     response.pop("ResponseMetadata")
+    # Later operations can use the topic name
+    resolver.prime_topic(topicName, response["TopicArn"])
+    if event.get("wait_until_ready"):
+      response["ready_seconds"] = wait_until_ready(lambda: topic_ready(sns, response["TopicArn"]), timeout_for(event, context), "topic")
   except Exception as e:
     print("The Following error occurred during the process:")
     print(e)
@@ -1,10 +1,17 @@
-import boto3
+from common.clients import client
+from common import resolver
+from common.claimcheck import claim_checked
+from common.retry import retried
+from common.timing import timed
 
 """
   Input Format: ! denotes optional item
   ? denotes info
   event = {
-    "topic_arn": "<Your Topic ARN>"
+    ? one of "topic_arn" or "topic_name" must be defined
+    "topic_arn": "<Your Topic ARN>",
+    "topic_name": "<Your Topic Name>"
+    ? resolved to its ARN, cached by the lambda container
   }
 
   Output Format:
@@ -14,6 +21,9 @@ import boto3
       !"message": "<The service error>"
     }
 """
+@claim_checked
+@timed
+@retried
 def handler(event, context):
   # Extracting and validating input
   if 'mock' in event and event['mock'] == True:
@@ -23,18 +33,13 @@ def handler(event, context):
     }
 
   # Get the service resource.
-  sns = boto3.client('sns')
-  # Get the event system
-  event_system = sns.meta.events
-
-  # Put values in params dict
-  def param_injector(params, **kwargs):
-    params["TopicArn"] = event["topic_arn"]
-  event_system.register('provide-client-params.sns.DeleteTopic', param_injector)
+  sns = client('sns')
 
   try:
+    topicArn = event["topic_arn"] if "topic_arn" in event else resolver.topic_arn(event["topic_name"])
     # Perform operation
-    response = sns.delete_topic()
+    response = sns.delete_topic(TopicArn=topicArn)
+    resolver.forget_topic(resolver.topic_name(topicArn))
 
     # Delete irrelevant info
     response.pop("ResponseMetadata")
@@ -1,12 +1,21 @@
-import boto3
+from common.clients import client
+from common import resolver
+from common.batching import chunk, run_batches
+import uuid
+from common.claimcheck import claim_checked
+from common.retry import retried
+from common.timing import timed
 
 """
   Input Format: ! denotes optional item
   ? denotes info
   event = {
-    ? at least one of "topic_arn" or "target_arn" must be defined
+    ? at least one of "topic_arn", "topic_name", "target_arn" or "phone_number" must be defined
     "topic_arn": "<Your Topic ARN>",
+    "topic_name": "<Your Topic Name>",
+    ? resolved to its ARN, cached by the lambda container
     "target_arn": "<Your Target ARN>",
+    "phone_number": "<Phone number to send an SMS to>",
     !"message_structure": "json",
     ? json (only valid value) means you will provide different string message values to different endpoint (eg. "http") keys. "default" key and its value is mandatory ()
     "message": "<String for text message and json string for json>",
@@ -15,6 +24,18 @@ import boto3
     ? required for fifo topics with contents based deduplication set to false
     !"message_group_id": "<string id>"
     ? required for all fifo topics
+    !"batch": {
+      ? publishes many messages to the topic with publish_batch (10 per call), "message" and "subject" are ignored
+      ? requires "topic_arn" or "topic_name" ("target_arn" is not used for batches)
+      ? one of "messages" or "count" must be defined
+      "messages": ["<message>", ...],
+      "count": <number of messages>,
+      !"template": "<message, {i} is replaced by the index of the message>" ? default "message {i}"
+      !"rate": <messages per second> ? default as fast as possible
+      !"workers": <parallel publishers> ? default 8
+      !"message_groups": <number of fifo message groups to spread the messages over> ? default 1
+      ? on fifo topics each message gets the group id "<message_group_id or 'group'>-<index % message_groups>" and a unique deduplication id
+    }
     !"mock": <true|false>
   }
 
@@ -22,10 +43,45 @@ import boto3
     {
       "status": "<FAILED|SUCCESS>",
       !"response": "<Output of process on success>"
+      ? for batches: {"entries", "succeeded", "calls", "retries", "seconds", "per_second", "latency_ms", "batch_latency_ms": [<ms of each call>], "failed": [<failed entries, "Id" is the message index>]}
+      ? the status is FAILED if any message could not be published
       !"message": "<The service error>"
     }
 """
 
+def publish_batches(sns, topicArn, event):
+  batch = event["batch"]
+  if "messages" in batch:
+    messages = [str(message) for message in batch["messages"]]
+  else:
+    template = str(batch.get("template", "message {i}"))
+    messages = [template.replace("{i}", str(i)) for i in range(batch["count"])]
+
+  fifo = topicArn.endswith(".fifo")
+  groups = batch.get("message_groups", 1)
+  # Unique per run, a repeated run must not be dropped as duplicate
+  runID = uuid.uuid4().hex
+  entries = []
+  for i, message in enumerate(messages):
+    entry = {"Id": str(i), "Message": message}
+    if "message_structure" in event:
+      entry["MessageStructure"] = "json"
+    if fifo:
+      entry["MessageGroupId"] = f'{event.get("message_group_id", "group")}-{i % groups}'
+      entry["MessageDeduplicationId"] = f"{runID}-{i}"
+    entries.append(entry)
+
+  return run_batches(
+    lambda entries: sns.publish_batch(TopicArn=topicArn, PublishBatchRequestEntries=entries),
+    chunk(entries, lambda entry: len(entry["Message"].encode())),
+    workers=batch.get("workers", 8),
+    rate=batch.get("rate"),
+    keepLatencies=True
+  )
+
+@claim_checked
+@timed
+@retried
 def handler(event, context):
   # Mock if needed
   if 'mock' in event and event['mock'] == True:
@@ -35,16 +91,43 @@ def handler(event, context):
     }
 
   # Get the service resource
-  sns = boto3.client('sns')
-  # Get the event system
-  event_system = sns.meta.events
+  sns = client('sns')
 
-  # Put values in params dict
-  def param_injector(params, **kwargs):
+  # publish_batch only takes a topic
+  if "batch" in event and "topic_arn" not in event and "topic_name" not in event:
+    return {
+      "status": "FAILED",
+      "message": "Error: ValueError - batch mode requires topic_arn or topic_name"
+    }
+  if not any(key in event for key in ("target_arn", "topic_arn", "topic_name", "phone_number")):
+    return {
+      "status": "FAILED",
+      "message": "Error: ValueError - one of target_arn, topic_arn, topic_name or phone_number is required"
+    }
+
+  try:
+    if "batch" in event:
+      topicArn = event["topic_arn"] if "topic_arn" in event else resolver.topic_arn(event["topic_name"])
+      response = publish_batches(sns, topicArn, event)
+      if response["failed"]:
+        return {
+          "status": "FAILED",
+          "message": f'{len(response["failed"])} of {response["entries"]} messages could not be published',
+          "response": response
+        }
+      return {
+        "status": "SUCCESS",
+        "response": response
+      }
+
+    # Put values in params dict
+    params = {}
     if "target_arn" in event:
       params["TargetArn"] = event["target_arn"]
     elif "topic_arn" in event:
       params["TopicArn"] = event["topic_arn"]
+    elif "topic_name" in event:
+      params["TopicArn"] = resolver.topic_arn(event["topic_name"])
     else:
       params["PhoneNumber"] = event["phone_number"]
     if "message_structure" in event:
@@ -56,15 +139,15 @@ def handler(event, context):
       params["MessageDeduplicationId"] = event["message_deduplication_id"]
     if "message_group_id" in event:
       params["MessageGroupId"] = event["message_group_id"]
-  event_system.register('provide-client-params.sns.Publish', param_injector)
 
-  try:
     # Perform operation
-    response = sns.publish()
+    response = sns.publish(**params)
 
     # Delete irrelevant info
     response.pop("ResponseMetadata")
   except Exception as e:
+    if "topic_name" in event:
+      resolver.invalidate_on_error("sns", event["topic_name"], e)
     print("The Following error occurred while creating the entity:")
     print(e)
     return {
@@ -1,4 +1,9 @@
-import boto3
+from common.clients import client
+from common import resolver
+from common.readiness import queue_ready, timeout_for, wait_until_ready
+from common.claimcheck import claim_checked
+from common.retry import retried
+from common.timing import timed
 
 """
   Input Format: ! denotes optional item
@@ -7,6 +12,8 @@ import boto3
     "queue_name": "<Your Topic Name>",
     !"fifo": <true|false>, Currently only supported in us-west-2 and us-east-2
     !"attributes": "<Dict of SQS specific attributes>"
+    !"wait_until_ready": <true|false> ? return only once the queue can be used, default false
+    !"ready_timeout": <seconds> ? deadline for wait_until_ready, default 120 (and the lambda time left)
     !"mock": <true|false>
   }
 
@@ -14,12 +21,16 @@ import boto3
     {
       "status": "<FAILED|SUCCESS>",
       !"response": "<Output of process on success>"
+      ? with wait_until_ready it also has "ready_seconds": <seconds until usable>
       !"message": "<The service error>"
     }
 """
 
+@claim_checked
+@timed
+@retried
 def lambda_handler(event, context):
-    sqs = boto3.client('sqs')
+    sqs = client('sqs')
 
     if 'mock' in event and event['mock'] == True:
         return {
@@ -43,6 +54,9 @@ def lambda_handler(event, context):
         )
 
         response.pop("ResponseMetadata")
+        resolver.prime_queue(queue_name, response["QueueUrl"])
+        if event.get('wait_until_ready'):
+            response["ready_seconds"] = wait_until_ready(lambda: queue_ready(sqs, response["QueueUrl"]), timeout_for(event, context), "queue")
     except Exception as e:
         print("The Following error occurred during the process:")
         print(e)
@@ -1,11 +1,23 @@
-import boto3
+from common.clients import client
+from common import resolver
+from common.batching import chunk, run_batches
+from common.claimcheck import claim_checked
+from common.retry import retried
+from common.timing import timed
 
 """
   Input Format: ! denotes optional item
   ? denotes info
   event = {
     "queue_name": "<Your Topic Name>",
+    ? one of "receipt_handle", "receipt_handles" or "previous_output" must be defined
     "receipt_handle": "<The receipt handle of the message to delete from read message>"
+    "receipt_handles": ["<receipt handle>", ...],
+    "previous_output": <the response of a ReadMessage step>
+    ? set by the framework when the step has "use_previous_output": true, a drain mode ReadMessage must use "keep_handles"
+    ? FAILED when it holds no receipt handles
+    ? lists are deleted with delete_message_batch (10 handles per call), in parallel
+    !"workers": <number of parallel delete calls> ? default 8
     !"mock": <true|false>
   }
 
@@ -13,10 +25,37 @@ import boto3
     {
       "status": "<FAILED|SUCCESS>",
       !"response": "<Output of process on success>"
+      ? for lists: {"entries", "succeeded", "calls", "retries", "seconds", "per_second", "latency_ms", "failed": [<failed entries>]}
+      ? the status is FAILED if any message could not be deleted
       !"message": "<The service error>"
     }
 """
 
+def receipt_handles(event):
+    if 'receipt_handles' in event:
+        return event['receipt_handles']
+    output = event['previous_output'] or {}
+    # Drain mode summary or {"<MessageId>": ["<Body>", "<ReceiptHandle>"]}
+    if 'receipt_handles' in output:
+        return output['receipt_handles']
+    if 'stopped_by' in output:
+        raise ValueError('previous_output is a drain summary without receipt handles, the ReadMessage step needs "keep_handles": true')
+    handles = [message[1] for message in output.values() if isinstance(message, list)]
+    if not handles:
+        raise ValueError('previous_output has no receipt handles, the ReadMessage step received no messages')
+    return handles
+
+def delete_batches(sqs, queue_url, event):
+    entries = [{'Id': str(i), 'ReceiptHandle': handle} for i, handle in enumerate(receipt_handles(event))]
+    return run_batches(
+        lambda batch: sqs.delete_message_batch(QueueUrl=queue_url, Entries=batch),
+        chunk(entries),
+        workers=event.get('workers', 8)
+    )
+
+@claim_checked
+@timed
+@retried
 def lambda_handler(event, context):
     if 'mock' in event and event['mock'] == True:
         return {
@@ -25,20 +64,31 @@ def lambda_handler(event, context):
         }
     
     queue_name = event['queue_name']
-    sqs = boto3.client('sqs')
-    receipt_handle = event['receipt_handle']
+    sqs = client('sqs')
 
     try:
-        queue_url = sqs.get_queue_url(
-            QueueName=queue_name
-        )
+        queue_url = resolver.queue_url(queue_name)
+
+        if 'receipt_handles' in event or 'previous_output' in event:
+            response = delete_batches(sqs, queue_url, event)
+            if response['failed']:
+                return {
+                    "status": "FAILED",
+                    "message": f"{len(response['failed'])} of {response['entries']} messages could not be deleted",
+                    "response": response
+                }
+            return {
+                "status": "SUCCESS",
+                "response": response
+            }
 
         sqs.delete_message(
-            QueueUrl=queue_url['QueueUrl'],
-            ReceiptHandle=receipt_handle
+            QueueUrl=queue_url,
+            ReceiptHandle=event['receipt_handle']
         )
 
     except Exception as e:
+        resolver.invalidate_on_error("sqs", queue_name, e)
         print("The Following error occurred during the process:")
         print(e)
         return {
@@ -49,4 +99,4 @@ def lambda_handler(event, context):
     return {
         "status": "SUCCESS",
         'response': 'Deleted message from queue'
-    }
+    }
\ No newline at end of file
@@ -1,4 +1,8 @@
-import boto3
+from common.clients import client
+from common import resolver
+from common.claimcheck import claim_checked
+from common.retry import retried
+from common.timing import timed
 
 """
   Input Format: ! denotes optional item
@@ -16,6 +20,9 @@ import boto3
     }
 """
 
+@claim_checked
+@timed
+@retried
 def lambda_handler(event, context):
     if 'mock' in event and event['mock'] == True:
         return {
@@ -24,18 +31,18 @@ def lambda_handler(event, context):
         }
     
     queue_name = event['queue_name']
-    sqs = boto3.client('sqs')
+    sqs = client('sqs')
 
     try:
-        queue_url = sqs.get_queue_url(
-            QueueName=queue_name
-        )
+        queue_url = resolver.queue_url(queue_name)
 
         sqs.delete_queue(
-            QueueUrl=queue_url['QueueUrl']
+            QueueUrl=queue_url
         )
+        resolver.forget_queue(queue_name)
 
     except Exception as e:
+        resolver.invalidate_on_error("sqs", queue_name, e)
         print("The Following error occurred during the process:")
         print(e)
         return {
@@ -1,4 +1,8 @@
-import boto3
+from common.clients import client
+from common import resolver
+from common.claimcheck import claim_checked
+from common.retry import retried
+from common.timing import timed
 
 """
   Input Format: ! denotes optional item
@@ -15,16 +19,22 @@ import boto3
     }
 """
 
+@claim_checked
+@timed
+@retried
 def lambda_handler(event, context):
     queue_name = event['queue_name']
-    sqs = boto3.client('sqs')
+    sqs = client('sqs')
 
     try:
         queue_url = sqs.get_queue_url(
             QueueName=queue_name
         )
+        # Always asks the service (a validation must not trust the cache), the answer refreshes it
+        resolver.prime_queue(queue_name, queue_url['QueueUrl'])
 
     except Exception as e:
+        resolver.invalidate_on_error("sqs", queue_name, e)
         print("The Following error occurred during the process:")
         print(e)
         return {
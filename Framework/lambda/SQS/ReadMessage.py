@@ -1,4 +1,9 @@
-import boto3
+from common.clients import client
+from common import resolver
+import hashlib, time
+from common.claimcheck import claim_checked
+from common.retry import retried
+from common.timing import timed
 
 """
   Input Format: ! denotes optional item
@@ -6,7 +11,15 @@ import boto3
   event = {
     "queue_name": "<Your Topic Name>",
     !MaxNumberOfMessages: <1-10> ? default 1
-    !WaitTimeSeconds: <0-20> ? default 0
+    !WaitTimeSeconds: <0-20> ? default 0, 20 in drain mode
+    !"drain": {
+      ? keeps long polling until one of the limits is reached, returns a summary instead of the messages
+      !"max_messages": <number of unique messages to stop at> ? default 1000
+      !"max_seconds": <deadline in seconds> ? default 60, also limited by the lambda time left (FAILED when no time is left)
+      !"stop_on_empty": <true|false> ? stop at the first empty receive, default true
+      !"sample": <number of message bodies to return> ? default 5
+      !"keep_handles": <true|false> ? return the receipt handles (eg. for DeleteMessage), the latest one of a message received again, default false
+    }
     !"mock": <true|false>
   }
 
@@ -14,10 +27,84 @@ import boto3
     {
       "status": "<FAILED|SUCCESS>",
       !"response": "<Output of process on success>"
+      ? {"<MessageId>": ["<Body>", "<ReceiptHandle>"]} or in drain mode:
+      ? {
+      ?   "messages": <unique messages>, "duplicates": <messages received again (same MessageId)>, "receives": <receive calls>,
+      ?   "bytes": <total size of the unique bodies>, "digest": "<sha256 of the sorted body hashes, independent of the order>",
+      ?   "distinct_bodies": <number>, "stopped_by": "<max_messages|deadline|empty>",
+      ?   "sample": {"<MessageId>": "<Body>"}, !"receipt_handles": ["<ReceiptHandle>"]
+      ? }
       !"message": "<The service error>"
     }
 """
 
+DRAIN_RESERVE_SECONDS = 5
+
+def drain(sqs, queue_url, options, waitTimeSeconds, context):
+    maxMessages = options.get('max_messages', 1000)
+    seconds = options.get('max_seconds', 60)
+    if context is not None:
+        seconds = min(seconds, context.get_remaining_time_in_millis() / 1000 - DRAIN_RESERVE_SECONDS)
+    if seconds <= 0:
+        # An empty drain would pass for an empty queue
+        raise TimeoutError(f"No lambda time left to drain the queue, {DRAIN_RESERVE_SECONDS} s are kept to return (raise the function timeout)")
+    deadline = time.monotonic() + seconds
+    sampleSize = options.get('sample', 5)
+
+    bodyHashes = {}
+    sample = {}
+    # Latest receipt handle of each message, SQS only accepts the handle of the latest receive
+    handles = {}
+    duplicates = 0
+    receives = 0
+    size = 0
+    stoppedBy = 'max_messages'
+    while len(bodyHashes) < maxMessages:
+        left = deadline - time.monotonic()
+        if left <= 0:
+            stoppedBy = 'deadline'
+            break
+        data = sqs.receive_message(
+            QueueUrl=queue_url,
+            MaxNumberOfMessages=min(10, maxMessages - len(bodyHashes)),
+            WaitTimeSeconds=int(min(waitTimeSeconds, left))
+        )
+        receives += 1
+        if not data.get('Messages'):
+            if options.get('stop_on_empty', True):
+                stoppedBy = 'empty'
+                break
+            continue
+        for message in data['Messages']:
+            if options.get('keep_handles'):
+                handles[message['MessageId']] = message['ReceiptHandle']
+            # A message received again (visibility timeout, at least once delivery) is counted once
+            if message['MessageId'] in bodyHashes:
+                duplicates += 1
+                continue
+            body = message['Body'].encode()
+            bodyHashes[message['MessageId']] = hashlib.sha256(body).hexdigest()
+            size += len(body)
+            if len(sample) < sampleSize:
+                sample[message['MessageId']] = message['Body']
+
+    summary = {
+        "messages": len(bodyHashes),
+        "duplicates": duplicates,
+        "receives": receives,
+        "bytes": size,
+        "digest": hashlib.sha256("".join(sorted(bodyHashes.values())).encode()).hexdigest(),
+        "distinct_bodies": len(set(bodyHashes.values())),
+        "stopped_by": stoppedBy,
+        "sample": sample
+    }
+    if options.get('keep_handles'):
+        summary["receipt_handles"] = list(handles.values())
+    return summary
+
+@claim_checked
+@timed
+@retried
 def lambda_handler(event, context):
     if 'mock' in event and event['mock'] == True:
         return {
@@ -26,7 +113,7 @@ def lambda_handler(event, context):
         }
     
     queue_name = event['queue_name']
-    sqs = boto3.client('sqs')
+    sqs = client('sqs')
     MaxNumberOfMessages = 1
     WaitTimeSeconds = 0
     if 'MaxNumberOfMessages' in event:
@@ -34,26 +121,30 @@ def lambda_handler(event, context):
     
     if 'WaitTimeSeconds' in event:
         WaitTimeSeconds = event['WaitTimeSeconds']
+    elif 'drain' in event:
+        WaitTimeSeconds = 20
 
 
     try:
-        queue_url = sqs.get_queue_url(
-            QueueName=queue_name
-        )
+        queue_url = resolver.queue_url(queue_name)
 
-        data = sqs.receive_message(
-            QueueUrl=queue_url['QueueUrl'],
-            MaxNumberOfMessages=MaxNumberOfMessages,
-            WaitTimeSeconds=WaitTimeSeconds
-        )
+        if 'drain' in event:
+            response = drain(sqs, queue_url, event['drain'], WaitTimeSeconds, context)
+        else:
+            data = sqs.receive_message(
+                QueueUrl=queue_url,
+                MaxNumberOfMessages=MaxNumberOfMessages,
+                WaitTimeSeconds=WaitTimeSeconds
+            )
 
-        response = {}
+            response = {}
 
-        if 'Messages' in data:
-            for message in data['Messages']:
-                response[message['MessageId']] = [message['Body'], message['ReceiptHandle']]
+            if 'Messages' in data:
+                for message in data['Messages']:
+                    response[message['MessageId']] = [message['Body'], message['ReceiptHandle']]
 
     except Exception as e:
+        resolver.invalidate_on_error("sqs", queue_name, e)
         print("The Following error occurred during the process:")
         print(e)
         return {
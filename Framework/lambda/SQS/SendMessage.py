@@ -1,11 +1,24 @@
-import boto3
+from common.clients import client
+from common import resolver
+from common.batching import chunk, run_batches
+from common.claimcheck import claim_checked
+from common.retry import retried
+from common.timing import timed
+import uuid
 
 """
   Input Format: ! denotes optional item
   ? denotes info
   event = {
     "queue_name": "<Your Topic Name>",
+    ? one of "message", "messages" or "generate" must be defined
     "message" : "<message in JSON, XML or unformatted text format>"
+    "messages": ["<message>", ...],
+    "generate": {"count": <number of messages>, "template": "<message, {i} is replaced by the index of the message>"},
+    ? lists and generated messages are sent with send_message_batch (10 messages / 256 KB per call)
+    !"senders": <number of parallel senders> ? default 8
+    !"message_group_id": "<string id>" ? required for fifo queues, used for all messages
+    ? on fifo queues each message of a list or generated batch gets a unique deduplication id
     !"mock": <true|false>
   }
 
@@ -13,10 +26,40 @@ import boto3
     {
       "status": "<FAILED|SUCCESS>",
       !"response": "<Output of process on success>"
+      ? for batches: {"entries", "succeeded", "calls", "retries", "seconds", "per_second" (messages/sec), "latency_ms", "failed": [<failed entries>]}
+      ? the status is FAILED if any message could not be sent
       !"message": "<The service error>"
     }
 """
 
+def batch_messages(event):
+    if 'messages' in event:
+        return [str(message) for message in event['messages']]
+    template = str(event['generate']['template'])
+    return [template.replace('{i}', str(i)) for i in range(event['generate']['count'])]
+
+def send_batches(sqs, queue_url, event):
+    fifo = queue_url.endswith('.fifo')
+    # Unique per run and per message, identical templated messages and repeated runs must not be dropped as duplicates
+    runID = uuid.uuid4().hex
+    entries = []
+    for i, body in enumerate(batch_messages(event)):
+        entry = {'Id': str(i), 'MessageBody': body}
+        if 'message_group_id' in event:
+            entry['MessageGroupId'] = event['message_group_id']
+        if fifo:
+            entry['MessageDeduplicationId'] = f'{runID}-{i}'
+        entries.append(entry)
+    batches = chunk(entries, lambda entry: len(entry['MessageBody'].encode()))
+    return run_batches(
+        lambda batch: sqs.send_message_batch(QueueUrl=queue_url, Entries=batch),
+        batches,
+        workers=event.get('senders', 8)
+    )
+
+@claim_checked
+@timed
+@retried
 def lambda_handler(event, context):
     if 'mock' in event and event['mock'] == True:
         return {
@@ -25,21 +68,28 @@ def lambda_handler(event, context):
         }
     
     queue_name = event['queue_name']
-    sqs = boto3.client('sqs')
-    message = event['message']
+    sqs = client('sqs')
 
     try:
-        queue_url = sqs.get_queue_url(
-            QueueName=queue_name
-        )
+        queue_url = resolver.queue_url(queue_name)
 
-        response = sqs.send_message(
-            QueueUrl=queue_url['QueueUrl'],
-            MessageBody=str(message)
-        )
+        if 'messages' in event or 'generate' in event:
+            response = send_batches(sqs, queue_url, event)
+            if response['failed']:
+                return {
+                    "status": "FAILED",
+                    "message": f"{len(response['failed'])} of {response['entries']} messages could not be sent",
+                    "response": response
+                }
+        else:
+            params = {'QueueUrl': queue_url, 'MessageBody': str(event['message'])}
+            if 'message_group_id' in event:
+                params['MessageGroupId'] = event['message_group_id']
+            response = sqs.send_message(**params)
 
 
     except Exception as e:
+        resolver.invalidate_on_error("sqs", queue_name, e)
         print("The Following error occurred during the process:")
         print(e)
         return {
@@ -0,0 +1,121 @@
+from typing import Any
+import copy, os
+import StepLogger, TestLoader
+from common.claimcheck import offload, resolve
+from common.clients import resource
+from common.logkeys import log_key
+from common.logsink import LogSink
+from common.operations import get_handler, unknown_operation
+
+"""
+  INFO: Runs consecutive steps of a test in a single invocation (step fusion). Each step is loaded like TestLoader does, run with the handler of its operation (check common/operations.py) and logged like StepLogger does, all log items of the invocation are written in one batch at the end.
+  Control goes back to the state machine when:
+  - the next step is a "Wait" or is marked "isolated": it is returned exactly like TestLoader output, so the Choose Test Scenario state runs it in its own lambda and StepLogger logs it
+  - less than STEP_EXECUTOR_RESERVE_MS (default 30000) of the invocation time is left, after at least one step: type "Continue"
+  - a step did not succeed: type "Continue", the next invocation resumes with the following step
+    ? a step whose previous output cannot be read (log item missing, of another step or not readable) fails without running, whether it is isolated or not
+  - all steps are complete: type "Completed"
+
+  Input Format:  ! denotes optional item
+  ? denotes info
+  event = {
+    "test_id": "<file name of the test>",
+    "test_group_id": "<Id of this test group>",
+    "log_table_name": "<Name of table for logging>",
+    "steps": [<list of steps of the test>],
+    ? or a claim check reference to it (check common/claimcheck.py)
+    ? a step may have !"isolated": <true|false> next to "operation" and "input", to run it in its own lambda
+    ? and !"use_previous_output": <true|false>, to get the "response" of the previous step in its input as "previous_output" (eg. ReadMessage > DeleteMessage), a claim check reference when large
+    "step_id": <index of the last step done>
+  }
+
+  Output Format: same as TestLoader, with
+  {
+    "type": "<Completed|Continue|Wait|operation of an isolated step>",
+    "results": {"<SUCCESS|FAILED>": <number of steps run in this invocation>}
+  }
+"""
+
+RESERVE_MS = int(os.environ.get("STEP_EXECUTOR_RESERVE_MS", 30000))
+
+def previous_output(event, stepID: int, previous: dict[str, Any] | None) -> Any:
+  if previous is None:
+    # The previous step ran in another invocation, its result is the latest log item of its operation
+    # Steps of a test run in order, the latest item of the operation is the previous step unless its log was lost
+    item = resource('dynamodb').Table(event["log_table_name"]).get_item(
+      Key=log_key(event["test_group_id"], f'T<{event["test_id"]}>:S<{resolve(event["steps"])[stepID - 1]["operation"]}>'),
+      ConsistentRead=True
+    ).get("Item")
+    if item is None:
+      raise LookupError(f'No log item of step {stepID - 1}, its output cannot be read back')
+    if item.get("StepID") is not None and item["StepID"] != stepID - 1:
+      raise LookupError(f'The log item of step {stepID - 1} is not the latest of its operation (step {item["StepID"]}), its output cannot be read back')
+    # Large outputs are logged as a claim check reference
+    previous = resolve(item.get("Output", {}))
+  return previous.get("response") if isinstance(previous, dict) else None
+
+def failed(e: Exception) -> dict[str, Any]:
+  print("The Following error occurred during the process:")
+  print(e)
+  return {
+    "status": "FAILED",
+    "message": "Error: " + str(type(e).__name__) + " - "+ str(e)
+  }
+
+def run_step(loaded: dict[str, Any], context) -> dict[str, Any]:
+  handler = get_handler(loaded["type"])
+  if handler is None:
+    return unknown_operation(loaded["type"])
+  try:
+    return handler(copy.deepcopy(loaded["test"]), context)
+  except Exception as e:
+    # In its own lambda this would fail the execution, here it fails the step
+    return failed(e)
+
+def handler(event, context):
+  steps: list[dict[str, Any]] = resolve(event["steps"])
+  stepID: int = event["step_id"]
+  results: dict[str, int] = {}
+  previous: dict[str, Any] | None = None
+
+  def output(loaded: dict[str, Any], stopType: str | None = None) -> dict[str, Any]:
+    loaded["results"] = results
+    if stopType is not None:
+      loaded.update({"type": stopType, "test": None, "log": None})
+    return loaded
+
+  with LogSink(event["log_table_name"]) as sink:
+    while True:
+      loaded = TestLoader.handler(dict(event, steps=steps, step_id=stepID), context)
+      if loaded["type"] == "Completed":
+        return output(loaded)
+      step = steps[loaded["step_id"]]
+      result: Any = None
+      if step.get("use_previous_output") and loaded["step_id"] > 0:
+        try:
+          # A large output is passed as a reference, an isolated step returns it to the state machine (resolved by claim_checked)
+          loaded["test"] = dict(loaded["test"], previous_output=offload(previous_output(event, loaded["step_id"], previous), f'{event["test_group_id"]}/outputs'))
+        except Exception as e:
+          # A missing or mismatched log item or a failed read fails the step, not the execution
+          result = failed(e)
+      if result is None:
+        if loaded["type"] == "Wait" or step.get("isolated"):
+          return output(loaded)
+        if results and context is not None and context.get_remaining_time_in_millis() < RESERVE_MS:
+          loaded["step_id"] = stepID
+          return output(loaded, "Continue")
+        result = run_step(loaded, context)
+
+      status = result.get("status", "FAILED") if isinstance(result, dict) else "FAILED"
+      results[status] = results.get(status, 0) + 1
+      previous = result if isinstance(result, dict) else {"response": result}
+      for item in StepLogger.log_items({
+        "test_group_id": event["test_group_id"],
+        "Payload": dict(loaded),
+        "testResult": {"Payload": dict(result) if isinstance(result, dict) else {"response": result}}
+      }):
+        sink.put(item)
+
+      stepID = loaded["step_id"]
+      if status != "SUCCESS":
+        return output(loaded, "Continue")
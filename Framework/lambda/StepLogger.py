@@ -1,8 +1,10 @@
-import boto3
-import time
+from typing import Any
+from common.claimcheck import offload, resolve
+from common.logsink import LogSink
+from common.timing import epoch_ms, timestamp
 
 """
-  INFO: Logs the input and result of the operation of a test step in the log table.
+  INFO: Logs the input and result of the operation of a test step in the log table, together with the step start item created by TestLoader (a single batch write).
 
   Input Format: ! denotes optional item
   ? denotes info
@@ -12,7 +14,9 @@ import time
     "Payload": {
       "test": {<The input sent to test/validation lambda>},
       "test_scenario_id": "<Test Scenario ID>",
-      "type": "<Test/validation type>"
+      "type": "<Test/validation type>",
+      !"step_id": <index of the step in the test>,
+      !"log": {<log item for the start of the step>}
     },
     "testResult": {
       "Payload": {
@@ -25,27 +29,52 @@ import time
     }
   }
 
+  The "timing" of the output (check common/timing.py) is logged as numeric attributes (ms): "StartMs", "EndMs" (epoch), "DurationMs", "AwsMs", "AwsCalls" and "GapMs", the orchestration time between the load of the step and the start of the operation plus between its end and the log.
+  "StepID" is the index of the step in the test (items of the same operation in a test share a key, the latest step wins).
+  "LoggedMs" is always logged, with "ElapsedMs" since the load of the step when the start log item is given.
+  A large operation output is stored in the payload bucket and logged as a claim check reference (check common/claimcheck.py), an output given as a reference is resolved first.
   Because we are logging in both logger and finisher, I have discarded map states output
   Output Format: null
+  ? log_items builds the same items without writing them (used by StepExecutor)
 """
-def handler(event, context):
-  # Get the service resource.
-  ddb = boto3.resource('dynamodb')
-  # Get the log table
-  table = ddb.Table(event["log_table_name"])
-
+def log_items(event) -> list[dict[str, Any]]:
   # Create Log Item
   inp=event["Payload"]
-  output=event.pop("testResult")["Payload"]
+  startItem=inp.pop("log", None)
+  # The output of the previous step is already logged with it
+  if isinstance(inp.get("test"), dict) and "previous_output" in inp["test"]:
+    inp["test"] = dict(inp["test"], previous_output="<output of the previous step>")
+  output=dict(resolve(event.pop("testResult")["Payload"]))
   status=output.pop("status", "FAILED")
+  timing=output.pop("timing", None)
   item = {
     "TestGroupID": event["test_group_id"],
     "TestScenarioID": inp["test_scenario_id"],
     "Status": status,
     "Input": inp,
-    "Output": output,
-    "Timestamp": time.strftime("%DT%H:%M:%S", time.localtime())
+    "Output": offload(output, f'{event["test_group_id"]}/outputs'),
+    # Items are keyed by operation, the index tells which step of the test wrote it
+    "StepID": inp.get("step_id"),
+    "LoggedMs": epoch_ms(),
+    "Timestamp": timestamp()
   }
+  loadedMs = startItem.get("LoadedMs") if startItem else None
+  if loadedMs is not None:
+    item["ElapsedMs"] = item["LoggedMs"] - loadedMs
+  if timing:
+    item.update({
+      "StartMs": timing["start_ms"],
+      "EndMs": timing["end_ms"],
+      "DurationMs": timing["duration_ms"],
+      "AwsMs": timing["aws_ms"],
+      "AwsCalls": timing["aws_calls"]
+    })
+    if loadedMs is not None:
+      item["GapMs"] = max(0, timing["start_ms"] - loadedMs) + max(0, item["LoggedMs"] - timing["end_ms"])
+  return [startItem, item] if startItem else [item]
 
-  # Put log item in log table
-  response = table.put_item(Item=item)
\ No newline at end of file
+def handler(event, context):
+  # Put both log items in log table
+  with LogSink(event["log_table_name"]) as sink:
+    for item in log_items(event):
+      sink.put(item)
@@ -1,16 +1,22 @@
-import boto3
-import time
+from common.clients import client, resource
+from common.logsink import LogSink
+from common.scheduler import release_dependents
+from common.timing import timestamp
 
 """
-  INFO: Called after the test's steps list becomes empty. Logs the completion of the test in the log table.
+  INFO: Called after the test's steps list becomes empty, or after its dependencies timed out. Logs the completion of the test in the log table and releases the tests waiting for this one.
 
   Input Format:  ! denotes optional item
   ? denotes info
   event = {
     "test_group_id": "<Id of this test group>",
     "log_table_name": "<Name of table for logging>",
-    "test_scenario_id": "<format T<test_id>:S-1>",
-    ? index of step = -1 when control reaches here
+    "Payload": {
+      "test_scenario_id": "<format T<test_id>:S<Completed>>",
+      !"status": "FAILED"
+      ? set when the test did not run (its dependencies timed out), logged instead of FINISH
+    },
+    "dependents": [<tests waiting for this test>],
     ? we list the required input here, other data is also saved in the log
   }
 
@@ -22,22 +28,29 @@ import time
 """
 def handler(event, context):
   # Get the service resource.
-  ddb = boto3.resource('dynamodb')
+  ddb = resource('dynamodb')
   # Get the log table
   table = ddb.Table(event["log_table_name"])
 
   # Create Log item
   inp=event
+  status = event["Payload"].get("status", "FINISH")
   item = {
     "TestGroupID": event["test_group_id"],
     "TestScenarioID": event["Payload"]["test_scenario_id"],
-    "Status": "FINISH",
+    "Status": status,
     "Input": inp,
-    "Output": "Test Completed Successfully",
-    "Timestamp": time.strftime("%DT%H:%M:%S", time.localtime())
+    "Output": "Test Completed Successfully" if status == "FINISH" else "Test Failed, its dependencies did not finish in time",
+    "Timestamp": timestamp()
   }
   # Put log in table
-  response = table.put_item(Item=item)
+  with LogSink(event["log_table_name"], ddb) as sink:
+    sink.put(item)
+
+  # Start the tests whose last dependency was this test
+  if event.get("dependents"):
+    sfn = client("stepfunctions")
+    release_dependents(table, sfn, event["test_group_id"], event["dependents"])
   return {
     'status': "SUCCESS",
     'response': "Test Execution Completed"
@@ -1,8 +1,10 @@
 from typing import Any
-import boto3
-import time
+from common.claimcheck import resolve
+from common.timing import epoch_ms, timestamp
 """
   INFO: Loads an individual operation from a list of steps from a test. The appropriate Test or Validation Lambda is called after this step.
+  The start of the step is not written here, its log item is returned and written by StepLogger together with the step result (one write per step).
+  ? the START item is lost if the step's lambda dies before StepLogger runs (eg. a timeout), the execution fails at that state and the START item of the step is missing from the log
 
   Input Format:  ! denotes optional item
   ? denotes info
@@ -10,6 +12,7 @@ import time
     "test_id": <int index of the test in the sfn input array>,
     "test_group_id": "<Id of this test group>",
     "steps": [<list of steps to do, empty if test is complete>],
+    ? or a claim check reference to it, resolved from the cache of the container (check common/claimcheck.py)
     "step_id": <index of the current step, used in logging>
   }
   
@@ -20,26 +23,25 @@ import time
     "step_id": <index of the current step, used in logging and loading next step>
     ? index = -1 before starting this test
     "type": "<type of test step, used in choose test scenario>",
-    "test": {all the data required for this test step}
+    "test": {all the data required for this test step},
+    "log": {log item for the start of this step}
+    ? null when all steps are complete, "LoadedMs" is the wall clock time the step was loaded (epoch ms)
   }
 """
 
 def handler(event, context):
   output: dict[str, Any] = {}
-  steps: list[dict[str, Any]] = event["steps"]
+  steps: list[dict[str, Any]] = resolve(event["steps"])
   testID: str = event["test_id"]
   stepID: int = event["step_id"]
   stepID += 1
-  # Get the service resource.
-  ddb = boto3.resource('dynamodb')
-  # Get the log table
-  table = ddb.Table(event["log_table_name"])
   if stepID == len(steps):
     output = {
       "test_scenario_id": f'T<{testID}>:S<Completed>',
       "step_id": stepID,
       "type": "Completed",
-      "test": None
+      "test": None,
+      "log": None
     }
   else:
     step = steps[stepID]
@@ -51,15 +53,15 @@ def handler(event, context):
       "Status": "START",
       "Input": "Remaining Steps: " + str(len(steps) - stepID - 1),
       "Output": "Iteration Started",
-      "Timestamp": time.strftime("%DT%H:%M:%S", time.localtime())
+      "LoadedMs": epoch_ms(),
+      "Timestamp": timestamp()
     }
-    # Put log in table
-    response = table.put_item(Item=item)
 
     output = {
       "test_scenario_id": f'T<{testID}>:S<{step["operation"]}>',
       "step_id": stepID,
       "type": step["operation"],
-      "test": step["input"]
+      "test": step["input"],
+      "log": item
     }
   return output
\ No newline at end of file
@@ -0,0 +1,67 @@
+from common.clients import client, resource
+from common.timers import TIMER_TABLE_NAME, acquire_lease, release_lease, run_pass, next_due, now_ms, wake_at
+import json, os, time
+
+"""
+  INFO: Releases the task tokens of the Wait steps whose time is over (check common/timers.py). Triggered by the wake-up messages of the timer queue, sent by the Waiter with the wait as SQS delay, and every minute by a schedule rule as a fallback.
+  Each invocation holds the timer lease while it runs passes, and ends once no timer is due within TIMER_TICK_S seconds (default 1): a later timer has its own wake-up message, so no lambda runs between the due times.
+  ? a timer due within the tick (delays are whole seconds, clocks of the lambdas differ slightly) is waited for in the same invocation
+  ? the lease is renewed before each pass and the passes stop as soon as a renewal fails, so two schedulers never release the same timers
+  ? wake-ups received while another scheduler holds the lease are sent again one second later, that scheduler may have run its pass before their timers were due
+
+  Input Format:  ! denotes optional item
+  ? denotes info
+  event = {
+    !"Records": [<SQS wake-up messages, body {"due": <due time in epoch ms>}>]
+    ? a schedule rule event has none
+  }
+
+  Output Format:
+  {
+    "status": "SUCCESS",
+    "response": {"passes": <number>, "released": <tokens released>, "expired": <tokens of stopped/timed out executions>}
+  }
+"""
+
+TICK_S = float(os.environ.get("TIMER_TICK_S", 1))
+# Time kept to release the lease and return
+RESERVE_MS = 5000
+
+def handler(event, context):
+  table = resource('dynamodb').Table(TIMER_TABLE_NAME)
+  sfn = client("stepfunctions")
+  owner = context.aws_request_id
+  totals = {"passes": 0, "released": 0, "expired": 0}
+  dues = [json.loads(record["body"])["due"] for record in event.get("Records", [])]
+  nearMs = now_ms() + TICK_S * 1000
+  for dueMs in dues:
+    # Waits longer than the longest SQS delay
+    if dueMs > nearMs:
+      wake_at(client("sqs"), dueMs)
+  if not acquire_lease(table, owner):
+    for dueMs in dues:
+      if dueMs <= nearMs:
+        wake_at(client("sqs"), now_ms() + 1000)
+    return {"status": "SUCCESS", "response": totals}
+
+  try:
+    while True:
+      result = run_pass(table, sfn)
+      totals["passes"] += 1
+      totals["released"] += result["released"]
+      totals["expired"] += result["expired"]
+
+      dueMs = next_due(table)
+      if dueMs is None or dueMs - now_ms() > TICK_S * 1000:
+        break
+      if context.get_remaining_time_in_millis() < RESERVE_MS + TICK_S * 1000:
+        # That timer is served by a fresh invocation
+        wake_at(client("sqs"), dueMs)
+        break
+      time.sleep(max(0, dueMs - now_ms()) / 1000)
+      if not acquire_lease(table, owner):
+        # The lease expired during a long pass and was taken over, the new holder runs the passes
+        break
+  finally:
+    release_lease(table, owner)
+  return {"status": "SUCCESS", "response": totals}
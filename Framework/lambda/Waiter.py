@@ -1,7 +1,9 @@
-import boto3, time, json
+from common.clients import client, resource
+from common.timers import TIMER_QUEUE_URL, TIMER_TABLE_NAME, add_timer, wake_at
 
 """
   INFO: Used to insert specified minimum waiting time between any two step operations.
+  Does not sleep: the task token is stored in the timer table with its due time and the TimerScheduler sends the task success once it is over (check common/timers.py). A delayed message on the timer queue starts the scheduler at the due time.
 
   Input Format:  ! denotes optional item
   ? denotes info
@@ -12,7 +14,8 @@ import boto3, time, json
     ? The waiter will at least wait for this time (it is a lower bound, upper bound cannot be fixed)
   }
   
-  Output Format:
+  Output Format: null
+  ? the task output is sent with the token once the time is over
     {
       "status": "SUCCESS",
       "response": "Wait Complete"
@@ -20,12 +23,9 @@ import boto3, time, json
 """
 
 def handler(event, context):
-  sfn = boto3.client("stepfunctions")
-  time.sleep(float(event["wait_time"]))
-  response = sfn.send_task_success(
-    taskToken=event["token"],
-    output=json.dumps({
-      "status": "SUCCESS",
-      "response": "Wait Complete"
-    })
-  )
\ No newline at end of file
+  table = resource('dynamodb').Table(TIMER_TABLE_NAME)
+  dueMs = add_timer(table, event["token"], event["wait_time"])
+
+  # Without a timer queue (eg. local runs) the passes are run by the caller
+  if TIMER_QUEUE_URL:
+    wake_at(client("sqs"), dueMs)
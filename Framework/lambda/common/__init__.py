@@ -0,0 +1,3 @@
+"""
+  INFO: Helpers shared by the framework lambdas (main flow and operation handlers).
+"""
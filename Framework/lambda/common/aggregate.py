@@ -0,0 +1,133 @@
+from decimal import Decimal
+from threading import Lock
+from typing import Any, Iterable
+import hashlib, json
+
+"""
+  INFO: Streaming aggregation of DynamoDB items for the bulk validation operations (BatchGetEntries, QueryEntries, ScanEntries). Pages are folded into a compact result as they arrive, memory does not grow with the number of items.
+
+  Aggregation spec, the "aggregate" item of the operation input (all items optional):
+  "aggregate": {
+    "hash": <true|false>,
+    ? order independent sha256 based digest of all the items (each item as canonical json), compare it between runs or tables
+    "predicate": {"attribute": "<name>", "op": "<eq|ne|lt|le|gt|ge|exists|not_exists|begins_with|contains>", !"value": <value>},
+    ? counts the items matching and not matching, keeps a few not matching ones
+    "sample": <number of items to return> ? default 0
+    "expect": {!"count": <number>, !"hash": "<digest>", !"all_match": <true|false>}
+    ? adds "passed": <true|false> to the result
+  }
+  The count is always computed. When nothing else is asked the operations use Select COUNT, items are not even sent back by DynamoDB.
+
+  Result format:
+  {
+    "count": <number of items>,
+    !"hash": "<digest>",
+    !"matched": <number>, !"not_matched": <number>, !"not_matched_sample": [<items>],
+    !"sample": [<items>],
+    !"passed": <true|false>
+  }
+"""
+
+SAMPLE_FAILURES = 5
+PREDICATES = {
+  "eq": lambda value, expected: value == expected,
+  "ne": lambda value, expected: value != expected,
+  "lt": lambda value, expected: value is not None and value < expected,
+  "le": lambda value, expected: value is not None and value <= expected,
+  "gt": lambda value, expected: value is not None and value > expected,
+  "ge": lambda value, expected: value is not None and value >= expected,
+  "exists": lambda value, expected: value is not None,
+  "not_exists": lambda value, expected: value is None,
+  "begins_with": lambda value, expected: isinstance(value, str) and value.startswith(expected),
+  "contains": lambda value, expected: value is not None and expected in value
+}
+
+def _json_default(value: Any) -> Any:
+  if isinstance(value, Decimal):
+    return int(value) if value == value.to_integral_value() else float(value)
+  if isinstance(value, (set, frozenset)):
+    return sorted(value, key=str)
+  return str(value)
+
+def item_hash(item: dict[str, Any]) -> int:
+  return int.from_bytes(hashlib.sha256(json.dumps(item, sort_keys=True, default=_json_default).encode()).digest(), "big")
+
+def _expected(value: Any) -> Any:
+  # Numbers of the input are compared with the Decimal values of DynamoDB
+  return Decimal(str(value)) if isinstance(value, (int, float)) and not isinstance(value, bool) else value
+
+def _safe(check, value: Any, expected: Any) -> bool:
+  # Values of another type (eg. a string compared with a number) do not match
+  try:
+    return bool(check(value, expected))
+  except TypeError:
+    return False
+
+class Aggregator:
+  def __init__(self, spec: dict[str, Any] | None = None):
+    self.spec = spec or {}
+    self.count = 0
+    self.digest = 0
+    self.matched = 0
+    self.notMatched = 0
+    self.notMatchedSample: list[dict[str, Any]] = []
+    self.sample: list[dict[str, Any]] = []
+    self.lock = Lock()
+    predicate = self.spec.get("predicate")
+    self.predicate = None
+    if predicate is not None:
+      if predicate.get("op") not in PREDICATES:
+        raise ValueError(f'Unknown predicate op {predicate.get("op")!r}, expected one of {", ".join(PREDICATES)}')
+      check = PREDICATES[predicate["op"]]
+      expected = _expected(predicate.get("value"))
+      self.predicate = lambda item: _safe(check, item.get(predicate["attribute"]), expected)
+
+  def count_only(self) -> bool:
+    return not (self.spec.get("hash") or self.predicate or self.spec.get("sample") or "hash" in self.spec.get("expect", {}) or self.spec.get("expect", {}).get("all_match"))
+
+  def add(self, items: Iterable[dict[str, Any]], count: int | None = None):
+    # Thread safe, parallel readers share one aggregator. count is for Select COUNT pages (no items)
+    with self.lock:
+      if count is not None:
+        self.count += count
+      for item in items:
+        if count is None:
+          self.count += 1
+        if self.spec.get("hash") or "hash" in self.spec.get("expect", {}):
+          # Sum modulo 2^256: the order of the pages and segments does not matter, unlike a running sha256
+          self.digest = (self.digest + item_hash(item)) % (1 << 256)
+        if self.predicate is not None:
+          if self.predicate(item):
+            self.matched += 1
+          else:
+            self.notMatched += 1
+            if len(self.notMatchedSample) < SAMPLE_FAILURES:
+              self.notMatchedSample.append(item)
+        if len(self.sample) < self.spec.get("sample", 0):
+          self.sample.append(item)
+
+  def result(self) -> dict[str, Any]:
+    result: dict[str, Any] = {"count": self.count}
+    if self.spec.get("hash") or "hash" in self.spec.get("expect", {}):
+      result["hash"] = f"{self.digest:064x}"
+    if self.predicate is not None:
+      result["matched"] = self.matched
+      result["not_matched"] = self.notMatched
+      result["not_matched_sample"] = self.notMatchedSample
+    if self.spec.get("sample"):
+      result["sample"] = self.sample
+    expect = self.spec.get("expect")
+    if expect is not None:
+      result["passed"] = (
+        ("count" not in expect or expect["count"] == self.count)
+        and ("hash" not in expect or expect["hash"] == result["hash"])
+        and (not expect.get("all_match") or (self.predicate is not None and self.notMatched == 0))
+      )
+    return result
+
+def projection(attributes: list[str] | None) -> dict[str, Any]:
+  # ProjectionExpression parameters, names are always aliased (many common names are reserved words)
+  if not attributes:
+    return {}
+  names = {f"#p{i}": attribute for i, attribute in enumerate(attributes)}
+  return {"ProjectionExpression": ", ".join(names), "ExpressionAttributeNames": names}
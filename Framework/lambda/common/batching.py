@@ -0,0 +1,110 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable
+from common.retry import pause
+import time
+
+"""
+  INFO: Helpers for the batch APIs of SQS and SNS (send_message_batch, delete_message_batch, publish_batch), which take up to 10 entries per call and answer with "Successful" and "Failed" entry lists.
+  - chunk splits the entries in batches by count and (optionally) total size
+  - run_batches sends the batches with a pool of parallel senders, retries only the failed entries which are not the sender's fault (with the backoff of the shared retry engine, check common/retry.py) and measures the run
+    with a rate (entries per second) the calls are paced, each call takes its share of the time whichever sender makes it
+  An exception of a whole call (eg. the queue does not exist) stops the run and is raised to the handler.
+"""
+
+BATCH_ENTRIES = 10
+BATCH_BYTES = 262144
+WORKERS = 8
+MAX_RETRIES = 3
+
+def chunk(entries: list[dict[str, Any]], sizeOf: Callable[[dict[str, Any]], int] | None = None, maxEntries: int = BATCH_ENTRIES, maxBytes: int = BATCH_BYTES) -> list[list[dict[str, Any]]]:
+  batches: list[list[dict[str, Any]]] = []
+  batch: list[dict[str, Any]] = []
+  batchBytes = 0
+  for entry in entries:
+    size = sizeOf(entry) if sizeOf is not None else 0
+    if batch and (len(batch) == maxEntries or batchBytes + size > maxBytes):
+      batches.append(batch)
+      batch, batchBytes = [], 0
+    batch.append(entry)
+    batchBytes += size
+  if batch:
+    batches.append(batch)
+  return batches
+
+def _percentile(values: list[float], percent: float) -> float:
+  return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+class Pacer:
+  # Hands out start times spaced by the size of each call, so the senders together keep the rate
+  def __init__(self, rate: float):
+    self.rate = rate
+    self.nextStart = time.monotonic()
+    self.lock = Lock()
+
+  def wait(self, entries: int):
+    with self.lock:
+      start = max(self.nextStart, time.monotonic())
+      self.nextStart = start + entries / self.rate
+    time.sleep(max(0, start - time.monotonic()))
+
+def run_batches(call: Callable[[list[dict[str, Any]]], dict[str, Any]], batches: list[list[dict[str, Any]]], workers: int = WORKERS, maxRetries: int = MAX_RETRIES, rate: float | None = None, keepLatencies: bool = False) -> dict[str, Any]:
+  """
+    call(entries) makes one batch API call and returns its response
+    with keepLatencies the output also has "batch_latency_ms": [<latency of each call in ms, in call order per batch>]
+    eg output = {
+      "entries": 25, "succeeded": 24, "calls": 4, "retries": 1, "seconds": 0.12, "per_second": 200.0,
+      "latency_ms": {"min": 10.1, "mean": 20.3, "p50": 15.2, "p95": 40.8, "max": 40.8},
+      "failed": [{"Id": "7", "Code": "InvalidParameterValue", "Message": "...", "SenderFault": true}]
+    }
+  """
+  pacer = Pacer(rate) if rate else None
+
+  def send(batch: list[dict[str, Any]]) -> dict[str, Any]:
+    result = {"succeeded": 0, "calls": 0, "retries": 0, "latencies": [], "failed": []}
+    pending = batch
+    while pending:
+      if pacer is not None:
+        pacer.wait(len(pending))
+      start = time.perf_counter()
+      response = call(pending)
+      result["latencies"].append((time.perf_counter() - start) * 1000)
+      result["calls"] += 1
+      failed = response.get("Failed", [])
+      result["succeeded"] += len(pending) - len(failed)
+      retryable = {entry["Id"] for entry in failed if not entry.get("SenderFault")}
+      if not retryable or result["retries"] >= maxRetries or not pause(result["retries"] + 1, throttled=False):
+        result["failed"].extend(failed)
+        break
+      # Entries failing because of their content would fail again
+      result["failed"].extend(entry for entry in failed if entry.get("SenderFault"))
+      result["retries"] += 1
+      pending = [entry for entry in pending if entry["Id"] in retryable]
+    return result
+
+  start = time.perf_counter()
+  with ThreadPoolExecutor(max_workers=max(1, min(workers, len(batches)))) as pool:
+    results = list(pool.map(send, batches))
+  seconds = time.perf_counter() - start
+
+  latencies = sorted(latency for result in results for latency in result["latencies"])
+  succeeded = sum(result["succeeded"] for result in results)
+  output = {
+    "entries": sum(len(batch) for batch in batches),
+    "succeeded": succeeded,
+    "calls": sum(result["calls"] for result in results),
+    "retries": sum(result["retries"] for result in results),
+    "seconds": round(seconds, 3),
+    "per_second": round(succeeded / seconds, 2) if seconds else None,
+    "latency_ms": {
+      "min": round(latencies[0], 3),
+      "mean": round(sum(latencies) / len(latencies), 3),
+      "p50": round(_percentile(latencies, 50), 3),
+      "p95": round(_percentile(latencies, 95), 3),
+      "max": round(latencies[-1], 3)
+    } if latencies else None,
+    "failed": [{key: entry.get(key) for key in ("Id", "Code", "Message", "SenderFault")} for result in results for entry in result["failed"]]
+  }
+  if keepLatencies:
+    output["batch_latency_ms"] = [round(latency, 3) for result in results for latency in result["latencies"]]
+  return output
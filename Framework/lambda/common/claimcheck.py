@@ -0,0 +1,130 @@
+from collections import OrderedDict
+from decimal import Decimal
+from threading import Lock
+from typing import Any, Callable
+from common.clients import client
+import functools, hashlib, json, os
+
+"""
+  INFO: Claim check for large payloads. A value whose json is larger than PAYLOAD_THRESHOLD is stored in the payload bucket and replaced by a small reference, so the state machine input stays far below the 256 KB limit and the state transitions copy only the reference.
+  Used for the steps of each test and the iteration list (Parser, IterationLoader) and for the operation outputs in the log table (StepLogger, StepExecutor). Steps are resolved by TestLoader/StepExecutor.
+  claim_checked wraps an operation handler: a large "response" of its result is offloaded (isolated steps return it to the state machine) and a "previous_output" reference in its input is resolved.
+
+  Reference format:
+    {"claim_check": "s3://<bucket>/<key>", "bytes": <size of the json>}
+  Keys are the sha256 of the json: the same payload is stored once, and a stored payload never changes, so resolved payloads are cached in module scope by warm containers without revalidation (LRU bounded by PAYLOAD_CACHE_MAX_BYTES).
+
+  Usage:
+    value = offload(value, f"{testGroupID}/steps")
+    value = resolve(value)
+    @claim_checked
+    def handler(event, context):
+      ...
+  offload returns the value unchanged when it is small or when no payload bucket is set, resolve returns any value that is not a reference unchanged.
+
+  Environment variables (all optional):
+    PAYLOAD_BUCKET: <bucket for the offloaded payloads, offloading is disabled when missing>
+    PAYLOAD_THRESHOLD: <size in bytes of the json above which a value is offloaded, default 32768>
+    PAYLOAD_CACHE_MAX_BYTES: <size bound of the cache of resolved payloads, default 64 MiB>
+  ? cached payloads are shared between callers and must not be modified
+"""
+
+PAYLOAD_BUCKET = os.environ.get("PAYLOAD_BUCKET")
+PAYLOAD_THRESHOLD = int(os.environ.get("PAYLOAD_THRESHOLD", 32768))
+PAYLOAD_CACHE_MAX_BYTES = int(os.environ.get("PAYLOAD_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+REFERENCE = "claim_check"
+
+class PayloadCache:
+  def __init__(self, maxBytes: int):
+    self.maxBytes = maxBytes
+    self.size = 0
+    self.entries: OrderedDict[str, tuple[Any, int]] = OrderedDict()
+    self.stats: dict[str, int] = {"memory": 0, "s3": 0, "stored": 0}
+    self.lock = Lock()
+
+  def get(self, url: str) -> tuple[Any, int] | None:
+    with self.lock:
+      entry = self.entries.get(url)
+      if entry is None:
+        return None
+      self.entries.move_to_end(url)
+      self.stats["memory"] += 1
+      return entry
+
+  def __contains__(self, url: str) -> bool:
+    with self.lock:
+      return url in self.entries
+
+  def put(self, url: str, value: Any, size: int, source: str):
+    with self.lock:
+      self.stats[source] += 1
+      if size > self.maxBytes or url in self.entries:
+        return
+      self.entries[url] = (value, size)
+      self.size += size
+      # Evict the least recently used payloads
+      while self.size > self.maxBytes:
+        _, (_, evictedSize) = self.entries.popitem(last=False)
+        self.size -= evictedSize
+
+  def clear(self):
+    with self.lock:
+      self.entries.clear()
+      self.size = 0
+
+cache = PayloadCache(PAYLOAD_CACHE_MAX_BYTES)
+
+def _json_default(value: Any) -> Any:
+  # Outputs read back from the log table hold Decimals
+  if isinstance(value, Decimal):
+    return int(value) if value == value.to_integral_value() else float(value)
+  return str(value)
+
+def is_reference(value: Any) -> bool:
+  return isinstance(value, dict) and REFERENCE in value
+
+def _body(value: Any) -> bytes:
+  return json.dumps(value, default=_json_default, separators=(",", ":")).encode()
+
+def payload_size(value: Any) -> int:
+  # Size of the json of a value, as counted against the threshold
+  return len(_body(value))
+
+def offload(value: Any, prefix: str, threshold: int | None = None, bucket: str | None = None) -> Any:
+  bucket = bucket or PAYLOAD_BUCKET
+  if bucket is None or value is None or is_reference(value):
+    return value
+  body = _body(value)
+  if len(body) <= (PAYLOAD_THRESHOLD if threshold is None else threshold):
+    return value
+  key = f"{prefix.strip('/')}/{hashlib.sha256(body).hexdigest()}.json"
+  url = f"s3://{bucket}/{key}"
+  # Stored once per container, the key changes with the contents
+  if url not in cache:
+    client('s3').put_object(Bucket=bucket, Key=key, Body=body, ContentType="application/json")
+    cache.put(url, json.loads(body), len(body), "stored")
+  return {REFERENCE: url, "bytes": len(body)}
+
+def resolve(value: Any) -> Any:
+  if not is_reference(value):
+    return value
+  url = value[REFERENCE]
+  entry = cache.get(url)
+  if entry is not None:
+    return entry[0]
+  bucket, key = url.removeprefix("s3://").split("/", 1)
+  body = client('s3').get_object(Bucket=bucket, Key=key)["Body"].read()
+  resolved = json.loads(body)
+  cache.put(url, resolved, len(body), "s3")
+  return resolved
+
+def claim_checked(handler: Callable[[dict[str, Any], Any], Any]) -> Callable[[dict[str, Any], Any], Any]:
+  @functools.wraps(handler)
+  def wrapper(event, context):
+    if isinstance(event, dict) and is_reference(event.get("previous_output")):
+      event = dict(event, previous_output=resolve(event["previous_output"]))
+    result = handler(event, context)
+    if isinstance(result, dict) and "response" in result:
+      result = dict(result, response=offload(result["response"], "outputs"))
+    return result
+  return wrapper
@@ -0,0 +1,97 @@
+from threading import Lock, local
+import os
+from common.retry import install
+from common.timing import instrument
+
+"""
+  INFO: Module scope pool of boto3 clients and resources, shared by all handlers of a lambda container. Each (service, region) pair is created once, on first use, and reused by every warm invocation with its open HTTP connections.
+  Clients are thread safe and shared by all threads, resources are not and are kept per thread (a lambda invocation uses a single one).
+  Every call made with them is timed (check common/timing.py) and retried by the shared retry engine (check common/retry.py), botocore makes a single attempt.
+  boto3 is imported with the first client, not with this module: handlers returning early (eg. "mock": true) never load it, and a cold start only pays for it when the handler calls AWS.
+
+  Usage:
+    sqs = client('sqs')
+    table = resource('dynamodb').Table(name)
+    ? at module scope, use the deferred versions, the client is created on first use (each thread gets its own resource)
+    s3 = deferred_client('s3')
+    ddb = deferred_resource('dynamodb')
+
+  Environment variables (all optional):
+    CLIENT_POOL_SIZE: <max open connections per client, default 50>
+    CLIENT_CONNECT_TIMEOUT: <seconds, default 5>
+    AWS_ENDPOINT_URL_<SERVICE>, AWS_ENDPOINT_URL: <endpoint override, eg. a local stand-in like moto or localstack>
+    ? <SERVICE> is the upper case service name, eg. AWS_ENDPOINT_URL_DYNAMODB
+"""
+
+# boto3 sessions are not thread safe, all clients are created from one session under a lock
+_session = None
+_config = None
+_clients: dict[tuple[str, str | None], object] = {}
+_resources = local()
+_lock = Lock()
+
+def endpoint_url(service: str) -> str | None:
+  return os.environ.get("AWS_ENDPOINT_URL_" + service.upper()) or os.environ.get("AWS_ENDPOINT_URL")
+
+def _get_session():
+  global _session, _config
+  if _session is None:
+    import boto3
+    from botocore.config import Config
+    _config = Config(
+      max_pool_connections=int(os.environ.get("CLIENT_POOL_SIZE", 50)),
+      tcp_keepalive=True,
+      connect_timeout=float(os.environ.get("CLIENT_CONNECT_TIMEOUT", 5)),
+      # Retries are made by common/retry.py
+      retries={
+        "mode": "standard",
+        "total_max_attempts": 1
+      }
+    )
+    _session = boto3.session.Session()
+  return _session
+
+def client(service: str, region: str | None = None):
+  key = (service, region)
+  if key not in _clients:
+    with _lock:
+      if key not in _clients:
+        newClient = _get_session().client(service, region_name=region, endpoint_url=endpoint_url(service), config=_config)
+        instrument(newClient.meta.events)
+        install(newClient.meta.events, service)
+        _clients[key] = newClient
+  return _clients[key]
+
+def resource(service: str, region: str | None = None):
+  key = (service, region)
+  resources = _resources.__dict__.setdefault("pool", {})
+  if key not in resources:
+    with _lock:
+      resources[key] = _get_session().resource(service, region_name=region, endpoint_url=endpoint_url(service), config=_config)
+      instrument(resources[key].meta.client.meta.events)
+      install(resources[key].meta.client.meta.events, service)
+  return resources[key]
+
+class _Deferred:
+  # Stands in for a pooled client or resource at module scope, every attribute is read from the real one
+  def __init__(self, factory, service: str, region: str | None):
+    self._factory = factory
+    self._service = service
+    self._region = region
+
+  def __getattr__(self, name: str):
+    return getattr(self._factory(self._service, self._region), name)
+
+def deferred_client(service: str, region: str | None = None):
+  return _Deferred(client, service, region)
+
+def deferred_resource(service: str, region: str | None = None):
+  return _Deferred(resource, service, region)
+
+def reset():
+  # Drops all pooled clients, eg. after changing the environment in a local run
+  global _session, _resources
+  with _lock:
+    _session = None
+    _clients.clear()
+    _resources = local()
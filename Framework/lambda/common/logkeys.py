@@ -0,0 +1,63 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator
+from common.clients import resource
+import heapq, os, zlib
+
+"""
+  INFO: Key scheme of the log table. The records of a test group are spread over LOG_SHARDS hash keys "<test group id>#<shard>", so the parallel tests of a group write to several partitions instead of a single hot one.
+  The shard of a record is a hash of its sort key (TestScenarioID): a record is always written to, and read from, the same shard, get_item and update_item still need a single call (use log_key).
+  All the records of a group are read with query_group, which queries the shards in parallel and merges them in sort key order, as a single query of the unsharded table would return them.
+
+  Usage:
+    table.get_item(Key=log_key(testGroupID, "T<test.json>:S<CreateTable>"))
+    for item in query_group(tableName, testGroupID, prefix="T<test.json>"):
+      ...
+  LogSink shards the items it writes (check common/logsink.py), writers only set the plain test group id.
+
+  Environment variables (all optional):
+    LOG_SHARDS: <number of hash keys per test group, default 8>
+    ? 1 keeps the test group id as the hash key (the layout before sharding). Writers and readers of a test group must use the same number
+"""
+
+LOG_SHARDS = int(os.environ.get("LOG_SHARDS", 8))
+QUERY_WORKERS = 16
+
+def shard_of(scenarioID: str, shards: int = LOG_SHARDS) -> int:
+  # crc32 is stable between processes, unlike hash()
+  return zlib.crc32(scenarioID.encode()) % shards
+
+def hash_key(testGroupID: str, scenarioID: str, shards: int = LOG_SHARDS) -> str:
+  if shards <= 1:
+    return testGroupID
+  return f"{testGroupID}#{shard_of(scenarioID, shards)}"
+
+def log_key(testGroupID: str, scenarioID: str, shards: int = LOG_SHARDS) -> dict[str, str]:
+  return {"TestGroupID": hash_key(testGroupID, scenarioID, shards), "TestScenarioID": scenarioID}
+
+def group_id(hashKey: str, shards: int = LOG_SHARDS) -> str:
+  # Test group id of a stored record
+  return hashKey if shards <= 1 else hashKey.rsplit("#", 1)[0]
+
+def _query_shard(tableName: str, hashKey: str, prefix: str | None, kwargs: dict[str, Any]) -> list[dict[str, Any]]:
+  # Resources are not thread safe, each thread uses its own
+  table = resource('dynamodb').Table(tableName)
+  from boto3.dynamodb.conditions import Key
+  condition = Key("TestGroupID").eq(hashKey)
+  if prefix:
+    condition = condition & Key("TestScenarioID").begins_with(prefix)
+  items: list[dict[str, Any]] = []
+  params = dict(kwargs, KeyConditionExpression=condition)
+  while True:
+    response = table.query(**params)
+    items.extend(response.get("Items", []))
+    if "LastEvaluatedKey" not in response:
+      return items
+    params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+def query_group(tableName: str, testGroupID: str, prefix: str | None = None, shards: int = LOG_SHARDS, **kwargs) -> Iterator[dict[str, Any]]:
+  # kwargs are passed to every query, eg. ConsistentRead or ProjectionExpression (which must then include TestScenarioID)
+  hashKeys = [testGroupID] if shards <= 1 else [f"{testGroupID}#{shard}" for shard in range(shards)]
+  with ThreadPoolExecutor(max_workers=min(QUERY_WORKERS, len(hashKeys))) as pool:
+    results = list(pool.map(lambda hashKey: _query_shard(tableName, hashKey, prefix, kwargs), hashKeys))
+  # Each shard is already sorted by the sort key
+  return heapq.merge(*results, key=lambda item: item["TestScenarioID"])
@@ -0,0 +1,69 @@
+from decimal import Decimal
+from typing import Any
+from common.clients import resource
+from common.logkeys import LOG_SHARDS, hash_key
+from common.retry import pause
+import json
+
+"""
+  INFO: Buffered writer for the log table. Items are collected with put and written by flush with batch_write_item (25 items per call), unprocessed items are retried with the backoff of the shared retry engine (check common/retry.py).
+  Use it as a context manager so the buffer is flushed when the handler exits (also when it raises, the error of the handler is then raised even if the flush fails):
+    with LogSink(event["log_table_name"]) as sink:
+      sink.put(item)
+  An invocation logging up to 25 items makes a single write call.
+  Items are given with the plain test group id, put moves them to their shard of the test group (check common/logkeys.py).
+  Items are stored as they would be after a json round trip (floats as Decimal, other non json values as strings), so any operation output can be logged.
+"""
+
+BATCH_SIZE = 25
+MAX_RETRIES = 8
+
+def _json_default(value: Any) -> Any:
+  return float(value) if isinstance(value, Decimal) else str(value)
+
+def storable(item: dict[str, Any]) -> dict[str, Any]:
+  return json.loads(json.dumps(item, default=_json_default), parse_float=Decimal)
+
+class LogSink:
+  def __init__(self, tableName: str, ddb=None, keys: tuple[str, ...] = ("TestGroupID", "TestScenarioID"), shards: int = LOG_SHARDS):
+    self.tableName = tableName
+    self.ddb = ddb if ddb is not None else resource('dynamodb')
+    self.keys = keys
+    self.shards = shards
+    self.buffer: dict[tuple[Any, ...], dict[str, Any]] = {}
+    self.writeCalls = 0
+
+  def put(self, item: dict[str, Any]):
+    item = dict(item, **{self.keys[0]: hash_key(item[self.keys[0]], item[self.keys[1]], self.shards)})
+    # A batch cannot hold the same key twice, the latest item wins
+    self.buffer[tuple(item[key] for key in self.keys)] = storable(item)
+
+  def flush(self):
+    items = list(self.buffer.values())
+    self.buffer = {}
+    for start in range(0, len(items), BATCH_SIZE):
+      requests = [{"PutRequest": {"Item": item}} for item in items[start:start + BATCH_SIZE]]
+      retries = 0
+      while requests:
+        response = self.ddb.batch_write_item(RequestItems={self.tableName: requests})
+        self.writeCalls += 1
+        requests = response.get("UnprocessedItems", {}).get(self.tableName, [])
+        if requests:
+          retries += 1
+          if retries > MAX_RETRIES or not pause(retries, service="dynamodb"):
+            raise RuntimeError(f"{len(requests)} log items could not be written to {self.tableName} after {retries - 1} retries")
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, excType, exc, traceback):
+    if excType is None:
+      self.flush()
+      return False
+    # The error of the handler is the one raised, a failing flush only adds to its log
+    try:
+      self.flush()
+    except Exception as flushError:
+      print("The log items could not be written after an error:")
+      print(flushError)
+    return False
@@ -0,0 +1,70 @@
+from typing import Any, Callable
+import importlib
+
+"""
+  INFO: Registry of the step operations. Maps the "operation" of a test step to the handler of its test/validation lambda, with the same names as the Choose Test Scenario state of the state machine.
+  Handlers are imported on first use. "Wait" is not an operation handler, it is handled by the orchestration (Waiter).
+  handler_modules lists the modules of all the lambda handlers, the orchestration ones included.
+"""
+
+OPERATIONS: dict[str, str] = {
+  # DDB Test Scenarios
+  "CreateEntry": "DynamoDB.CreateEntry.handler",
+  "CreateTable": "DynamoDB.CreateTable.handler",
+  "GetEntry": "DynamoDB.GetEntry.handler",
+  "UpdateEntry": "DynamoDB.UpdateEntry.handler",
+  "DeleteEntry": "DynamoDB.deleteEntry.lambda_handler",
+  "DeleteTable": "DynamoDB.deleteTable.lambda_handler",
+  "DoesEntryExist": "DynamoDB.doesEntryExist.lambda_handler",
+  "DoesTableExist": "DynamoDB.doesTableExist.lambda_handler",
+  "LoadEntries": "DynamoDB.LoadEntries.handler",
+  "BatchGetEntries": "DynamoDB.BatchGetEntries.handler",
+  "QueryEntries": "DynamoDB.QueryEntries.handler",
+  "ScanEntries": "DynamoDB.ScanEntries.handler",
+  # S3 Test Scenarios
+  "CreateBucket": "S3.CreateBucket.handler",
+  "CreateFile": "S3.CreateFile.handler",
+  "DeleteFile": "S3.DeleteFile.handler",
+  "DeleteBucket": "S3.deleteBucket.lambda_handler",
+  "DoesBucketExist": "S3.doesBucketExist.lambda_handler",
+  "DoesFileExist": "S3.doesFileExist.lambda_handler",
+  "ReadFile": "S3.readFile.lambda_handler",
+  # SNS Test Scenarios
+  "CreateTopic": "SNS.CreateTopic.handler",
+  "DeleteTopic": "SNS.DeleteTopic.handler",
+  "DoesTopicExist": "SNS.DoesTopicExist.handler",
+  "PublishMessage": "SNS.PublishMessage.handler",
+  # SQS Test Scenarios
+  "SendMessage": "SQS.SendMessage.lambda_handler",
+  "ReadMessage": "SQS.ReadMessage.lambda_handler",
+  "DeleteMessage": "SQS.DeleteMessage.lambda_handler",
+  "DoesQueueExist": "SQS.DoesQueueExist.lambda_handler",
+  "CreateQueue": "SQS.CreateQueue.lambda_handler",
+  "DeleteQueue": "SQS.DeleteQueue.lambda_handler"
+}
+
+# Handler modules of the orchestration lambdas (states of the state machine other than the test scenarios)
+ORCHESTRATION = ["Parser", "TestLoader", "StepLogger", "StepExecutor", "IterationLoader", "TestFinisher", "IterationsFinisher", "DependencyWaiter", "Waiter", "TimerScheduler"]
+
+def handler_modules() -> dict[str, str]:
+  # Module of every lambda handler by name (operation or orchestration lambda), used by the tools (packaging, import budget, benchmarks)
+  modules = {name: path.rsplit(".", 1)[0] for name, path in OPERATIONS.items()}
+  modules.update({name: name for name in ORCHESTRATION})
+  return modules
+
+_handlers: dict[str, Callable[[dict[str, Any], Any], dict[str, Any]]] = {}
+
+def get_handler(operation: str) -> Callable[[dict[str, Any], Any], dict[str, Any]] | None:
+  if operation not in OPERATIONS:
+    return None
+  if operation not in _handlers:
+    moduleName, functionName = OPERATIONS[operation].rsplit(".", 1)
+    _handlers[operation] = getattr(importlib.import_module(moduleName), functionName)
+  return _handlers[operation]
+
+def unknown_operation(operation: str) -> dict[str, Any]:
+  # Same result as the Unknown Operation Requested state
+  return {
+    "status": "FAILED",
+    "message": f"Unknown Operation Requested: {operation}"
+  }
@@ -0,0 +1,75 @@
+from typing import Any, Callable
+import random, time
+
+"""
+  INFO: Waits for a newly created resource to become usable, instead of a fixed sleep. The check is polled with exponential backoff (doubling up to POLL_CAP, with jitter) until it passes or the deadline is reached.
+  The backoff adapts to each kind of resource: the first wait starts near the last ready time seen by the lambda container (POLL_START the first time), so slow resources (tables) are not polled needlessly and fast ones are not overslept.
+  Used by the Create* operations with "wait_until_ready": true and by Parser for the log table.
+
+  Usage:
+    seconds = wait_until_ready(lambda: table_ready(ddbClient, name), timeout, "table")
+  Returns the seconds taken for the resource to become ready, raises TimeoutError at the deadline.
+"""
+
+POLL_START = 0.1
+POLL_CAP = 5.0
+DEFAULT_TIMEOUT = 120
+# Left to the handler to report, when the deadline comes from the lambda time left
+RESERVE_SECONDS = 2
+
+# Last ready time of each kind of resource
+_readyTimes: dict[str, float] = {}
+
+def timeout_for(event: dict[str, Any], context) -> float:
+  timeout = float(event.get("ready_timeout", DEFAULT_TIMEOUT))
+  if context is not None:
+    timeout = min(timeout, context.get_remaining_time_in_millis() / 1000 - RESERVE_SECONDS)
+  return timeout
+
+def wait_until_ready(check: Callable[[], bool], timeout: float = DEFAULT_TIMEOUT, kind: str | None = None) -> float:
+  start = time.monotonic()
+  deadline = start + timeout
+  delay = min(POLL_CAP, max(POLL_START, _readyTimes.get(kind, 0) * 0.8))
+  while not check():
+    left = deadline - time.monotonic()
+    if left <= 0:
+      raise TimeoutError(f"Resource not ready after {timeout:.1f} seconds")
+    # Full jitter around the current step, never sleeping past the deadline
+    time.sleep(min(left, random.uniform(delay / 2, delay)))
+    delay = min(POLL_CAP, delay * 2)
+  seconds = time.monotonic() - start
+  if kind is not None:
+    _readyTimes[kind] = seconds
+  return round(seconds, 3)
+
+def table_ready(ddb, tableName: str) -> bool:
+  # ACTIVE table and indexes, ddb is a dynamodb client
+  try:
+    table = ddb.describe_table(TableName=tableName)["Table"]
+  except ddb.exceptions.ResourceNotFoundException:
+    return False
+  indexes = table.get("GlobalSecondaryIndexes", [])
+  return table["TableStatus"] == "ACTIVE" and all(index["IndexStatus"] == "ACTIVE" for index in indexes)
+
+def bucket_ready(s3, bucketName: str) -> bool:
+  try:
+    s3.head_bucket(Bucket=bucketName)
+  except s3.exceptions.ClientError as e:
+    if e.response["Error"]["Code"] in ("404", "NoSuchBucket"):
+      return False
+    raise
+  return True
+
+def queue_ready(sqs, queueUrl: str) -> bool:
+  try:
+    sqs.get_queue_attributes(QueueUrl=queueUrl, AttributeNames=["QueueArn"])
+  except sqs.exceptions.QueueDoesNotExist:
+    return False
+  return True
+
+def topic_ready(sns, topicArn: str) -> bool:
+  try:
+    sns.get_topic_attributes(TopicArn=topicArn)
+  except sns.exceptions.NotFoundException:
+    return False
+  return True
@@ -0,0 +1,81 @@
+from threading import Lock
+from common.clients import client
+import os, time
+
+"""
+  INFO: Module scope cache from queue/topic names to their URL/ARN, shared by the SQS and SNS handlers of a lambda container, so repeat operations on the same resource make a single API call.
+  - CreateQueue/CreateTopic prime the cache with the URL/ARN they get back
+  - DeleteQueue/DeleteTopic (and any operation failing because the resource does not exist) invalidate it
+  - entries expire after RESOLVER_TTL seconds (default 60), this bounds how long a resource deleted from another container can stay cached
+
+  Usage:
+    queueUrl = queue_url(name)
+    topicArn = topic_arn(name)
+  Lookups of unknown names raise the service's own error (QueueDoesNotExist for SQS, NotFoundException for SNS), like a direct API call would.
+"""
+
+TTL = float(os.environ.get("RESOLVER_TTL", 60))
+NOT_FOUND_CODES = {"AWS.SimpleQueueService.NonExistentQueue", "QueueDoesNotExist", "NotFound", "NotFoundException"}
+
+_cache: dict[tuple[str, str], tuple[str, float]] = {}
+_lock = Lock()
+
+def _get(kind: str, name: str) -> str | None:
+  entry = _cache.get((kind, name))
+  if entry is None or entry[1] < time.monotonic():
+    return None
+  return entry[0]
+
+def _put(kind: str, name: str, value: str):
+  with _lock:
+    _cache[(kind, name)] = (value, time.monotonic() + TTL)
+
+def _forget(kind: str, name: str):
+  with _lock:
+    _cache.pop((kind, name), None)
+
+def prime_queue(name: str, url: str):
+  _put("sqs", name, url)
+
+def forget_queue(name: str):
+  _forget("sqs", name)
+
+def prime_topic(name: str, arn: str):
+  _put("sns", name, arn)
+
+def forget_topic(name: str):
+  _forget("sns", name)
+
+def topic_name(arn: str) -> str:
+  return arn.rsplit(":", 1)[-1]
+
+def queue_url(name: str) -> str:
+  url = _get("sqs", name)
+  if url is None:
+    url = client('sqs').get_queue_url(QueueName=name)["QueueUrl"]
+    prime_queue(name, url)
+  return url
+
+def topic_arn(name: str) -> str:
+  arn = _get("sns", name)
+  if arn is not None:
+    return arn
+  # SNS has no lookup by name, one listing primes every topic of the account
+  sns = client('sns')
+  for page in sns.get_paginator("list_topics").paginate():
+    for topic in page["Topics"]:
+      prime_topic(topic_name(topic["TopicArn"]), topic["TopicArn"])
+  arn = _get("sns", name)
+  if arn is None:
+    raise sns.exceptions.NotFoundException({"Error": {"Code": "NotFound", "Message": f"Topic {name} does not exist"}}, "ListTopics")
+  return arn
+
+def invalidate_on_error(kind: str, name: str, error: Exception):
+  # Drops a cached URL/ARN when the operation shows the resource is gone
+  code = getattr(error, "response", {}).get("Error", {}).get("Code")
+  if code in NOT_FOUND_CODES:
+    _forget(kind, name)
+
+def clear():
+  with _lock:
+    _cache.clear()
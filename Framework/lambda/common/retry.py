@@ -0,0 +1,213 @@
+from collections import deque
+from contextlib import contextmanager
+from threading import Lock, local
+from typing import Any, Callable
+import functools, os, random, time
+
+"""
+  INFO: Retry engine of the AWS calls made with the pooled clients and resources (common/clients.py installs it on each of them in place of botocore's own retries).
+  - classify sorts a failed call: "throttling" (eg. ProvisionedThroughputExceededException, Throttling), "transient" (5xx, timeouts, connection errors) or "terminal" (any other error, eg. ResourceNotFoundException, ConditionalCheckFailedException), only terminal errors reach the handler at once
+  - throttling and transient errors are retried with full jitter exponential backoff (throttling from a larger base), up to CLIENT_MAX_ATTEMPTS attempts
+  - retries stop early when the backoff would run into the end of the invocation: retried gives an operation handler the time left in the lambda (context.get_remaining_time_in_millis()) minus RETRY_RESERVE_MS as budget, the reserve is kept to return the error and log the step
+  - each service has an adaptive rate limiter shared by the container: a throttle halves the allowed send rate (from the measured one), each success raises it again, calls wait for their turn before being sent
+  - pause is the same backoff for the failed part of batch calls (unprocessed items, failed entries)
+  retried adds the number of retries made during the handler to its result: "retries": <number>.
+  ? the retry count is process wide like the timing totals (check common/timing.py), worker threads of a handler use the budget of the latest invocation of the container
+
+  Usage:
+    @timed
+    @retried
+    def handler(event, context):
+      ...
+    ? a budget without the decorator
+    with budget(context):
+      ...
+
+  Environment variables (all optional):
+    CLIENT_MAX_ATTEMPTS: <attempts per call, including the first, default 8>
+    RETRY_BASE_MS: <backoff step of the first retry of a transient error, default 50>
+    RETRY_THROTTLE_BASE_MS: <backoff step of the first retry of a throttled call, default 250>
+    RETRY_MAX_BACKOFF_MS: <longest backoff, default 10000>
+    RETRY_RESERVE_MS: <invocation time left after the last retry, default 1000>
+    RETRY_MIN_RATE: <lowest send rate (calls per second) of a throttled service, default 2>
+"""
+
+MAX_ATTEMPTS = int(os.environ.get("CLIENT_MAX_ATTEMPTS", 8))
+BASE_MS = float(os.environ.get("RETRY_BASE_MS", 50))
+THROTTLE_BASE_MS = float(os.environ.get("RETRY_THROTTLE_BASE_MS", 250))
+MAX_BACKOFF_MS = float(os.environ.get("RETRY_MAX_BACKOFF_MS", 10000))
+RESERVE_MS = float(os.environ.get("RETRY_RESERVE_MS", 1000))
+MIN_RATE = float(os.environ.get("RETRY_MIN_RATE", 2))
+
+THROTTLING_CODES = frozenset({
+  "Throttling", "ThrottlingException", "ThrottledException", "RequestThrottledException", "TooManyRequestsException",
+  "ProvisionedThroughputExceededException", "TransactionInProgressException", "RequestLimitExceeded", "BandwidthLimitExceeded",
+  "LimitExceededException", "RequestThrottled", "SlowDown", "PriorRequestNotComplete", "KMSThrottlingException"
+})
+TRANSIENT_CODES = frozenset({
+  "RequestTimeout", "RequestTimeoutException", "InternalError", "InternalFailure", "InternalServerError",
+  "ServiceUnavailable", "ServiceUnavailableException"
+})
+TRANSIENT_STATUS = frozenset({500, 502, 503, 504})
+
+_lock = Lock()
+_retries = 0
+_local = local()
+_latestDeadline: float | None = None
+
+def classify(code: str | None = None, status: int | None = None, exception: BaseException | None = None) -> str:
+  if code in THROTTLING_CODES or status == 429:
+    return "throttling"
+  if code in TRANSIENT_CODES or status in TRANSIENT_STATUS:
+    return "transient"
+  if exception is not None:
+    # Only reached after a call, botocore is loaded
+    from botocore.exceptions import ConnectionError, HTTPClientError
+    if isinstance(exception, (ConnectionError, HTTPClientError)):
+      return "transient"
+  return "terminal"
+
+def backoff(attempt: int, throttled: bool = False) -> float:
+  # Full jitter: a random wait (seconds) up to the exponential step of the attempt (1 for the first retry)
+  base = THROTTLE_BASE_MS if throttled else BASE_MS
+  return random.uniform(0, min(MAX_BACKOFF_MS, base * 2 ** (attempt - 1))) / 1000
+
+def deadline() -> float | None:
+  # Monotonic time the retries of this thread must end by, None without a budget
+  return getattr(_local, "deadline", _latestDeadline)
+
+def within_budget(delay: float) -> bool:
+  end = deadline()
+  return end is None or time.monotonic() + delay <= end
+
+@contextmanager
+def budget(context):
+  global _latestDeadline
+  if context is None or not hasattr(context, "get_remaining_time_in_millis"):
+    yield
+    return
+  end = time.monotonic() + (context.get_remaining_time_in_millis() - RESERVE_MS) / 1000
+  previous = getattr(_local, "deadline", None)
+  _local.deadline = _latestDeadline = end
+  try:
+    yield
+  finally:
+    _local.deadline = previous
+    if _latestDeadline == end:
+      _latestDeadline = previous
+
+def _count_retry():
+  global _retries
+  with _lock:
+    _retries += 1
+
+def retry_count() -> int:
+  with _lock:
+    return _retries
+
+def pause(attempt: int, throttled: bool = True, service: str | None = None) -> bool:
+  # Backoff before resending the failed part of a batch call, False when the budget does not allow another attempt
+  if service is not None and throttled:
+    limiter(service).throttled()
+  delay = backoff(attempt, throttled)
+  if not within_budget(delay):
+    return False
+  _count_retry()
+  time.sleep(delay)
+  return True
+
+class RateLimiter:
+  # Token bucket with an adaptive rate: unlimited until the first throttle, halved at each throttle, raised at each success
+  WINDOW = 1.0
+
+  def __init__(self):
+    self.rate: float | None = None
+    self.tokens = 0.0
+    self.refilled = time.monotonic()
+    self.sent: deque[float] = deque()
+    self.lock = Lock()
+
+  def _measured(self, now: float) -> float:
+    # Calls sent per second over the last window
+    while self.sent and self.sent[0] < now - self.WINDOW:
+      self.sent.popleft()
+    return len(self.sent) / self.WINDOW
+
+  def acquire(self, **kwargs):
+    with self.lock:
+      now = time.monotonic()
+      self.sent.append(now)
+      self._measured(now)
+      if self.rate is None:
+        return
+      self.tokens = min(max(1.0, self.rate), self.tokens + (now - self.refilled) * self.rate)
+      self.refilled = now
+      # The token is taken now, a call without one waits until it is refilled
+      self.tokens -= 1
+      wait = -self.tokens / self.rate if self.tokens < 0 else 0
+    end = deadline()
+    if end is not None:
+      wait = min(wait, max(0, end - time.monotonic()))
+    if wait:
+      time.sleep(wait)
+
+  def throttled(self):
+    with self.lock:
+      measured = max(MIN_RATE, self._measured(time.monotonic()))
+      self.rate = max(MIN_RATE, min(self.rate or measured, measured) / 2)
+
+  def succeeded(self):
+    with self.lock:
+      if self.rate is None:
+        return
+      self.rate += 0.5
+      # Far above what is sent, the service is not throttling any more
+      if self.rate > 4 * max(MIN_RATE, self._measured(time.monotonic())):
+        self.rate = None
+        self.tokens = 0.0
+
+_limiters: dict[str, RateLimiter] = {}
+
+def limiter(service: str) -> RateLimiter:
+  if service not in _limiters:
+    with _lock:
+      _limiters.setdefault(service, RateLimiter())
+  return _limiters[service]
+
+def _needs_retry(rateLimiter: RateLimiter, response=None, attempts: int = 1, caught_exception=None, **kwargs) -> float | None:
+  # botocore needs-retry event: the seconds to wait before the next attempt, None to stop
+  if response is not None:
+    httpResponse, parsed = response
+    code = parsed.get("Error", {}).get("Code")
+    if code is None and httpResponse.status_code < 300:
+      rateLimiter.succeeded()
+      return None
+    kind = classify(code, httpResponse.status_code)
+  else:
+    kind = classify(exception=caught_exception)
+  if kind == "throttling":
+    rateLimiter.throttled()
+  if kind == "terminal" or attempts >= MAX_ATTEMPTS:
+    return None
+  delay = backoff(attempts, kind == "throttling")
+  if not within_budget(delay):
+    return None
+  _count_retry()
+  return delay
+
+def install(events, service: str):
+  # events is the event system of a client (client.meta.events)
+  rateLimiter = limiter(service)
+  events.register("before-send", rateLimiter.acquire)
+  events.register("needs-retry", functools.partial(_needs_retry, rateLimiter))
+
+def retried(handler: Callable[[dict[str, Any], Any], Any]) -> Callable[[dict[str, Any], Any], Any]:
+  @functools.wraps(handler)
+  def wrapper(event, context):
+    retries = retry_count()
+    with budget(context):
+      result = handler(event, context)
+    if isinstance(result, dict):
+      result = dict(result, retries=retry_count() - retries)
+    return result
+  return wrapper
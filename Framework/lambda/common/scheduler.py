@@ -0,0 +1,152 @@
+from collections import deque
+from contextlib import suppress
+from typing import Any
+import json
+from common.logkeys import log_key
+
+"""
+  INFO: Dependency scheduler for a test group. Instead of cutting the group into iterations (where every test of an iteration waits for the slowest test of the previous one), each test waits only for its own dependencies.
+
+  build_schedule turns the test_group input into a dependency graph sorted in topological order (Kahn's algorithm, linear in tests + dependencies, cycles are reported instead of looping forever).
+  Tests depending on "*" wait on a virtual barrier node, which in turn waits for every other test; this keeps the graph linear in size.
+
+  At runtime the schedule is stored in the log table (one record per waiting node, sort key "D<test_id>"):
+  - register_waiter stores the sfn task token of a test waiting for its dependencies, and releases it at once if they are already done
+  - release_dependents is called when a test finishes, it decrements the counters of its dependents and releases those reaching 0
+  Both operations are atomic updates returning the new item, so whichever of them sees the counter at 0 with a stored token sends the task success.
+"""
+
+BARRIER = "*"
+
+def build_schedule(testGroup: dict[str, list[str]]) -> dict[str, dict[str, Any]]:
+  """
+    eg input: test_group = {
+      "a_test_without_dependencies.json": [],
+      "a_test_with_dependencies.json": ["a_dependent_test.json", "another_dependent_test.json"],
+      "a_test_to_fill_space.json": ["*"],
+      "a_dependent_test.json": ["second_level_dependency.json"]
+    }
+    eg output (in topological order) = {
+      "a_test_without_dependencies.json": {"dependencies": 0, "dependents": ["*"]},
+      "another_dependent_test.json": {"dependencies": 0, "dependents": ["a_test_with_dependencies.json", "*"]},
+      "second_level_dependency.json": {"dependencies": 0, "dependents": ["a_dependent_test.json", "*"]},
+      "a_dependent_test.json": {"dependencies": 1, "dependents": ["a_test_with_dependencies.json", "*"]},
+      "a_test_with_dependencies.json": {"dependencies": 2, "dependents": ["*"]},
+      "*": {"dependencies": 5, "dependents": ["a_test_to_fill_space.json"]},
+      "a_test_to_fill_space.json": {"dependencies": 1, "dependents": []}
+    }
+    "dependencies" is the number of nodes to finish before the test can start, the "*" node is virtual (it is not a test)
+  """
+  # Collect all the nodes, tests mentioned only as dependencies are tests without dependencies
+  depends: dict[str, list[str]] = {}
+  starTests: list[str] = []
+  for test, testDepends in testGroup.items():
+    if test == BARRIER:
+      raise ValueError('"*" cannot be used as a test name')
+    if BARRIER in testDepends:
+      starTests.append(test)
+    depends[test] = [depend for depend in dict.fromkeys(testDepends) if depend != BARRIER]
+  for testDepends in list(depends.values()):
+    for depend in testDepends:
+      depends.setdefault(depend, [])
+
+  # Tests running at the end only wait for the barrier, their other dependencies are already covered by it
+  starSet = set(starTests)
+  for test in starTests:
+    depends[test] = [BARRIER]
+  for test, testDepends in depends.items():
+    for depend in testDepends:
+      if depend in starSet:
+        raise ValueError(f'Test "{test}" depends on "{depend}" which runs at the end of the test group ("*")')
+
+  dependents: dict[str, list[str]] = {test: [] for test in depends}
+  remaining: dict[str, int] = {}
+  for test, testDepends in depends.items():
+    if test in starSet:
+      continue
+    remaining[test] = len(testDepends)
+    for depend in testDepends:
+      dependents[depend].append(test)
+  if starTests:
+    # The barrier waits for all the other tests and is placed after them in the schedule
+    remaining[BARRIER] = len(depends) - len(starTests)
+    dependents[BARRIER] = starTests
+    for test in remaining:
+      if test != BARRIER:
+        dependents[test].append(BARRIER)
+    for test in starTests:
+      remaining[test] = 1
+
+  # Kahn's algorithm, the queue keeps the input order among tests that are ready together
+  schedule: dict[str, dict[str, Any]] = {}
+  counts = dict(remaining)
+  ready = deque(test for test, count in counts.items() if not count)
+  while ready:
+    test = ready.popleft()
+    schedule[test] = {"dependencies": remaining[test], "dependents": dependents[test]}
+    for dependent in dependents[test]:
+      counts[dependent] -= 1
+      if not counts[dependent]:
+        ready.append(dependent)
+
+  if len(schedule) != len(remaining):
+    cyclic = sorted(test for test in remaining if test not in schedule and test != BARRIER)
+    raise ValueError("Circular dependencies found between tests: " + str(cyclic))
+  return schedule
+
+def init_schedule(sink, testGroupID: str, schedule: dict[str, dict[str, Any]]):
+  # Only the nodes which wait for something need a counter, the records are written when the sink is flushed
+  for test, node in schedule.items():
+    if node["dependencies"]:
+      sink.put({
+        "TestGroupID": testGroupID,
+        "TestScenarioID": f'D<{test}>',
+        "Remaining": node["dependencies"],
+        "Dependents": node["dependents"]
+      })
+
+def _send_release(sfn, token: str, testID: str):
+  # A token may be released twice when the waiter and the last dependency race, the second call is harmless
+  with suppress(sfn.exceptions.TaskTimedOut, sfn.exceptions.InvalidToken):
+    sfn.send_task_success(
+      taskToken=token,
+      output=json.dumps({
+        "status": "SUCCESS",
+        "response": f"Dependencies of {testID} finished"
+      })
+    )
+
+def register_waiter(table, sfn, testGroupID: str, testID: str, token: str) -> bool:
+  response = table.update_item(
+    Key=log_key(testGroupID, f'D<{testID}>'),
+    UpdateExpression="SET #token = :token",
+    ExpressionAttributeNames={"#token": "Token"},
+    ExpressionAttributeValues={":token": token},
+    ReturnValues="ALL_NEW"
+  )
+  if response["Attributes"].get("Remaining", 0) <= 0:
+    _send_release(sfn, token, testID)
+    return True
+  return False
+
+def release_dependents(table, sfn, testGroupID: str, dependents: list[str]) -> list[str]:
+  released: list[str] = []
+  pending = deque(dependents)
+  while pending:
+    test = pending.popleft()
+    response = table.update_item(
+      Key=log_key(testGroupID, f'D<{test}>'),
+      UpdateExpression="ADD Remaining :minusOne",
+      ExpressionAttributeValues={":minusOne": -1},
+      ReturnValues="ALL_NEW"
+    )
+    node = response["Attributes"]
+    if node["Remaining"] != 0:
+      continue
+    if test == BARRIER:
+      # The barrier is not a test, finishing it releases the tests running at the end
+      pending.extend(node["Dependents"])
+    elif "Token" in node:
+      _send_release(sfn, node["Token"], test)
+      released.append(test)
+  return released
@@ -0,0 +1,157 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Any
+from common.clients import resource
+import hashlib, json, os, time
+
+"""
+  INFO: Cache of parsed test files, kept in module scope so warm lambda containers reuse it across invocations. Entries are keyed by bucket/key and validated with the object's ETag.
+
+  Lookup order for a test file:
+  1. Memory (LRU bounded by the size of the cached files): used as is if checked less than TEST_CACHE_TTL seconds ago, else revalidated with a conditional GET (If-None-Match), an unchanged file costs one request without body
+  2. Shared tier (optional): one HEAD gives the current ETag, the parsed file is looked up by bucket/key/ETag in a DynamoDB table or a local directory
+  3. S3: the file is downloaded and stored in both tiers
+
+  Environment variables (all optional):
+    TEST_CACHE_MAX_BYTES: <size bound of the memory tier, default 64 MiB>
+    TEST_CACHE_TTL: <seconds a cached file is trusted without asking s3, default 0 (always revalidate)>
+    TEST_CACHE_TABLE: <DynamoDB table with hash key "CacheKey" (S) used as shared tier>
+    TEST_CACHE_DIR: <directory used as shared tier, eg. an EFS mount>
+
+  ? cached tests are shared between callers and must not be modified
+"""
+
+class DynamoDBCacheBackend:
+  # DynamoDB items are limited to 400 KB
+  MAX_ITEM_BYTES = 350 * 1024
+
+  def __init__(self, tableName: str):
+    self.table = resource('dynamodb').Table(tableName)
+
+  def get(self, bucket: str, key: str, etag: str) -> bytes | None:
+    item = self.table.get_item(Key={"CacheKey": f"{bucket}/{key}"}).get("Item")
+    if item and item["ETag"] == etag:
+      return bytes(item["Body"])
+    return None
+
+  def put(self, bucket: str, key: str, etag: str, body: bytes):
+    if len(body) <= self.MAX_ITEM_BYTES:
+      self.table.put_item(Item={"CacheKey": f"{bucket}/{key}", "ETag": etag, "Body": body})
+
+class FileCacheBackend:
+  def __init__(self, directory: str):
+    self.directory = directory
+    os.makedirs(directory, exist_ok=True)
+
+  def _path(self, bucket: str, key: str, etag: str) -> str:
+    return os.path.join(self.directory, hashlib.sha256(f"{bucket}/{key}/{etag}".encode()).hexdigest() + ".json")
+
+  def get(self, bucket: str, key: str, etag: str) -> bytes | None:
+    try:
+      with open(self._path(bucket, key, etag), "rb") as f:
+        return f.read()
+    except FileNotFoundError:
+      return None
+
+  def put(self, bucket: str, key: str, etag: str, body: bytes):
+    # Write then rename, so concurrent readers never see a partial file
+    path = self._path(bucket, key, etag)
+    tempPath = f"{path}.{os.getpid()}.{time.monotonic_ns()}"
+    with open(tempPath, "wb") as f:
+      f.write(body)
+    os.replace(tempPath, path)
+
+class TestCache:
+  def __init__(self, maxBytes: int, ttl: float, shared=None):
+    self.maxBytes = maxBytes
+    self.ttl = ttl
+    self.shared = shared
+    self.size = 0
+    self.entries: OrderedDict[tuple[str, str], dict[str, Any]] = OrderedDict()
+    self.stats: dict[str, int] = {"memory": 0, "revalidated": 0, "shared": 0, "s3": 0}
+    self.lock = Lock()
+
+  def _lookup(self, cacheKey: tuple[str, str]) -> dict[str, Any] | None:
+    with self.lock:
+      entry = self.entries.get(cacheKey)
+      if entry is None:
+        return None
+      self.entries.move_to_end(cacheKey)
+      # A copy, entries are only changed under the lock
+      return dict(entry)
+
+  def _revalidated(self, cacheKey: tuple[str, str], etag: str):
+    with self.lock:
+      entry = self.entries.get(cacheKey)
+      # The entry may have been replaced or evicted meanwhile
+      if entry is not None and entry["etag"] == etag:
+        entry["checked"] = time.monotonic()
+      self.stats["revalidated"] += 1
+
+  def _store(self, cacheKey: tuple[str, str], etag: str, test: dict[str, Any], size: int):
+    with self.lock:
+      old = self.entries.pop(cacheKey, None)
+      if old is not None:
+        self.size -= old["size"]
+      if size > self.maxBytes:
+        return
+      self.entries[cacheKey] = {"etag": etag, "test": test, "size": size, "checked": time.monotonic()}
+      self.size += size
+      # Evict the least recently used files
+      while self.size > self.maxBytes:
+        _, evicted = self.entries.popitem(last=False)
+        self.size -= evicted["size"]
+
+  def _count(self, source: str):
+    with self.lock:
+      self.stats[source] += 1
+
+  def get_test(self, s3, bucket: str, key: str) -> tuple[dict[str, Any], str]:
+    cacheKey = (bucket, key)
+    entry = self._lookup(cacheKey)
+    if entry is not None:
+      if time.monotonic() - entry["checked"] < self.ttl:
+        self._count("memory")
+        return entry["test"], "memory"
+      try:
+        response = s3.get_object(Bucket=bucket, Key=key, IfNoneMatch=entry["etag"])
+      except s3.exceptions.ClientError as e:
+        if e.response["Error"]["Code"] not in ("304", "NotModified"):
+          raise
+        self._revalidated(cacheKey, entry["etag"])
+        return entry["test"], "revalidated"
+      # The file changed
+      return self._downloaded(cacheKey, response)
+
+    if self.shared is not None:
+      etag = s3.head_object(Bucket=bucket, Key=key)["ETag"]
+      body = self.shared.get(bucket, key, etag)
+      if body is not None:
+        return self._loaded(cacheKey, etag, body, "shared")
+
+    return self._downloaded(cacheKey, s3.get_object(Bucket=bucket, Key=key))
+
+  def _downloaded(self, cacheKey: tuple[str, str], response: dict[str, Any]) -> tuple[dict[str, Any], str]:
+    body = response["Body"].read()
+    if self.shared is not None:
+      self.shared.put(*cacheKey, response["ETag"], body)
+    return self._loaded(cacheKey, response["ETag"], body, "s3")
+
+  def _loaded(self, cacheKey: tuple[str, str], etag: str, body: bytes, source: str) -> tuple[dict[str, Any], str]:
+    test: dict[str, Any] = json.loads(body)
+    self._store(cacheKey, etag, test, len(body))
+    self._count(source)
+    return test, source
+
+def _shared_backend():
+  if os.environ.get("TEST_CACHE_TABLE"):
+    return DynamoDBCacheBackend(os.environ["TEST_CACHE_TABLE"])
+  if os.environ.get("TEST_CACHE_DIR"):
+    return FileCacheBackend(os.environ["TEST_CACHE_DIR"])
+  return None
+
+cache = TestCache(
+  maxBytes=int(os.environ.get("TEST_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+  ttl=float(os.environ.get("TEST_CACHE_TTL", 0)),
+  shared=_shared_backend()
+)
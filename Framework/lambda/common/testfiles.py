@@ -0,0 +1,41 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+import time
+from common.testcache import cache
+
+"""
+  INFO: Downloads and parses the test files of a test group from s3. Files are fetched concurrently by a bounded pool of threads and parsed in memory (no temp files), the s3 client should allow at least FETCH_WORKERS connections (the pooled clients of common/clients.py do).
+  Parsed files are served from the ETag keyed cache when unchanged (check common/testcache.py).
+
+  fetch_tests output:
+  (
+    {"<file name>": {<parsed test file>}},
+    ? in the same order as the keys given
+    {"<file name>": <fetch + parse time in ms>},
+    {"<file name>": "<memory|revalidated|shared|s3>"}
+    ? where the parsed file came from
+  )
+"""
+
+FETCH_WORKERS = 16
+
+def fetch_test(s3, bucket: str, key: str) -> tuple[dict[str, Any], float, str]:
+  start = time.perf_counter()
+  test, source = cache.get_test(s3, bucket, key)
+  return test, (time.perf_counter() - start) * 1000, source
+
+def fetch_tests(s3, bucket: str, keys: list[str], workers: int = FETCH_WORKERS) -> tuple[dict[str, dict[str, Any]], dict[str, float], dict[str, str]]:
+  tests: dict[str, dict[str, Any]] = {}
+  latencies: dict[str, float] = {}
+  sources: dict[str, str] = {}
+  keys = list(dict.fromkeys(keys))
+  if not keys:
+    return tests, latencies, sources
+
+  # map keeps the order of the keys, a failed download is raised here
+  with ThreadPoolExecutor(max_workers=min(workers, len(keys))) as pool:
+    for key, (test, latency, source) in zip(keys, pool.map(lambda key: fetch_test(s3, bucket, key), keys)):
+      tests[key] = test
+      latencies[key] = latency
+      sources[key] = source
+  return tests, latencies, sources
@@ -0,0 +1,121 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from typing import Any
+import json, os, time, uuid
+
+"""
+  INFO: Timer subsystem for the Wait steps. Instead of a lambda sleeping with the task token, the Waiter stores the token with its due time in the timer table and returns, and a scheduler pass sends the task success of every expired token.
+  The Waiter also sends a wake-up message {"due": <due time in epoch ms>} to the timer queue (TIMER_QUEUE_URL) with the wait as SQS delay, the queue triggers the TimerScheduler at the due time. Nothing runs between the due times: thousands of concurrent waits cost one short Waiter invocation each plus a short scheduler pass per batch of wake-ups.
+  ? an SQS delay is at most 15 minutes (MAX_DELAY_S), a wake-up of a longer wait is sent again by the scheduler until its due time
+
+  Timer table (TIMER_TABLE_NAME, default "Timers"):
+    "Shard": "<0 .. TIMER_SHARDS-1>" partition key, spreads the timers of big iterations
+    "Due": "<due time in epoch ms, 15 digits>#<unique id>" sort key, string order is due time order
+    "Token": "<sfn task token>"
+  A single lease item (Shard = Due = "LEASE") makes sure only one scheduler is running at a time, the Waiter starts one when no lease is held.
+
+  The functions take the table and the sfn client as arguments, so a pass can be run with a fake step functions client (any object with send_task_success and exceptions.TaskTimedOut/InvalidToken).
+"""
+
+TIMER_TABLE_NAME = os.environ.get("TIMER_TABLE_NAME", "Timers")
+SHARDS = int(os.environ.get("TIMER_SHARDS", 4))
+SEND_WORKERS = 16
+LEASE = "LEASE"
+LEASE_MS = int(os.environ.get("TIMER_LEASE_MS", 10000))
+TIMER_QUEUE_URL = os.environ.get("TIMER_QUEUE_URL")
+MAX_DELAY_S = 900
+
+WAIT_OUTPUT = json.dumps({
+  "status": "SUCCESS",
+  "response": "Wait Complete"
+})
+
+def now_ms() -> int:
+  return int(time.time() * 1000)
+
+def wake_delay(dueMs: int, nowMs: int | None = None) -> int:
+  # Whole seconds until the due time, rounded up so the wake-up is never early
+  nowMs = now_ms() if nowMs is None else nowMs
+  return min(MAX_DELAY_S, max(0, -(-(dueMs - nowMs) // 1000)))
+
+def wake_at(sqs, dueMs: int, nowMs: int | None = None):
+  # sqs is an SQS client, the message triggers a scheduler pass at dueMs (or MAX_DELAY_S later)
+  sqs.send_message(QueueUrl=TIMER_QUEUE_URL, MessageBody=json.dumps({"due": dueMs}), DelaySeconds=wake_delay(dueMs, nowMs))
+
+def _due_key(dueMs: int) -> str:
+  return f"{dueMs:015d}"
+
+def add_timer(table, token: str, waitTime: float, nowMs: int | None = None) -> int:
+  # The due time is a lower bound, the token is released by the first pass after it
+  dueMs = (now_ms() if nowMs is None else nowMs) + int(float(waitTime) * 1000)
+  table.put_item(Item={
+    "Shard": str(uuid.uuid4().int % SHARDS),
+    "Due": _due_key(dueMs) + "#" + uuid.uuid4().hex,
+    "Token": token
+  })
+  return dueMs
+
+def _query(table, shard: int, **kwargs) -> list[dict[str, Any]]:
+  items: list[dict[str, Any]] = []
+  kwargs.update(
+    KeyConditionExpression="#shard = :shard AND #due <= :due",
+    ExpressionAttributeNames={"#shard": "Shard", "#due": "Due"},
+    ExpressionAttributeValues={":shard": str(shard), ":due": kwargs.pop("due")}
+  )
+  while True:
+    response = table.query(**kwargs)
+    items.extend(response["Items"])
+    if "LastEvaluatedKey" not in response or kwargs.get("Limit"):
+      return items
+    kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+def due_timers(table, nowMs: int) -> list[dict[str, Any]]:
+  # "~" sorts after "#", so every timer due up to nowMs (included) matches
+  return [item for shard in range(SHARDS) for item in _query(table, shard, due=_due_key(nowMs) + "~", ConsistentRead=True)]
+
+def next_due(table) -> int | None:
+  # Due time of the earliest pending timer, None when there are none
+  firsts = [_query(table, shard, due="~", Limit=1, ConsistentRead=True) for shard in range(SHARDS)]
+  dues = [int(items[0]["Due"].split("#")[0]) for items in firsts if items]
+  return min(dues) if dues else None
+
+def _send(sfn, token: str) -> bool:
+  # A token whose execution timed out or was stopped cannot be released anymore, its timer is dropped all the same
+  with suppress(sfn.exceptions.TaskTimedOut, sfn.exceptions.InvalidToken):
+    sfn.send_task_success(taskToken=token, output=WAIT_OUTPUT)
+    return True
+  return False
+
+def run_pass(table, sfn, nowMs: int | None = None) -> dict[str, int]:
+  timers = due_timers(table, now_ms() if nowMs is None else nowMs)
+  if not timers:
+    return {"released": 0, "expired": 0}
+  with ThreadPoolExecutor(max_workers=min(SEND_WORKERS, len(timers))) as pool:
+    sent = list(pool.map(lambda item: _send(sfn, item["Token"]), timers))
+  with table.batch_writer() as batch:
+    for item in timers:
+      batch.delete_item(Key={"Shard": item["Shard"], "Due": item["Due"]})
+  return {"released": sum(sent), "expired": len(sent) - sum(sent)}
+
+def acquire_lease(table, owner: str, nowMs: int | None = None) -> bool:
+  # Taken when free or expired, renewed when already held by owner
+  nowMs = now_ms() if nowMs is None else nowMs
+  try:
+    table.put_item(
+      Item={"Shard": LEASE, "Due": LEASE, "Owner": owner, "Until": nowMs + LEASE_MS},
+      ConditionExpression="attribute_not_exists(#shard) OR #until < :now OR #owner = :owner",
+      ExpressionAttributeNames={"#shard": "Shard", "#until": "Until", "#owner": "Owner"},
+      ExpressionAttributeValues={":now": nowMs, ":owner": owner}
+    )
+  except table.meta.client.exceptions.ConditionalCheckFailedException:
+    return False
+  return True
+
+def release_lease(table, owner: str):
+  with suppress(table.meta.client.exceptions.ConditionalCheckFailedException):
+    table.delete_item(
+      Key={"Shard": LEASE, "Due": LEASE},
+      ConditionExpression="#owner = :owner",
+      ExpressionAttributeNames={"#owner": "Owner"},
+      ExpressionAttributeValues={":owner": owner}
+    )
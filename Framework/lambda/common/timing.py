@@ -0,0 +1,75 @@
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Any, Callable
+import functools, time
+
+"""
+  INFO: Timing of the steps, recorded in the log table as numeric attributes (milliseconds).
+  - The pooled clients and resources (common/clients.py) time every AWS call (retries included) with botocore's before-call/after-call events, into process wide totals
+  - timed wraps an operation handler: its result gets a "timing" item with the wall clock start and end of the operation, its duration (monotonic clock) and the time spent in AWS calls
+  - StepLogger moves "timing" out of the output into the attributes of the step record, and splits out the orchestration gap using the load time of the step (TestLoader)
+  Wall clock times (epoch ms) are used only to compare times between lambdas, durations come from the monotonic clock.
+  ? AWS call totals are process wide: calls of the handler's own threads are counted, calls of steps running in parallel in the same process (local runner) are mixed
+
+  Usage:
+    @timed
+    def handler(event, context):
+      ...
+  "timing": {"start_ms": <epoch ms>, "end_ms": <epoch ms>, "duration_ms": <number>, "aws_ms": <number>, "aws_calls": <number>}
+"""
+
+_lock = Lock()
+_awsMs = 0.0
+_awsCalls = 0
+
+def epoch_ms() -> int:
+  return time.time_ns() // 1000000
+
+def timestamp() -> str:
+  # ISO-8601 UTC with milliseconds, sorts as a string
+  return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+def _before_call(context: dict[str, Any] | None = None, **kwargs):
+  if context is not None:
+    context["timing_start"] = time.perf_counter()
+
+def _after_call(context: dict[str, Any] | None = None, **kwargs):
+  global _awsMs, _awsCalls
+  start = context.pop("timing_start", None) if context is not None else None
+  if start is None:
+    return
+  elapsed = (time.perf_counter() - start) * 1000
+  with _lock:
+    _awsMs += elapsed
+    _awsCalls += 1
+
+def instrument(events):
+  # events is the event system of a client (client.meta.events)
+  events.register("before-call", _before_call)
+  events.register("after-call", _after_call)
+  # Calls failing without a response (eg. connection errors)
+  events.register("after-call-error", _after_call)
+
+def aws_totals() -> tuple[float, int]:
+  with _lock:
+    return _awsMs, _awsCalls
+
+def timed(handler: Callable[[dict[str, Any], Any], Any]) -> Callable[[dict[str, Any], Any], Any]:
+  @functools.wraps(handler)
+  def wrapper(event, context):
+    awsMs, awsCalls = aws_totals()
+    startMs = epoch_ms()
+    start = time.perf_counter()
+    result = handler(event, context)
+    duration = (time.perf_counter() - start) * 1000
+    if isinstance(result, dict):
+      endAwsMs, endAwsCalls = aws_totals()
+      result = dict(result, timing={
+        "start_ms": startMs,
+        "end_ms": epoch_ms(),
+        "duration_ms": round(duration, 3),
+        "aws_ms": round(endAwsMs - awsMs, 3),
+        "aws_calls": endAwsCalls - awsCalls
+      })
+    return result
+  return wrapper
@@ -2,9 +2,46 @@ import * as cdk from 'aws-cdk-lib';
 import * as iam from 'aws-cdk-lib/aws-iam';
 import * as sqs from 'aws-cdk-lib/aws-sqs';
 import * as lambda from 'aws-cdk-lib/aws-lambda';
+import * as dynamodb from 'aws-cdk-lib/aws-dynamodb';
+import * as s3 from 'aws-cdk-lib/aws-s3';
+import * as events from 'aws-cdk-lib/aws-events';
+import * as targets from 'aws-cdk-lib/aws-events-targets';
+import * as eventSources from 'aws-cdk-lib/aws-lambda-event-sources';
 import * as sfn from 'aws-cdk-lib/aws-stepfunctions';
 import * as task from 'aws-cdk-lib/aws-stepfunctions-tasks';
 import { Construct } from 'constructs';
+import * as fs from 'fs';
+import * as path from 'path';
+
+/** Newest modification time (ms) of the files in a folder, __pycache__ excluded */
+function newestChange(folder: string): number {
+  let newest = 0;
+  for (const entry of fs.readdirSync(folder, { withFileTypes: true })) {
+    if (entry.name === '__pycache__') continue;
+    const entryPath = path.join(folder, entry.name);
+    newest = Math.max(newest, entry.isDirectory() ? newestChange(entryPath) : fs.statSync(entryPath).mtimeMs);
+  }
+  return newest;
+}
+
+const lambdaChanged = newestChange('./lambda');
+
+/**
+ * Slim package of a handler module built by tools/package.py (npm run package, run by npm run synth/deploy), the whole lambda folder otherwise
+ * A package built before the last change of the lambda folder is not deployed, synth fails until it is rebuilt
+ */
+function handlerCode(module: string): lambda.Code {
+  const slim = path.join('./lambda_build', module);
+  if (!fs.existsSync(slim)) {
+    return lambda.Code.fromAsset('./lambda');
+  }
+  // Written by tools/package.py once the package is complete
+  const manifest = path.join('./lambda_build', `${module}.json`);
+  if (!fs.existsSync(manifest) || fs.statSync(manifest).mtimeMs < lambdaChanged) {
+    throw new Error(`${slim} is older than ./lambda, run npm run package`);
+  }
+  return lambda.Code.fromAsset(slim);
+}
 
 /**
  * This version uses a step function to combine all files,
@@ -19,7 +56,7 @@ import { Construct } from 'constructs';
 
 export class FrameworkStack extends cdk.Stack {
   private parserFunc: lambda.Function;
-  private stepLoaderFunc: lambda.Function;
+  private stepExecutorFunc: lambda.Function;
   private iterationLoaderFunc: lambda.Function;
   private testFinisherFunc: lambda.Function;
   private iterationsFinisherFunc: lambda.Function;
@@ -35,7 +72,7 @@ export class FrameworkStack extends cdk.Stack {
     this.parserFunc = new lambda.Function(this, "Parser Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
       handler: 'Parser.handler',
-      code: lambda.Code.fromAsset(`./lambda`),
+      code: handlerCode('Parser'),
       description: "Parses the input files, breaks file into test scenarios and sends to q",
       functionName: "ParserFn",
       timeout: cdk.Duration.minutes(1)
@@ -44,26 +81,26 @@ export class FrameworkStack extends cdk.Stack {
     this.iterationLoaderFunc = new lambda.Function(this, "Iteration Loader Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
       handler: 'IterationLoader.handler',
-      code: lambda.Code.fromAsset(`./lambda`),
+      code: handlerCode('IterationLoader'),
       description: "Loads the next iteration from q to sfn",
       functionName: "IterationLoaderFn",
       timeout: cdk.Duration.seconds(5)
     });
 
-    this.stepLoaderFunc = new lambda.Function(this, "Step Loader Function", {
+    this.stepExecutorFunc = new lambda.Function(this, "Step Executor Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
-      handler: 'TestLoader.handler',
-      code: lambda.Code.fromAsset(`./lambda`),
-      description: "Extracts the next step from steps in payload",
-      functionName: "TestLoaderFn",
-      timeout: cdk.Duration.seconds(5)
+      handler: 'StepExecutor.handler',
+      code: handlerCode('StepExecutor'),
+      description: "Runs consecutive steps of a test in one invocation, until a wait, a failure or the time budget",
+      functionName: "StepExecutorFn",
+      timeout: cdk.Duration.minutes(5)
     });
 
     this.stepLoggerFunc = new lambda.Function(this, "Step Logger Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
       handler: 'StepLogger.handler',
       timeout: cdk.Duration.seconds(10),
-      code: lambda.Code.fromAsset(`./lambda`),
+      code: handlerCode('StepLogger'),
       description: "Logs the result of test/validation",
       functionName: "StepLoggerFn",
     })
@@ -72,7 +109,7 @@ export class FrameworkStack extends cdk.Stack {
       runtime: lambda.Runtime.PYTHON_3_10,
       handler: 'TestFinisher.handler',
       timeout: cdk.Duration.seconds(10),
-      code: lambda.Code.fromAsset(`./lambda`),
+      code: handlerCode('TestFinisher'),
       description: "Lambda to invoke after all steps of a test are complete, or a failure happens",
       functionName: "TestFinisherFn"
     });
@@ -81,179 +118,291 @@ export class FrameworkStack extends cdk.Stack {
       runtime: lambda.Runtime.PYTHON_3_10,
       handler: 'IterationsFinisher.handler',
       timeout: cdk.Duration.seconds(10),
-      code: lambda.Code.fromAsset(`./lambda`),
+      code: handlerCode('IterationsFinisher'),
       description: "Lambda to invoke after all iterations of a test group are complete, or a failure happens",
       functionName: "IterationsFinisherFn"
     });
     
+    // Large steps lists, iteration lists and operation outputs are passed through the state machine as references to this bucket (claim check)
+    const payloadBucket = new s3.Bucket(this, "Payload Bucket", {
+      lifecycleRules: [{ expiration: cdk.Duration.days(7) }],
+      removalPolicy: cdk.RemovalPolicy.DESTROY,
+      autoDeleteObjects: true
+    });
+    for (const func of [this.parserFunc, this.iterationLoaderFunc, this.stepExecutorFunc, this.stepLoggerFunc]) {
+      func.addEnvironment("PAYLOAD_BUCKET", payloadBucket.bucketName);
+    }
+
+    // Wait steps store their task token with a due time, the timer scheduler releases the expired ones
+    const timerTable = new dynamodb.Table(this, "Timer Table", {
+      tableName: "Timers",
+      partitionKey: { name: "Shard", type: dynamodb.AttributeType.STRING },
+      sortKey: { name: "Due", type: dynamodb.AttributeType.STRING },
+      billingMode: dynamodb.BillingMode.PAY_PER_REQUEST,
+      removalPolicy: cdk.RemovalPolicy.DESTROY
+    });
+
+    // Wake-up messages of the waits, delayed until their due time (SQS DelaySeconds)
+    const timerQueue = new sqs.Queue(this, "Timer Queue", {
+      visibilityTimeout: cdk.Duration.minutes(2)
+    });
+
+    const timerSchedulerFunc = new lambda.Function(this, "Timer Scheduler Function", {
+      runtime: lambda.Runtime.PYTHON_3_10,
+      handler: 'TimerScheduler.handler',
+      code: handlerCode('TimerScheduler'),
+      description: "Releases the task tokens of the finished waits",
+      functionName: "TimerSchedulerFn",
+      timeout: cdk.Duration.minutes(1),
+      environment: {
+        TIMER_TABLE_NAME: timerTable.tableName,
+        TIMER_QUEUE_URL: timerQueue.queueUrl
+      }
+    });
+    timerSchedulerFunc.addEventSource(new eventSources.SqsEventSource(timerQueue, { batchSize: 10 }));
+    // Fallback in case a wake-up is lost (eg. a failed send), it does nothing while another scheduler holds the lease
+    new events.Rule(this, "Timer Scheduler Rule", {
+      schedule: events.Schedule.rate(cdk.Duration.minutes(1)),
+      targets: [new targets.LambdaFunction(timerSchedulerFunc)]
+    });
+
     const waiterFunc = new lambda.Function(this, "Waiter Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
       handler: 'Waiter.handler',
-      code: lambda.Code.fromAsset(`./lambda`),
-      description: "Waits for the specified interval",
+      code: handlerCode('Waiter'),
+      description: "Stores the wait with its due time for the timer scheduler",
       functionName: "WaiterFn",
-      timeout: cdk.Duration.minutes(3),
+      timeout: cdk.Duration.seconds(10),
+      environment: {
+        TIMER_TABLE_NAME: timerTable.tableName,
+        TIMER_QUEUE_URL: timerQueue.queueUrl
+      }
     });
 
+    const dependencyWaiterFunc = new lambda.Function(this, "Dependency Waiter Function", {
+      runtime: lambda.Runtime.PYTHON_3_10,
+      handler: 'DependencyWaiter.handler',
+      code: handlerCode('DependencyWaiter'),
+      description: "Holds a test until all its dependencies are finished",
+      functionName: "DependencyWaiterFn",
+      timeout: cdk.Duration.seconds(10),
+    });
+
+    // Test Scenario Lambdas ship the shared modules of common/ they use (check handlerCode)
+    // Create operations with wait_until_ready poll up to DEFAULT_TIMEOUT (120 s, common/readiness.py), plus its RESERVE_SECONDS and the create call
+    const createTimeout = cdk.Duration.seconds(130);
     // DDB Test Scenario Lambdas
     const createEntryFunc = new lambda.Function(this, "Create Entry Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
-      code: lambda.Code.fromAsset(`./lambda/DynamoDB`),
+      code: handlerCode('DynamoDB.CreateEntry'),
       functionName: "CreateEntryFn",
-      handler: "CreateEntry.handler"
+      handler: "DynamoDB.CreateEntry.handler"
     })
     const createTableFunc = new lambda.Function(this, "Create Table Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
-      code: lambda.Code.fromAsset(`./lambda/DynamoDB`),
+      code: handlerCode('DynamoDB.CreateTable'),
       functionName: "CreateTableFn",
-      handler: "CreateTable.handler"
+      handler: "DynamoDB.CreateTable.handler",
+      timeout: createTimeout
     })
     const getEntryFunc = new lambda.Function(this, "Get Entry Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
-      code: lambda.Code.fromAsset(`./lambda/DynamoDB`),
+      code: handlerCode('DynamoDB.GetEntry'),
       functionName: "GetEntryFn",
-      handler: "GetEntry.handler"
+      handler: "DynamoDB.GetEntry.handler"
     })
     const updateEntryFunc = new lambda.Function(this, "Update Entry Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
-      code: lambda.Code.fromAsset(`./lambda/DynamoDB`),
+      code: handlerCode('DynamoDB.UpdateEntry'),
       functionName: "UpdateEntryFn",
-      handler: "UpdateEntry.handler"
+      handler: "DynamoDB.UpdateEntry.handler"
     })
     const deleteEntryFunc = new lambda.Function(this, "Delete Entry Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
-      code: lambda.Code.fromAsset('./lambda/DynamoDB'),
+      code: handlerCode('DynamoDB.deleteEntry'),
       functionName: "DeleteEntryFn",
-      handler: "deleteEntry.lambda_handler"
+      handler: "DynamoDB.deleteEntry.lambda_handler"
     })
     const deleteTableFunc = new lambda.Function(this, "Delete Table Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
-      code: lambda.Code.fromAsset('./lambda/DynamoDB'),
+      code: handlerCode('DynamoDB.deleteTable'),
       functionName: "DeleteTableFn",
-      handler: "deleteTable.lambda_handler"
+      handler: "DynamoDB.deleteTable.lambda_handler"
     })
     const entryExistFunc = new lambda.Function(this, "Does Entry Exist Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
-      code: lambda.Code.fromAsset('./lambda/DynamoDB'),
+      code: handlerCode('DynamoDB.doesEntryExist'),
       functionName: "DoesEntryExistFn",
-      handler: "doesEntryExist.lambda_handler"
+      handler: "DynamoDB.doesEntryExist.lambda_handler"
     })
     const tableExistFunc = new lambda.Function(this, "Does table Exist Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
-      code: lambda.Code.fromAsset('./lambda/DynamoDB'),
+      code: handlerCode('DynamoDB.doesTableExist'),
       functionName: "DoesTableExistFn",
-      handler: "doesTableExist.lambda_handler"
+      handler: "DynamoDB.doesTableExist.lambda_handler"
+    })
+    const loadEntriesFunc = new lambda.Function(this, "Load Entries Function", {
+      runtime: lambda.Runtime.PYTHON_3_10,
+      code: handlerCode('DynamoDB.LoadEntries'),
+      functionName: "LoadEntriesFn",
+      handler: "DynamoDB.LoadEntries.handler",
+      timeout: cdk.Duration.minutes(5)
+    })
+    const batchGetEntriesFunc = new lambda.Function(this, "Batch Get Entries Function", {
+      runtime: lambda.Runtime.PYTHON_3_10,
+      code: handlerCode('DynamoDB.BatchGetEntries'),
+      functionName: "BatchGetEntriesFn",
+      handler: "DynamoDB.BatchGetEntries.handler",
+      timeout: cdk.Duration.minutes(5)
+    })
+    const queryEntriesFunc = new lambda.Function(this, "Query Entries Function", {
+      runtime: lambda.Runtime.PYTHON_3_10,
+      code: handlerCode('DynamoDB.QueryEntries'),
+      functionName: "QueryEntriesFn",
+      handler: "DynamoDB.QueryEntries.handler",
+      timeout: cdk.Duration.minutes(5)
+    })
+    const scanEntriesFunc = new lambda.Function(this, "Scan Entries Function", {
+      runtime: lambda.Runtime.PYTHON_3_10,
+      code: handlerCode('DynamoDB.ScanEntries'),
+      functionName: "ScanEntriesFn",
+      handler: "DynamoDB.ScanEntries.handler",
+      timeout: cdk.Duration.minutes(5)
     })
 
     // S3 Test Scenarios
     const createBucketFunc = new lambda.Function(this, "Create Bucket Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
-      code: lambda.Code.fromAsset(`./lambda/S3`),
+      code: handlerCode('S3.CreateBucket'),
       functionName: "CreateBucketFn",
-      handler: "CreateBucket.handler"
+      handler: "S3.CreateBucket.handler",
+      timeout: createTimeout
     })
     const createFileFunc = new lambda.Function(this, "Create File Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
-      code: lambda.Code.fromAsset(`./lambda/S3`),
+      code: handlerCode('S3.CreateFile'),
       functionName: "CreateFileFn",
-      handler: "CreateFile.handler"
+      handler: "S3.CreateFile.handler",
+      // Generated payloads and multipart parts are held in memory
+      memorySize: 1024,
+      timeout: cdk.Duration.minutes(5)
     })
     const deleteFileFunc = new lambda.Function(this, "Delete File Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
-      code: lambda.Code.fromAsset(`./lambda/S3`),
+      code: handlerCode('S3.DeleteFile'),
       functionName: "DeleteFileFn",
-      handler: "DeleteFile.handler"
+      handler: "S3.DeleteFile.handler"
     })
     const deleteBucketFunc = new lambda.Function(this, "Delete Bucket Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
-      code: lambda.Code.fromAsset(`./lambda/S3`),
+      code: handlerCode('S3.deleteBucket'),
       functionName: "DeleteBucketFn",
-      handler: "deleteBucket.lambda_handler"
+      handler: "S3.deleteBucket.lambda_handler"
     })
     const bucketExistFunc = new lambda.Function(this, "Does Bucket Exist Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
-      code: lambda.Code.fromAsset(`./lambda/S3`),
+      code: handlerCode('S3.doesBucketExist'),
       functionName: "DoesBucketExistFn",
-      handler: "doesBucketExist.lambda_handler"
+      handler: "S3.doesBucketExist.lambda_handler"
     })
     const fileExistFunc = new lambda.Function(this, "Does File Exist Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
-      code: lambda.Code.fromAsset(`./lambda/S3`),
+      code: handlerCode('S3.doesFileExist'),
       functionName: "DoesFileExistFn",
-      handler: "doesFileExist.lambda_handler"
+      handler: "S3.doesFileExist.lambda_handler"
     })
     const readFileFunc = new lambda.Function(this, "Read File Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
-      code: lambda.Code.fromAsset(`./lambda/S3`),
+      code: handlerCode('S3.readFile'),
       functionName: "ReadFileFn",
-      handler: "readFile.lambda_handler"
+      handler: "S3.readFile.lambda_handler"
     })
 
     // SNS Test Scenarios
     const createTopicFunc = new lambda.Function(this, "Create Topic Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
-      code: lambda.Code.fromAsset(`./lambda/SNS`),
+      code: handlerCode('SNS.CreateTopic'),
       functionName: "CreateTopicFn",
-      handler: "CreateTopic.handler"
+      handler: "SNS.CreateTopic.handler",
+      timeout: createTimeout
     })
     const publishMessageFunc = new lambda.Function(this, "Publish Message Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
-      code: lambda.Code.fromAsset(`./lambda/SNS`),
+      code: handlerCode('SNS.PublishMessage'),
       functionName: "PublishMessageFn",
-      handler: "PublishMessage.handler"
+      handler: "SNS.PublishMessage.handler",
+      timeout: cdk.Duration.minutes(5)
     })
     const deleteTopicFunc = new lambda.Function(this, "Delete Topic Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
-      code: lambda.Code.fromAsset(`./lambda/SNS`),
+      code: handlerCode('SNS.DeleteTopic'),
       functionName: "DeleteTopicFn",
-      handler: "DeleteTopic.handler"
+      handler: "SNS.DeleteTopic.handler"
     })
     const doesTopicExistFunc = new lambda.Function(this, "Does Topic Exist Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
-      code: lambda.Code.fromAsset(`./lambda/SNS`),
+      code: handlerCode('SNS.DoesTopicExist'),
       functionName: "DoesTopicExistFn",
-      handler: "DoesTopicExist.handler"
+      handler: "SNS.DoesTopicExist.handler"
     })
 
     //SQS Test Scenarios
     const sendMessageFunc = new lambda.Function(this, "Send Message Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
-      code: lambda.Code.fromAsset(`./lambda/SQS`),
+      code: handlerCode('SQS.SendMessage'),
       functionName: "SendMessageFn",
-      handler: "SendMessage.lambda_handler"
+      handler: "SQS.SendMessage.lambda_handler",
+      timeout: cdk.Duration.minutes(5)
     })
     const readMessageFunc = new lambda.Function(this, "Receive Message Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
-      code: lambda.Code.fromAsset(`./lambda/SQS`),
+      code: handlerCode('SQS.ReadMessage'),
       functionName: "ReceiveMessageFn",
-      handler: "ReadMessage.lambda_handler"
+      handler: "SQS.ReadMessage.lambda_handler",
+      // Drain mode long polls up to its max_seconds
+      timeout: cdk.Duration.minutes(5)
     })
     const deleteMessageFunc = new lambda.Function(this, "Delete Message Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
-      code: lambda.Code.fromAsset(`./lambda/SQS`),
+      code: handlerCode('SQS.DeleteMessage'),
       functionName: "DeleteMessageFn",
-      handler: "DeleteMessage.lambda_handler"
+      handler: "SQS.DeleteMessage.lambda_handler"
     })
     const doesQueueExistFunc = new lambda.Function(this, "Does Queue Exist Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
-      code: lambda.Code.fromAsset(`./lambda/SQS`),
+      code: handlerCode('SQS.DoesQueueExist'),
       functionName: "DoesQueueExistFn",
-      handler: "DoesQueueExist.lambda_handler"
+      handler: "SQS.DoesQueueExist.lambda_handler"
     })
     const createQueueFunc = new lambda.Function(this, "Create Queue Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
-      code: lambda.Code.fromAsset(`./lambda/SQS`),
+      code: handlerCode('SQS.CreateQueue'),
       functionName: "CreateQueueFn",
-      handler: "CreateQueue.lambda_handler"
+      handler: "SQS.CreateQueue.lambda_handler",
+      timeout: createTimeout
     })
     const deleteQueueFunc = new lambda.Function(this, "Delete Queue Function", {
       runtime: lambda.Runtime.PYTHON_3_10,
-      code: lambda.Code.fromAsset(`./lambda/SQS`),
+      code: handlerCode('SQS.DeleteQueue'),
       functionName: "DeleteQueueFn",
-      handler: "DeleteQueue.lambda_handler"
+      handler: "SQS.DeleteQueue.lambda_handler"
     })
+    // Isolated steps return a large response as a claim check reference (common/claimcheck.py claim_checked)
+    const operationFuncs = [
+      createEntryFunc, createTableFunc, getEntryFunc, updateEntryFunc, deleteEntryFunc, deleteTableFunc, entryExistFunc, tableExistFunc,
+      loadEntriesFunc, batchGetEntriesFunc, queryEntriesFunc, scanEntriesFunc,
+      createBucketFunc, createFileFunc, deleteFileFunc, deleteBucketFunc, bucketExistFunc, fileExistFunc, readFileFunc,
+      createTopicFunc, publishMessageFunc, deleteTopicFunc, doesTopicExistFunc,
+      sendMessageFunc, readMessageFunc, deleteMessageFunc, doesQueueExistFunc, createQueueFunc, deleteQueueFunc
+    ];
+    for (const func of operationFuncs) {
+      func.addEnvironment("PAYLOAD_BUCKET", payloadBucket.bucketName);
+    }
 
     /** ------------------ Step functions Definition ------------------ */
+    const executionTimeout = cdk.Duration.minutes(10);
+    // A test waits for its dependencies at most 3/4 of the execution, the rest is left to log it as failed and run its dependents
+    const dependenciesTimeout = cdk.Duration.seconds(Math.floor(executionTimeout.toSeconds() * 3 / 4));
 
     // Main Flow States
     const parseJsonSt = new task.LambdaInvoke(this, 'Start Input Parsing', {
@@ -284,8 +433,8 @@ export class FrameworkStack extends cdk.Stack {
       outputPath: '$'
     });
 
-    const loadNextStepSt = new task.LambdaInvoke(this, "Load Next Step", {
-      lambdaFunction: this.stepLoaderFunc,
+    const executeStepsSt = new task.LambdaInvoke(this, "Execute Steps", {
+      lambdaFunction: this.stepExecutorFunc,
       payload: sfn.TaskInput.fromObject({
         test_group_id: sfn.JsonPath.stringAt('$.test_group_id'),
         log_table_name: sfn.JsonPath.stringAt('$.log_table_name'),
@@ -298,7 +447,9 @@ export class FrameworkStack extends cdk.Stack {
         "test_scenario_id.$": "$.Payload.test_scenario_id",
         "step_id.$": "$.Payload.step_id",
         "type.$": "$.Payload.type",
-        "test.$": "$.Payload.test"
+        "test.$": "$.Payload.test",
+        "log.$": "$.Payload.log",
+        "results.$": "$.Payload.results"
       },
       resultPath: '$.Payload',
       outputPath: '$'
@@ -310,7 +461,7 @@ export class FrameworkStack extends cdk.Stack {
       inputPath: '$',
       resultPath: sfn.JsonPath.DISCARD,
       outputPath: '$'
-    }).next(loadNextStepSt);
+    }).next(executeStepsSt);
 
     const finishTestGroupSt = new task.LambdaInvoke(this, "Finish Test Group Execution", {
       lambdaFunction: this.iterationsFinisherFunc,
@@ -320,12 +471,16 @@ export class FrameworkStack extends cdk.Stack {
       outputPath: "$"
     }); 
 
+    // The last state of a test, only the status is kept so the Map result stays small whatever the size of the group
     const finishTestSt = new task.LambdaInvoke(this, "Finish Test Execution", {
       lambdaFunction: this.testFinisherFunc,
       payload: sfn.TaskInput.fromJsonPathAt('$'),
       inputPath: '$',
+      resultSelector: {
+        "status.$": "$.Payload.status"
+      },
       resultPath: '$.output',
-      outputPath: "$"
+      outputPath: "$.output"
     });
 
     const waiterSt = new task.LambdaInvoke(this, "Wait X Seconds", {
@@ -339,6 +494,61 @@ export class FrameworkStack extends cdk.Stack {
       outputPath: "$"
     }).next(logStepResultSt);
 
+    const awaitDependenciesSt = new task.LambdaInvoke(this, "Await Dependencies", {
+      lambdaFunction: dependencyWaiterFunc,
+      integrationPattern: sfn.IntegrationPattern.WAIT_FOR_TASK_TOKEN,
+      payload: sfn.TaskInput.fromObject({
+        token: sfn.JsonPath.taskToken,
+        test_group_id: sfn.JsonPath.stringAt('$.test_group_id'),
+        log_table_name: sfn.JsonPath.stringAt('$.log_table_name'),
+        test_id: sfn.JsonPath.stringAt('$.test_id')
+      }),
+      resultPath: sfn.JsonPath.DISCARD,
+      outputPath: "$",
+      // A token never released (eg. a dependency failed before its TestFinisher) fails the test instead of holding the Map until the execution times out
+      timeout: dependenciesTimeout
+    });
+
+    const dependenciesTimedOutSt = new sfn.Pass(this, "Dependencies Timed Out", {
+      inputPath: "$",
+      parameters: {
+        "log_table_name.$": "$.log_table_name",
+        "test_group_id.$": "$.test_group_id",
+        "test_id.$": "$.test_id",
+        "dependents.$": "$.dependents",
+        "Payload": {
+          "test": {},
+          "test_scenario_id.$": "States.Format('T<{}>:S<AwaitDependencies>', $.test_id)",
+          "type": "AwaitDependencies"
+        },
+        "testResult": {
+          "Payload": {
+            "status": "FAILED",
+            "message.$": "States.Format('Error: Timeout - the dependencies of {} did not finish in time', $.test_id)"
+          }
+        }
+      },
+      outputPath: "$"
+    }).next(new task.LambdaInvoke(this, "Log Dependencies Timeout", {
+      lambdaFunction: this.stepLoggerFunc,
+      payload: sfn.TaskInput.fromJsonPathAt('$'),
+      inputPath: '$',
+      resultPath: sfn.JsonPath.DISCARD,
+      outputPath: '$'
+    })).next(new sfn.Pass(this, "Fail Test", {
+      // The test ends as failed, TestFinisher releases its dependents so they do not time out in turn
+      parameters: {
+        "test_scenario_id.$": "States.Format('T<{}>:S<Completed>', $.test_id)",
+        "type": "Completed",
+        "status": "FAILED"
+      },
+      resultPath: '$.Payload'
+    })).next(finishTestSt);
+    awaitDependenciesSt.addCatch(dependenciesTimedOutSt, {
+      errors: [sfn.Errors.TIMEOUT],
+      resultPath: "$.error"
+    });
+
     // DDB Test Scenario States
     const createEntrySt = new task.LambdaInvoke(this, "Create Entry Test",{
       lambdaFunction: createEntryFunc,
@@ -388,6 +598,30 @@ export class FrameworkStack extends cdk.Stack {
       resultPath: "$.testResult",
       outputPath: "$"
     }).next(logStepResultSt)
+    const loadEntriesSt = new task.LambdaInvoke(this, "Load Entries Test", {
+      lambdaFunction: loadEntriesFunc,
+      inputPath: "$.Payload.test",
+      resultPath: "$.testResult",
+      outputPath: "$"
+    }).next(logStepResultSt)
+    const batchGetEntriesSt = new task.LambdaInvoke(this, "Batch Get Entries Test", {
+      lambdaFunction: batchGetEntriesFunc,
+      inputPath: "$.Payload.test",
+      resultPath: "$.testResult",
+      outputPath: "$"
+    }).next(logStepResultSt)
+    const queryEntriesSt = new task.LambdaInvoke(this, "Query Entries Test", {
+      lambdaFunction: queryEntriesFunc,
+      inputPath: "$.Payload.test",
+      resultPath: "$.testResult",
+      outputPath: "$"
+    }).next(logStepResultSt)
+    const scanEntriesSt = new task.LambdaInvoke(this, "Scan Entries Test", {
+      lambdaFunction: scanEntriesFunc,
+      inputPath: "$.Payload.test",
+      resultPath: "$.testResult",
+      outputPath: "$"
+    }).next(logStepResultSt)
 
     // S3 Test Scenario States
     const createBucketSt = new task.LambdaInvoke(this, "Create Bucket Test",{
@@ -510,7 +744,7 @@ export class FrameworkStack extends cdk.Stack {
       outputPath: "$"
     }).next(logStepResultSt);
 
-    // The choice state
+    // The choice state, Execute Steps runs most operations itself and returns here for waits, isolated steps and to continue after a failure or its time budget
     const chooseOperationSt = new sfn.Choice(this, 'Choose Test Scenario')
     .when(sfn.Condition.stringEquals('$.Payload.type', 'CreateEntry'), createEntrySt)
     .when(sfn.Condition.stringEquals('$.Payload.type', 'CreateTable'), createTableSt)
@@ -520,6 +754,10 @@ export class FrameworkStack extends cdk.Stack {
     .when(sfn.Condition.stringEquals('$.Payload.type', 'DeleteTable'), deleteTableSt)
     .when(sfn.Condition.stringEquals('$.Payload.type', 'DoesEntryExist'), entryExistSt)
     .when(sfn.Condition.stringEquals('$.Payload.type', 'DoesTableExist'), tableExistSt)
+    .when(sfn.Condition.stringEquals('$.Payload.type', 'LoadEntries'), loadEntriesSt)
+    .when(sfn.Condition.stringEquals('$.Payload.type', 'BatchGetEntries'), batchGetEntriesSt)
+    .when(sfn.Condition.stringEquals('$.Payload.type', 'QueryEntries'), queryEntriesSt)
+    .when(sfn.Condition.stringEquals('$.Payload.type', 'ScanEntries'), scanEntriesSt)
     .when(sfn.Condition.stringEquals('$.Payload.type', 'CreateBucket'), createBucketSt)
     .when(sfn.Condition.stringEquals('$.Payload.type', 'CreateFile'), createFileSt)
     .when(sfn.Condition.stringEquals('$.Payload.type', 'DeleteFile'), deleteFileSt)
@@ -539,10 +777,14 @@ export class FrameworkStack extends cdk.Stack {
     .when(sfn.Condition.stringEquals('$.Payload.type', 'DeleteQueue'), deleteQueueSt)
     .when(sfn.Condition.stringEquals('$.Payload.type', 'Wait'), waiterSt)
     .when(sfn.Condition.stringEquals('$.Payload.type', 'Completed'), finishTestSt)
+    .when(sfn.Condition.stringEquals('$.Payload.type', 'Continue'), executeStepsSt)
     .otherwise(unknownOperationSt);
 
-    // The Map State Subflow
-    const testFlow = loadNextStepSt.next(chooseOperationSt);
+    // The Map State Subflow, a test starts as soon as its own dependencies are finished
+    executeStepsSt.next(chooseOperationSt);
+    const testFlow = new sfn.Choice(this, "Has Dependencies?")
+    .when(sfn.Condition.numberGreaterThan("$.dependencies", 0), awaitDependenciesSt.next(executeStepsSt))
+    .otherwise(executeStepsSt);
 
     const processIterationSt = new sfn.Map(this, "Process Iterations", {
       inputPath: '$',
@@ -552,6 +794,8 @@ export class FrameworkStack extends cdk.Stack {
       parameters: {
         "test_id.$": "$$.Map.Item.Value.test_id",
         "steps.$": "$$.Map.Item.Value.steps",
+        "dependencies.$": "$$.Map.Item.Value.dependencies",
+        "dependents.$": "$$.Map.Item.Value.dependents",
         "Payload": {
           "step_id": -1
         },
@@ -570,7 +814,7 @@ export class FrameworkStack extends cdk.Stack {
     // The state machine
     this.stateMachine = new sfn.StateMachine(this, 'FrameworkStateMachine', {
       definition: frameworkFlow,
-      timeout: cdk.Duration.minutes(10),
+      timeout: executionTimeout,
       stateMachineName: "FrameworkStateMachine"
     });
 
@@ -604,6 +848,16 @@ export class FrameworkStack extends cdk.Stack {
         "*"
       ]
     });
+    const payloadS3 = new iam.PolicyStatement({
+      effect:iam.Effect.ALLOW,
+      actions:[
+        "s3:GetObject",
+        "s3:PutObject"
+      ],
+      resources: [
+        payloadBucket.arnForObjects("*")
+      ]
+    });
     const fullDDB = new iam.PolicyStatement({
       effect:iam.Effect.ALLOW,
       actions:[
@@ -651,6 +905,11 @@ export class FrameworkStack extends cdk.Stack {
     deleteTableFunc.addToRolePolicy(fullDDB);
     entryExistFunc.addToRolePolicy(fullDDB);
     tableExistFunc.addToRolePolicy(fullDDB);
+    loadEntriesFunc.addToRolePolicy(fullDDB);
+    loadEntriesFunc.addToRolePolicy(readS3);
+    batchGetEntriesFunc.addToRolePolicy(fullDDB);
+    queryEntriesFunc.addToRolePolicy(fullDDB);
+    scanEntriesFunc.addToRolePolicy(fullDDB);
 
     // S3 Test and Validation Lambdas
     createBucketFunc.addToRolePolicy(fullS3);
@@ -675,15 +934,32 @@ export class FrameworkStack extends cdk.Stack {
     createQueueFunc.addToRolePolicy(fullSQS);
     deleteQueueFunc.addToRolePolicy(fullSQS);
     
+    for (const func of operationFuncs) {
+      func.addToRolePolicy(payloadS3);
+    }
+
     // Main Flow Lambdas
     this.parserFunc.addToRolePolicy(readS3);
     this.parserFunc.addToRolePolicy(fullDDB);
-    this.stepLoaderFunc.addToRolePolicy(fullDDB);
+    this.parserFunc.addToRolePolicy(payloadS3);
+    this.stepExecutorFunc.addToRolePolicy(fullDDB);
+    this.stepExecutorFunc.addToRolePolicy(fullS3);
+    this.stepExecutorFunc.addToRolePolicy(fullSNS);
+    this.stepExecutorFunc.addToRolePolicy(fullSQS);
     this.iterationLoaderFunc.addToRolePolicy(fullDDB);
+    this.iterationLoaderFunc.addToRolePolicy(payloadS3);
     this.stepLoggerFunc.addToRolePolicy(fullDDB);
+    this.stepLoggerFunc.addToRolePolicy(payloadS3);
     this.testFinisherFunc.addToRolePolicy(fullDDB);
+    this.testFinisherFunc.addToRolePolicy(fullSFNState);
     this.iterationsFinisherFunc.addToRolePolicy(fullDDB);
-    waiterFunc.addToRolePolicy(fullSFNState);
+    waiterFunc.addToRolePolicy(fullDDB);
+    timerQueue.grantSendMessages(waiterFunc);
+    timerSchedulerFunc.addToRolePolicy(fullDDB);
+    timerSchedulerFunc.addToRolePolicy(fullSFNState);
+    timerQueue.grantSendMessages(timerSchedulerFunc);
+    dependencyWaiterFunc.addToRolePolicy(fullDDB);
+    dependencyWaiterFunc.addToRolePolicy(fullSFNState);
 
     /** ------------------ Main SFN Execution Role Definition ------------------ */
     this.stateMachine.addToRolePolicy(invokeLambda);
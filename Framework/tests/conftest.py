@@ -0,0 +1,32 @@
+import os, sys
+import pytest
+
+# The handlers import their shared modules as top level packages (common/, DynamoDB/, ...), as in the lambda runtime
+FRAMEWORK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(FRAMEWORK_DIR, "lambda"))
+sys.path.insert(0, os.path.join(FRAMEWORK_DIR, "tools"))
+
+# moto only, never real credentials
+for name, value in (("AWS_ACCESS_KEY_ID", "testing"), ("AWS_SECRET_ACCESS_KEY", "testing"), ("AWS_DEFAULT_REGION", "us-east-1"), ("AWS_REGION", "us-east-1")):
+  os.environ[name] = value
+
+@pytest.fixture
+def aws():
+  # In process stand-in of AWS, the pooled clients are dropped so none outlives the mock
+  from moto import mock_aws
+  from common import clients
+  with mock_aws():
+    clients.reset()
+    yield
+  clients.reset()
+
+@pytest.fixture
+def log_table(aws):
+  # Same keys as the log table created by Parser
+  from common.clients import resource
+  return resource("dynamodb").create_table(
+    TableName="log",
+    KeySchema=[{"AttributeName": "TestGroupID", "KeyType": "HASH"}, {"AttributeName": "TestScenarioID", "KeyType": "RANGE"}],
+    AttributeDefinitions=[{"AttributeName": "TestGroupID", "AttributeType": "S"}, {"AttributeName": "TestScenarioID", "AttributeType": "S"}],
+    BillingMode="PAY_PER_REQUEST"
+  )
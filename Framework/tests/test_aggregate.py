@@ -0,0 +1,46 @@
+from decimal import Decimal
+from common.aggregate import Aggregator
+
+ITEMS = [{"id": str(index), "v": Decimal(index)} for index in range(10)]
+
+def test_count_only():
+  aggregator = Aggregator()
+  assert aggregator.count_only()
+  aggregator.add([], count=7)
+  aggregator.add([], count=3)
+  assert aggregator.result() == {"count": 10}
+
+def test_hash_does_not_depend_on_the_order():
+  forward, backward = Aggregator({"hash": True}), Aggregator({"hash": True})
+  forward.add(ITEMS[:5])
+  forward.add(ITEMS[5:])
+  backward.add(list(reversed(ITEMS)))
+  assert forward.result()["hash"] == backward.result()["hash"]
+  changed = Aggregator({"hash": True})
+  changed.add(ITEMS[:9] + [{"id": "9", "v": Decimal(10)}])
+  assert changed.result()["hash"] != forward.result()["hash"]
+
+def test_predicate_counts_and_samples_the_failures():
+  aggregator = Aggregator({"predicate": {"attribute": "v", "op": "ge", "value": 3}})
+  aggregator.add(ITEMS)
+  result = aggregator.result()
+  assert (result["matched"], result["not_matched"]) == (7, 3)
+  assert [item["id"] for item in result["not_matched_sample"]] == ["0", "1", "2"]
+
+def test_predicate_with_another_type_does_not_match():
+  aggregator = Aggregator({"predicate": {"attribute": "v", "op": "lt", "value": "a string"}})
+  aggregator.add(ITEMS)
+  assert aggregator.result()["matched"] == 0
+
+def test_expect():
+  aggregator = Aggregator({"predicate": {"attribute": "id", "op": "exists"}, "expect": {"count": 10, "all_match": True}})
+  aggregator.add(ITEMS)
+  assert aggregator.result()["passed"]
+  aggregator = Aggregator({"expect": {"count": 11}})
+  aggregator.add(ITEMS)
+  assert not aggregator.result()["passed"]
+
+def test_sample():
+  aggregator = Aggregator({"sample": 2})
+  aggregator.add(ITEMS)
+  assert aggregator.result()["sample"] == ITEMS[:2]
@@ -0,0 +1,40 @@
+from common import batching
+
+def test_chunk_by_count():
+  batches = batching.chunk([{"Id": str(index)} for index in range(23)])
+  assert [len(batch) for batch in batches] == [10, 10, 3]
+
+def test_chunk_by_size():
+  batches = batching.chunk([{"Id": str(index)} for index in range(5)], sizeOf=lambda entry: 100, maxBytes=250)
+  assert [len(batch) for batch in batches] == [2, 2, 1]
+
+def test_chunk_keeps_an_entry_larger_than_the_limit():
+  assert batching.chunk([{"Id": "0"}], sizeOf=lambda entry: 1000, maxBytes=10) == [[{"Id": "0"}]]
+
+def test_run_batches_retries_only_the_failed_entries_not_at_fault():
+  calls = []
+  def call(entries):
+    calls.append([entry["Id"] for entry in entries])
+    if len(calls) == 1:
+      return {"Failed": [{"Id": "1", "Code": "InternalError"}, {"Id": "2", "Code": "InvalidParameterValue", "SenderFault": True}]}
+    return {"Failed": []}
+  output = batching.run_batches(call, [[{"Id": "0"}, {"Id": "1"}, {"Id": "2"}]], workers=1)
+  assert calls == [["0", "1", "2"], ["1"]]
+  assert output["succeeded"] == 2
+  assert output["retries"] == 1
+  assert [entry["Id"] for entry in output["failed"]] == ["2"]
+
+def test_run_batches_gives_up_after_max_retries():
+  def call(entries):
+    return {"Failed": [{"Id": entry["Id"], "Code": "InternalError"} for entry in entries]}
+  output = batching.run_batches(call, [[{"Id": "0"}]], workers=1, maxRetries=2)
+  assert output["calls"] == 3
+  assert output["succeeded"] == 0
+  assert [entry["Id"] for entry in output["failed"]] == ["0"]
+
+def test_pacer_spaces_the_calls():
+  pacer = batching.Pacer(rate=100)
+  pacer.wait(1)
+  first = pacer.nextStart
+  pacer.wait(10)
+  assert round(pacer.nextStart - first, 6) == 0.1
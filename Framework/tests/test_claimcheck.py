@@ -0,0 +1,36 @@
+from common import claimcheck
+from common.claimcheck import PayloadCache, is_reference, offload, resolve
+from common.clients import client
+
+def test_cache_evicts_the_least_recently_used():
+  cache = PayloadCache(maxBytes=10)
+  cache.put("a", 1, 4, "s3")
+  cache.put("b", 2, 4, "s3")
+  assert cache.get("a") == (1, 4)
+  cache.put("c", 3, 4, "s3")
+  assert "a" in cache and "c" in cache and "b" not in cache
+  assert cache.size == 8
+
+def test_cache_skips_payloads_larger_than_the_bound():
+  cache = PayloadCache(maxBytes=10)
+  cache.put("a", 1, 11, "s3")
+  assert "a" not in cache and cache.size == 0
+
+def test_small_values_and_no_bucket_are_kept_inline():
+  value = {"steps": [1, 2, 3]}
+  assert offload(value, "group/steps", bucket="payloads") is value
+  assert offload({"big": "x" * 100}, "group/steps", threshold=10, bucket=None) == {"big": "x" * 100}
+  assert resolve(value) is value
+
+def test_offload_and_resolve(aws):
+  client("s3").create_bucket(Bucket="payloads")
+  value = {"steps": ["x" * 100] * 10}
+  reference = offload(value, "group/steps", threshold=100, bucket="payloads")
+  assert is_reference(reference)
+  assert reference["claim_check"].startswith("s3://payloads/group/steps/")
+  # The same payload is stored under the same key
+  assert offload(dict(value), "group/steps", threshold=100, bucket="payloads") == reference
+  assert offload(reference, "group/steps", threshold=100, bucket="payloads") is reference
+  claimcheck.cache.clear()
+  assert resolve(reference) == value
+  assert claimcheck.cache.get(reference["claim_check"])[0] == value
@@ -0,0 +1,14 @@
+import os
+import pytest
+import import_budget
+
+# A slower machine than a lambda container (eg. a shared CI runner) can scale the budgets
+SCALE = float(os.environ.get("IMPORT_BUDGET_SCALE", 1.0))
+RUNS = 3
+
+@pytest.mark.parametrize("name,module", sorted(import_budget.handler_modules().items()))
+def test_handler_import_is_within_budget(name, module):
+  importMs, botoLoaded = import_budget.measure(module, RUNS)
+  assert not botoLoaded, f"importing {module} loads boto3"
+  budget = import_budget.BUDGETS.get(name, import_budget.DEFAULT_BUDGET_MS) * SCALE
+  assert importMs <= budget, f"importing {module} takes {importMs:.1f} ms, budget {budget} ms"
@@ -0,0 +1,57 @@
+import IterationLoader
+from common import claimcheck
+from common.claimcheck import claim_checked, is_reference, payload_size, resolve
+from common.clients import client
+
+def group(tests: int, stepBytes: int) -> list[dict]:
+  return [{
+    "test_id": f"test{index}.json",
+    "steps": [{"operation": "CreateFile", "input": {"body": "x" * stepBytes}}],
+    "dependencies": 0,
+    "dependents": []
+  } for index in range(tests)]
+
+def load(iterations) -> dict:
+  return IterationLoader.handler({"test_group_id": "g", "log_table_name": "log", "iterations": iterations}, None)
+
+def test_large_steps_are_offloaded_per_test(log_table, monkeypatch):
+  client("s3").create_bucket(Bucket="payloads")
+  monkeypatch.setattr(claimcheck, "PAYLOAD_BUCKET", "payloads")
+  tests = group(100, 20000)
+  output = load([tests])
+  assert payload_size(output) <= IterationLoader.ITERATION_MAX_BYTES
+  assert [test["test_id"] for test in output["tests"]] == [test["test_id"] for test in tests]
+  # Only the steps needed to fit are offloaded
+  offloaded = [index for index, test in enumerate(output["tests"]) if is_reference(test["steps"])]
+  assert 0 < len(offloaded) < 100
+  assert [resolve(output["tests"][index]["steps"]) for index in offloaded] == [tests[index]["steps"] for index in offloaded]
+  assert output["iterations"] == []
+
+def test_small_iterations_are_unchanged(log_table, monkeypatch):
+  monkeypatch.setattr(claimcheck, "PAYLOAD_BUCKET", "payloads")
+  tests = group(3, 10)
+  assert load([tests])["tests"] == tests
+
+def test_tests_that_do_not_fit_run_in_the_next_iteration(log_table, monkeypatch):
+  monkeypatch.setattr(IterationLoader, "ITERATION_MAX_BYTES", 2000)
+  tests = group(30, 10)
+  output = load([tests])
+  assert 0 < len(output["tests"]) < 30
+  assert payload_size(output["tests"]) <= 2000
+  assert output["tests"] + output["iterations"][0] == tests
+
+def test_claim_checked_offloads_the_response_and_resolves_the_previous_output(aws, monkeypatch):
+  client("s3").create_bucket(Bucket="payloads")
+  monkeypatch.setattr(claimcheck, "PAYLOAD_BUCKET", "payloads")
+  large = {"messages": ["x" * 100] * 1000}
+  reference = claimcheck.offload(large, "outputs")
+
+  @claim_checked
+  def handler(event, context):
+    return {"status": "SUCCESS", "response": event["previous_output"]}
+
+  result = handler({"previous_output": reference}, None)
+  assert result["status"] == "SUCCESS"
+  assert is_reference(result["response"])
+  assert resolve(result["response"]) == large
+  assert handler({"previous_output": {"small": 1}}, None)["response"] == {"small": 1}
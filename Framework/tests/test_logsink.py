@@ -0,0 +1,36 @@
+import pytest
+from common.logsink import LogSink
+
+class FailingTable:
+  def batch_write_item(self, **kwargs):
+    raise RuntimeError("flush failed")
+
+def test_the_error_of_the_body_wins_over_the_flush():
+  with pytest.raises(ValueError, match="body failed"):
+    with LogSink("log", FailingTable(), shards=1) as sink:
+      sink.put({"TestGroupID": "g", "TestScenarioID": "s"})
+      raise ValueError("body failed")
+
+def test_flush_error_without_a_body_error():
+  with pytest.raises(RuntimeError, match="flush failed"):
+    with LogSink("log", FailingTable(), shards=1) as sink:
+      sink.put({"TestGroupID": "g", "TestScenarioID": "s"})
+
+class RecordingTable:
+  def __init__(self):
+    self.calls = []
+
+  def batch_write_item(self, RequestItems):
+    self.calls.append(RequestItems)
+    return {}
+
+def test_items_are_batched_and_sharded():
+  table = RecordingTable()
+  with LogSink("log", table, shards=4) as sink:
+    for index in range(30):
+      sink.put({"TestGroupID": "g", "TestScenarioID": f"s{index}"})
+    sink.put({"TestGroupID": "g", "TestScenarioID": "s0", "Status": "latest"})
+  assert [len(call["log"]) for call in table.calls] == [25, 5]
+  items = [request["PutRequest"]["Item"] for call in table.calls for request in call["log"]]
+  assert all(item["TestGroupID"].startswith("g#") for item in items)
+  assert [item for item in items if item["TestScenarioID"] == "s0"][0]["Status"] == "latest"
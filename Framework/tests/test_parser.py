@@ -0,0 +1,12 @@
+from Parser import SLOWEST_FETCHES, fetch_summary
+
+def test_fetch_summary_is_bounded():
+  latencies = {f"test{index}.json": float(index) for index in range(100000)}
+  summary = fetch_summary(latencies)
+  assert summary["count"] == 100000
+  assert (summary["p50"], summary["p99"], summary["max"]) == (50000, 99000, 99999)
+  assert len(summary["slowest"]) == SLOWEST_FETCHES
+  assert "test99999.json" in summary["slowest"]
+
+def test_fetch_summary_without_tests():
+  assert fetch_summary({}) == {"count": 0}
@@ -0,0 +1,70 @@
+import importlib, json
+import pytest
+import StepExecutor
+from common.clients import client
+from common.logkeys import log_key
+
+DeleteMessage = importlib.import_module("SQS.DeleteMessage")
+
+def test_drain_summary_without_handles_fails(aws):
+  client("sqs").create_queue(QueueName="q")
+  result = DeleteMessage.lambda_handler({"queue_name": "q", "previous_output": {"messages": 3, "stopped_by": "empty", "sample": {"1": "a"}}}, None)
+  assert result["status"] == "FAILED"
+  assert "keep_handles" in result["message"]
+
+def test_empty_read_fails(aws):
+  client("sqs").create_queue(QueueName="q")
+  result = DeleteMessage.lambda_handler({"queue_name": "q", "previous_output": {}}, None)
+  assert result["status"] == "FAILED"
+
+STEPS = [
+  {"operation": "ReadMessage", "input": {}},
+  {"operation": "ReadMessage", "input": {}},
+  {"operation": "DeleteMessage", "input": {}, "use_previous_output": True}
+]
+
+def logged(stepID: int, response) -> dict:
+  return {
+    "test_group_id": "g",
+    "Payload": {"test": {}, "test_scenario_id": "T<t>:S<ReadMessage>", "type": "ReadMessage", "step_id": stepID},
+    "testResult": {"Payload": {"status": "SUCCESS", "response": response}}
+  }
+
+def test_previous_output_from_the_log(log_table):
+  from common.logsink import LogSink
+  import StepLogger
+  event = {"test_group_id": "g", "log_table_name": "log", "test_id": "t", "steps": STEPS}
+  with LogSink("log") as sink:
+    for item in StepLogger.log_items(logged(1, {"m": ["body", "handle"]})):
+      sink.put(item)
+  assert StepExecutor.previous_output(event, 2, None) == {"m": ["body", "handle"]}
+
+def test_previous_output_of_another_step_is_rejected(log_table):
+  from common.logsink import LogSink
+  import StepLogger
+  event = {"test_group_id": "g", "log_table_name": "log", "test_id": "t", "steps": STEPS}
+  with LogSink("log") as sink:
+    for item in StepLogger.log_items(logged(0, {"m": ["body", "handle"]})):
+      sink.put(item)
+  with pytest.raises(LookupError):
+    StepExecutor.previous_output(event, 2, None)
+
+def test_missing_previous_output_fails_the_step(log_table):
+  event = {"test_group_id": "g", "log_table_name": "log", "test_id": "t", "steps": STEPS, "step_id": 1}
+  output = StepExecutor.handler(event, None)
+  assert output["type"] == "Continue"
+  assert output["step_id"] == 2
+  assert output["results"] == {"FAILED": 1}
+  item = log_table.get_item(Key=log_key("g", "T<t>:S<DeleteMessage>"))["Item"]
+  assert item["Status"] == "FAILED"
+  assert "LookupError" in item["Output"]["message"]
+
+def test_failed_read_of_the_previous_output_fails_an_isolated_step(log_table, monkeypatch):
+  def throttled(*args):
+    raise RuntimeError("ProvisionedThroughputExceededException")
+  monkeypatch.setattr(StepExecutor, "previous_output", throttled)
+  steps = STEPS[:2] + [dict(STEPS[2], isolated=True)]
+  event = {"test_group_id": "g", "log_table_name": "log", "test_id": "t", "steps": steps, "step_id": 1}
+  output = StepExecutor.handler(event, None)
+  assert output["type"] == "Continue"
+  assert output["results"] == {"FAILED": 1}
@@ -0,0 +1,31 @@
+import importlib
+from common.clients import client
+
+PublishMessage = importlib.import_module("SNS.PublishMessage")
+
+def test_batch_requires_a_topic(aws):
+  result = PublishMessage.handler({"target_arn": "arn:aws:sns:us-east-1:123456789012:endpoint/x", "batch": {"count": 3}}, None)
+  assert result["status"] == "FAILED"
+  assert "batch mode requires topic_arn or topic_name" in result["message"]
+
+def test_batch_with_a_target_uses_the_topic(aws):
+  topicArn = client("sns").create_topic(Name="batched")["TopicArn"]
+  result = PublishMessage.handler({"target_arn": topicArn, "topic_name": "batched", "batch": {"count": 25}}, None)
+  assert result["status"] == "SUCCESS"
+  assert result["response"]["succeeded"] == 25
+
+def test_batch_without_any_destination_fails(aws):
+  result = PublishMessage.handler({"batch": {"count": 3}}, None)
+  assert result["status"] == "FAILED"
+  assert "batch mode requires topic_arn or topic_name" in result["message"]
+
+def test_missing_destination_fails(aws):
+  result = PublishMessage.handler({"message": "x"}, None)
+  assert result["status"] == "FAILED"
+  assert "phone_number" in result["message"]
+
+def test_missing_message_fails(aws):
+  topicArn = client("sns").create_topic(Name="plain")["TopicArn"]
+  result = PublishMessage.handler({"topic_arn": topicArn}, None)
+  assert result["status"] == "FAILED"
+  assert result["message"].startswith("Error: KeyError")
@@ -0,0 +1,57 @@
+import importlib
+import pytest
+from common.clients import resource
+
+QueryEntries = importlib.import_module("DynamoDB.QueryEntries")
+
+@pytest.fixture
+def table(aws):
+  table = resource("dynamodb").create_table(
+    TableName="items",
+    KeySchema=[{"AttributeName": "pk", "KeyType": "HASH"}, {"AttributeName": "sk", "KeyType": "RANGE"}],
+    AttributeDefinitions=[{"AttributeName": "pk", "AttributeType": "S"}, {"AttributeName": "sk", "AttributeType": "N"}],
+    BillingMode="PAY_PER_REQUEST"
+  )
+  with table.batch_writer() as batch:
+    for index in range(10):
+      batch.put_item(Item={"pk": "a", "sk": index})
+  return table
+
+@pytest.mark.parametrize("op, value, count", [("eq", 3, 1), ("lt", 3, 3), ("le", 3, 4), ("gt", 3, 6), ("ge", 3, 7), ("between", [2, 4], 3)])
+def test_sort_key_ops(table, op, value, count):
+  result = QueryEntries.handler({"table_name": "items", "key": {"pk": "a"}, "sort_key": {"name": "sk", "op": op, "value": value}}, None)
+  assert result["status"] == "SUCCESS"
+  assert result["response"]["count"] == count
+
+def test_unknown_op_fails(table):
+  result = QueryEntries.handler({"table_name": "items", "key": {"pk": "a"}, "sort_key": {"name": "sk", "op": "__class__", "value": 1}}, None)
+  assert result["status"] == "FAILED"
+  assert "Unknown sort key op" in result["message"]
+
+def test_unknown_predicate_op_fails(table):
+  result = QueryEntries.handler({"table_name": "items", "key": {"pk": "a"}, "aggregate": {"predicate": {"attribute": "sk", "op": "is"}}}, None)
+  assert result["status"] == "FAILED"
+  assert "Unknown predicate op" in result["message"]
+
+def test_scan_with_an_unknown_predicate_op_fails(table):
+  ScanEntries = importlib.import_module("DynamoDB.ScanEntries")
+  result = ScanEntries.handler({"table_name": "items", "aggregate": {"predicate": {"attribute": "sk", "op": "is"}}}, None)
+  assert result["status"] == "FAILED"
+  assert "Unknown predicate op" in result["message"]
+
+def test_batch_get_with_duplicate_keys(table):
+  BatchGetEntries = importlib.import_module("DynamoDB.BatchGetEntries")
+  keys = [{"pk": "a", "sk": 1}, {"pk": "a", "sk": 2}, {"pk": "a", "sk": 1}, {"pk": "a", "sk": 99}, {"pk": "a", "sk": 99}]
+  result = BatchGetEntries.handler({"table_name": "items", "keys": keys, "aggregate": {"sample": 5}}, None)
+  assert result["status"] == "SUCCESS"
+  response = result["response"]
+  assert response["count"] == 3
+  assert [int(item["sk"]) for item in response["sample"]] == [1, 2, 1]
+  assert response["missing"] == 2
+  assert response["calls"] == 1
+
+def test_batch_get_with_an_unknown_predicate_op_fails(table):
+  BatchGetEntries = importlib.import_module("DynamoDB.BatchGetEntries")
+  result = BatchGetEntries.handler({"table_name": "items", "keys": [{"pk": "a", "sk": 1}], "aggregate": {"predicate": {"attribute": "sk", "op": "is"}}}, None)
+  assert result["status"] == "FAILED"
+  assert "Unknown predicate op" in result["message"]
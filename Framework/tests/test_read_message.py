@@ -0,0 +1,46 @@
+import importlib
+from common.clients import client
+
+ReadMessage = importlib.import_module("SQS.ReadMessage")
+
+class Context:
+  def __init__(self, remainingMs: int):
+    self.remainingMs = remainingMs
+
+  def get_remaining_time_in_millis(self) -> int:
+    return self.remainingMs
+
+def test_drain_without_time_left_fails(aws):
+  client("sqs").create_queue(QueueName="drained")
+  result = ReadMessage.lambda_handler({"queue_name": "drained", "drain": {}}, Context(3000))
+  assert result["status"] == "FAILED"
+  assert "TimeoutError" in result["message"]
+
+def test_drain(aws):
+  sqs = client("sqs")
+  url = sqs.create_queue(QueueName="drained")["QueueUrl"]
+  for index in range(15):
+    sqs.send_message(QueueUrl=url, MessageBody=f"m{index % 5}")
+  result = ReadMessage.lambda_handler({"queue_name": "drained", "WaitTimeSeconds": 0, "drain": {"keep_handles": True}}, Context(60000))
+  assert result["status"] == "SUCCESS"
+  response = result["response"]
+  assert (response["messages"], response["distinct_bodies"], response["stopped_by"]) == (15, 5, "empty")
+  assert len(response["receipt_handles"]) == 15
+
+def test_drain_keeps_the_latest_handle_of_a_redelivered_message(aws):
+  sqs = client("sqs")
+  url = sqs.create_queue(QueueName="redelivered", Attributes={"VisibilityTimeout": "0"})["QueueUrl"]
+  sqs.send_message(QueueUrl=url, MessageBody="m")
+  received = []
+  receive = sqs.receive_message
+  def recording(**kwargs):
+    data = receive(**kwargs)
+    received.extend(message["ReceiptHandle"] for message in data.get("Messages", []))
+    return data
+  sqs.receive_message = recording
+  try:
+    summary = ReadMessage.drain(sqs, url, {"max_messages": 2, "max_seconds": 0.5, "keep_handles": True}, 0, None)
+  finally:
+    del sqs.receive_message
+  assert summary["messages"] == 1 and summary["duplicates"] > 0
+  assert summary["receipt_handles"] == [received[-1]]
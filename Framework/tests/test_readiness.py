@@ -0,0 +1,24 @@
+import pytest
+from common import readiness
+
+class Context:
+  def __init__(self, remainingMs: int):
+    self.remainingMs = remainingMs
+
+  def get_remaining_time_in_millis(self) -> int:
+    return self.remainingMs
+
+def test_timeout_of_the_create_functions_covers_the_default():
+  # The Create* functions have a 130 s timeout (lib/framework-stack.ts)
+  assert readiness.timeout_for({}, Context(130000)) == readiness.DEFAULT_TIMEOUT
+  assert readiness.timeout_for({"ready_timeout": 10}, Context(130000)) == 10
+  assert readiness.timeout_for({}, Context(3000)) == 1
+
+def test_wait_until_ready_polls_until_the_check_passes(monkeypatch):
+  monkeypatch.setattr(readiness, "POLL_START", 0.001)
+  checks = iter([False, False, True])
+  assert readiness.wait_until_ready(lambda: next(checks), 5, "test-kind") >= 0
+
+def test_wait_until_ready_times_out():
+  with pytest.raises(TimeoutError):
+    readiness.wait_until_ready(lambda: False, 0.05)
@@ -0,0 +1,28 @@
+import report
+from common import claimcheck
+from common.claimcheck import offload
+from common.clients import client
+
+def items(groupInput) -> list[dict]:
+  return [
+    {"TestScenarioID": "T<Null>:S<Null>", "Timestamp": "2026-01-01T00:00:00.000Z", "Input": groupInput},
+    {"TestScenarioID": "T<a>:S<CreateEntry>", "Status": "SUCCESS", "StartMs": 1767225600000, "EndMs": 1767225601000, "DurationMs": 1000},
+    {"TestScenarioID": "T<a>:S<Completed>", "Timestamp": "2026-01-01T00:00:01.000Z"},
+    {"TestScenarioID": "T<b>:S<GetEntry>", "Status": "FAILED", "StartMs": 1767225601000, "EndMs": 1767225603000, "DurationMs": 2000,
+     "Output": offload({"message": "Error: KeyError - 'key'", "padding": "x" * 100}, "g/outputs", threshold=10)},
+    {"TestScenarioID": "T<b>:S<Completed>", "Timestamp": "2026-01-01T00:00:03.000Z"}
+  ]
+
+def test_dependencies_of_an_offloaded_input(aws, monkeypatch):
+  client("s3").create_bucket(Bucket="payloads")
+  monkeypatch.setattr(claimcheck, "PAYLOAD_BUCKET", "payloads")
+  groupInput = offload({"test_group": {"a": [], "b": ["a"]}, "padding": "x" * 100}, "g/parser", threshold=10)
+  assert claimcheck.is_reference(groupInput)
+  claimcheck.cache.clear()
+  result = report.build_report(items(groupInput))
+  assert [step["test"] for step in result["critical_path"]] == ["a", "b"]
+  assert result["timeline"]["b"]["steps"][0]["message"] == "Error: KeyError - 'key'"
+
+def test_inline_input(aws):
+  result = report.build_report(items({"test_group": {"a": [], "b": ["a"]}}))
+  assert [step["test"] for step in result["critical_path"]] == ["a", "b"]
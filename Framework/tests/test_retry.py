@@ -0,0 +1,99 @@
+import time
+import pytest
+from botocore.exceptions import ConnectTimeoutError, EndpointConnectionError, ReadTimeoutError
+from common import retry
+
+class Context:
+  def __init__(self, remainingMs: int):
+    self.remainingMs = remainingMs
+
+  def get_remaining_time_in_millis(self) -> int:
+    return self.remainingMs
+
+@pytest.mark.parametrize("code", ["ProvisionedThroughputExceededException", "Throttling", "ThrottlingException", "RequestLimitExceeded", "SlowDown"])
+def test_throttling_codes(code):
+  assert retry.classify(code, 400) == "throttling"
+
+def test_too_many_requests_status_is_throttling():
+  assert retry.classify(None, 429) == "throttling"
+
+@pytest.mark.parametrize("code, status", [("InternalServerError", 500), ("ServiceUnavailable", 503), ("RequestTimeout", 400), (None, 502), (None, 504)])
+def test_transient_errors(code, status):
+  assert retry.classify(code, status) == "transient"
+
+@pytest.mark.parametrize("exception", [
+  EndpointConnectionError(endpoint_url="http://localhost"),
+  ReadTimeoutError(endpoint_url="http://localhost"),
+  ConnectTimeoutError(endpoint_url="http://localhost")
+])
+def test_connection_errors_are_transient(exception):
+  assert retry.classify(exception=exception) == "transient"
+
+@pytest.mark.parametrize("code", ["ResourceNotFoundException", "ConditionalCheckFailedException", "ValidationException", "AccessDeniedException", "NoSuchBucket"])
+def test_terminal_errors(code):
+  assert retry.classify(code, 400) == "terminal"
+
+def test_other_exceptions_are_terminal():
+  assert retry.classify(exception=ValueError("bad input")) == "terminal"
+
+def test_backoff_is_bounded_by_the_exponential_step():
+  for attempt in range(1, 8):
+    for _ in range(50):
+      assert 0 <= retry.backoff(attempt) <= min(retry.MAX_BACKOFF_MS, retry.BASE_MS * 2 ** (attempt - 1)) / 1000
+      assert 0 <= retry.backoff(attempt, throttled=True) <= min(retry.MAX_BACKOFF_MS, retry.THROTTLE_BASE_MS * 2 ** (attempt - 1)) / 1000
+  assert retry.backoff(100) <= retry.MAX_BACKOFF_MS / 1000
+
+def test_budget_of_the_invocation():
+  assert retry.within_budget(3600)
+  with retry.budget(Context(retry.RESERVE_MS + 500)):
+    assert retry.within_budget(0.1)
+    assert not retry.within_budget(1)
+  with retry.budget(Context(0)):
+    assert not retry.within_budget(0)
+  assert retry.within_budget(3600)
+
+def test_no_budget_without_a_context():
+  with retry.budget(None):
+    assert retry.within_budget(3600)
+
+def test_rate_limiter_is_unlimited_until_throttled():
+  limiter = retry.RateLimiter()
+  start = time.monotonic()
+  for _ in range(100):
+    limiter.acquire()
+  assert limiter.rate is None
+  assert time.monotonic() - start < 0.5
+
+def test_rate_limiter_halves_the_measured_rate_on_throttles():
+  limiter = retry.RateLimiter()
+  for _ in range(40):
+    limiter.acquire()
+  limiter.throttled()
+  assert limiter.rate == 20
+  limiter.throttled()
+  assert limiter.rate == 10
+  for _ in range(20):
+    limiter.throttled()
+  assert limiter.rate == retry.MIN_RATE
+
+def test_rate_limiter_recovers_with_successes():
+  limiter = retry.RateLimiter()
+  limiter.throttled()
+  rate = limiter.rate
+  limiter.succeeded()
+  assert limiter.rate is None or limiter.rate > rate
+  for _ in range(100):
+    limiter.succeeded()
+  # Far above the measured send rate the limit is lifted
+  assert limiter.rate is None
+
+def test_retried_adds_the_retry_count():
+  @retry.retried
+  def handler(event, context):
+    retry.pause(1, throttled=False)
+    return {"status": "SUCCESS"}
+  assert handler({}, Context(60000)) == {"status": "SUCCESS", "retries": 1}
+
+def test_pause_stops_at_the_end_of_the_budget():
+  with retry.budget(Context(0)):
+    assert not retry.pause(1)
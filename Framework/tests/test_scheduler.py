@@ -0,0 +1,50 @@
+import pytest
+from common.scheduler import BARRIER, build_schedule
+
+def test_topological_order():
+  schedule = build_schedule({"c": ["b"], "b": ["a"], "a": []})
+  assert list(schedule) == ["a", "b", "c"]
+  assert schedule["a"] == {"dependencies": 0, "dependents": ["b"]}
+  assert schedule["c"] == {"dependencies": 1, "dependents": []}
+
+def test_ready_tests_keep_input_order():
+  schedule = build_schedule({"x": [], "y": [], "z": ["x", "y"]})
+  assert list(schedule) == ["x", "y", "z"]
+  assert schedule["z"]["dependencies"] == 2
+
+def test_duplicate_dependencies_count_once():
+  assert build_schedule({"b": ["a", "a"]})["b"]["dependencies"] == 1
+
+def test_unknown_dependencies_are_tests_without_dependencies():
+  schedule = build_schedule({"b": ["not_listed.json"]})
+  assert schedule["not_listed.json"] == {"dependencies": 0, "dependents": ["b"]}
+  assert schedule["b"]["dependencies"] == 1
+
+def test_star_waits_on_the_barrier():
+  schedule = build_schedule({"a": [], "b": ["a"], "last": ["*"], "other_last": ["*", "a"]})
+  assert list(schedule)[-3:] == [BARRIER, "last", "other_last"]
+  # The barrier waits for every test which does not run at the end
+  assert schedule[BARRIER] == {"dependencies": 2, "dependents": ["last", "other_last"]}
+  assert schedule["last"]["dependencies"] == 1
+  assert schedule["other_last"]["dependencies"] == 1
+  assert BARRIER in schedule["a"]["dependents"] and BARRIER in schedule["b"]["dependents"]
+
+def test_no_barrier_without_star():
+  assert BARRIER not in build_schedule({"a": [], "b": ["a"]})
+
+def test_cycle_is_reported():
+  with pytest.raises(ValueError, match="Circular dependencies") as error:
+    build_schedule({"a": ["b"], "b": ["c"], "c": ["a"], "d": []})
+  assert "['a', 'b', 'c']" in str(error.value)
+
+def test_self_dependency_is_a_cycle():
+  with pytest.raises(ValueError, match="Circular dependencies"):
+    build_schedule({"a": ["a"]})
+
+def test_depending_on_a_test_running_at_the_end_is_rejected():
+  with pytest.raises(ValueError, match="runs at the end"):
+    build_schedule({"last": ["*"], "b": ["last"]})
+
+def test_star_is_not_a_test_name():
+  with pytest.raises(ValueError):
+    build_schedule({"*": []})
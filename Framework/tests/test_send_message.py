@@ -0,0 +1,21 @@
+import importlib
+from types import SimpleNamespace
+from common.clients import client
+
+SendMessage = importlib.import_module("SQS.SendMessage")
+
+def test_identical_messages_to_a_fifo_queue_are_all_sent(aws):
+  sqs = client("sqs")
+  url = sqs.create_queue(QueueName="sent.fifo", Attributes={"FifoQueue": "true", "ContentBasedDeduplication": "false"})["QueueUrl"]
+  result = SendMessage.lambda_handler({"queue_name": "sent.fifo", "message_group_id": "g", "generate": {"count": 25, "template": "same"}}, None)
+  assert result["status"] == "SUCCESS"
+  assert result["response"]["succeeded"] == 25
+  assert sqs.get_queue_attributes(QueueUrl=url, AttributeNames=["ApproximateNumberOfMessages"])["Attributes"]["ApproximateNumberOfMessages"] == "25"
+
+def test_standard_queue_batches_have_no_deduplication_id():
+  sent = []
+  def send_message_batch(QueueUrl, Entries):
+    sent.extend(Entries)
+    return {"Successful": [{"Id": entry["Id"]} for entry in Entries], "Failed": []}
+  SendMessage.send_batches(SimpleNamespace(send_message_batch=send_message_batch), "https://sqs.us-east-1.amazonaws.com/123456789012/sent", {"messages": ["a", "b"]})
+  assert [entry.get("MessageDeduplicationId") for entry in sent] == [None, None]
@@ -0,0 +1,13 @@
+import TestFinisher
+from common.logkeys import log_key
+
+def test_timed_out_test_is_logged_as_failed(log_table):
+  event = {"test_group_id": "g", "log_table_name": "log", "test_id": "t", "dependents": [], "Payload": {"test_scenario_id": "T<t>:S<Completed>", "type": "Completed", "status": "FAILED"}}
+  assert TestFinisher.handler(event, None)["status"] == "SUCCESS"
+  item = log_table.get_item(Key=log_key("g", "T<t>:S<Completed>"))["Item"]
+  assert item["Status"] == "FAILED"
+
+def test_finished_test(log_table):
+  event = {"test_group_id": "g", "log_table_name": "log", "test_id": "t", "Payload": {"test_scenario_id": "T<t>:S<Completed>"}}
+  TestFinisher.handler(event, None)
+  assert log_table.get_item(Key=log_key("g", "T<t>:S<Completed>"))["Item"]["Status"] == "FINISH"
@@ -0,0 +1,24 @@
+import json
+from common.clients import client
+from common import testcache
+
+def test_revalidation_and_changes(aws):
+  s3 = client("s3")
+  s3.create_bucket(Bucket="tests")
+  s3.put_object(Bucket="tests", Key="a.json", Body=json.dumps({"steps": [1]}).encode())
+  cache = testcache.TestCache(maxBytes=1 << 20, ttl=0)
+  assert cache.get_test(s3, "tests", "a.json") == ({"steps": [1]}, "s3")
+  checked = cache.entries[("tests", "a.json")]["checked"]
+  assert cache.get_test(s3, "tests", "a.json") == ({"steps": [1]}, "revalidated")
+  assert cache.entries[("tests", "a.json")]["checked"] > checked
+  s3.put_object(Bucket="tests", Key="a.json", Body=json.dumps({"steps": [2]}).encode())
+  assert cache.get_test(s3, "tests", "a.json") == ({"steps": [2]}, "s3")
+  assert cache.stats == {"memory": 0, "revalidated": 1, "shared": 0, "s3": 2}
+
+def test_memory_hit_within_the_ttl(aws):
+  s3 = client("s3")
+  s3.create_bucket(Bucket="tests")
+  s3.put_object(Bucket="tests", Key="a.json", Body=b'{"steps": []}')
+  cache = testcache.TestCache(maxBytes=1 << 20, ttl=60)
+  cache.get_test(s3, "tests", "a.json")
+  assert cache.get_test(s3, "tests", "a.json")[1] == "memory"
@@ -0,0 +1,113 @@
+import json
+import pytest
+from common import timers
+from common.clients import resource
+
+class FakeStepFunctions:
+  class exceptions:
+    class TaskTimedOut(Exception):
+      pass
+    class InvalidToken(Exception):
+      pass
+
+  def __init__(self, expired: set[str] = set()):
+    self.expired = expired
+    self.released: list[str] = []
+
+  def send_task_success(self, taskToken: str, output: str):
+    if taskToken in self.expired:
+      raise self.exceptions.TaskTimedOut()
+    self.released.append(taskToken)
+
+@pytest.fixture
+def table(aws):
+  ddb = resource("dynamodb")
+  table = ddb.create_table(
+    TableName=timers.TIMER_TABLE_NAME,
+    KeySchema=[{"AttributeName": "Shard", "KeyType": "HASH"}, {"AttributeName": "Due", "KeyType": "RANGE"}],
+    AttributeDefinitions=[{"AttributeName": "Shard", "AttributeType": "S"}, {"AttributeName": "Due", "AttributeType": "S"}],
+    BillingMode="PAY_PER_REQUEST"
+  )
+  return table
+
+def test_pass_releases_only_the_due_timers(table):
+  for index in range(6):
+    timers.add_timer(table, f"token{index}", index, nowMs=1000)
+  assert timers.next_due(table) == 1000
+  sfn = FakeStepFunctions(expired={"token1"})
+  assert timers.run_pass(table, sfn, nowMs=3000) == {"released": 2, "expired": 1}
+  assert sorted(sfn.released) == ["token0", "token2"]
+  assert timers.next_due(table) == 4000
+  assert timers.run_pass(table, sfn, nowMs=3999) == {"released": 0, "expired": 0}
+
+def test_no_timers(table):
+  assert timers.next_due(table) is None
+
+def test_lease(table):
+  assert timers.acquire_lease(table, "a", nowMs=0)
+  assert timers.acquire_lease(table, "a", nowMs=1)
+  assert not timers.acquire_lease(table, "b", nowMs=1)
+  # An expired lease can be taken over (the renewal held it until LEASE_MS + 1)
+  assert not timers.acquire_lease(table, "b", nowMs=timers.LEASE_MS + 1)
+  assert timers.acquire_lease(table, "b", nowMs=timers.LEASE_MS + 2)
+  timers.release_lease(table, "a")
+  assert not timers.acquire_lease(table, "a", nowMs=timers.LEASE_MS + 3)
+  timers.release_lease(table, "b")
+  assert timers.acquire_lease(table, "a", nowMs=timers.LEASE_MS + 3)
+
+def test_wake_delay_is_rounded_up_and_bounded():
+  assert timers.wake_delay(1001, nowMs=0) == 2
+  assert timers.wake_delay(1000, nowMs=0) == 1
+  assert timers.wake_delay(0, nowMs=5000) == 0
+  assert timers.wake_delay(3600 * 1000, nowMs=0) == timers.MAX_DELAY_S
+
+class Context:
+  aws_request_id = "scheduler"
+
+  def get_remaining_time_in_millis(self) -> int:
+    return 60000
+
+@pytest.fixture
+def scheduler(table, monkeypatch):
+  import TimerScheduler
+  sfn = FakeStepFunctions()
+  wakeUps: list[int] = []
+  monkeypatch.setattr(TimerScheduler, "client", lambda service: sfn if service == "stepfunctions" else None)
+  monkeypatch.setattr(TimerScheduler, "wake_at", lambda sqs, dueMs: wakeUps.append(dueMs))
+  return TimerScheduler, sfn, wakeUps
+
+def test_scheduler_releases_due_timers_and_ends(scheduler, table):
+  TimerScheduler, sfn, wakeUps = scheduler
+  dueMs = timers.add_timer(table, "now", 0)
+  timers.add_timer(table, "later", 60)
+  result = TimerScheduler.handler({"Records": [{"body": json.dumps({"due": dueMs})}]}, Context())
+  assert result["response"] == {"passes": 1, "released": 1, "expired": 0}
+  assert sfn.released == ["now"]
+  # The later timer has its own wake-up, none is sent and the lease is free
+  assert wakeUps == []
+  assert timers.acquire_lease(table, "other")
+
+def test_scheduler_sends_back_the_wake_up_of_a_long_wait(scheduler):
+  TimerScheduler, sfn, wakeUps = scheduler
+  dueMs = timers.now_ms() + 3600 * 1000
+  TimerScheduler.handler({"Records": [{"body": json.dumps({"due": dueMs})}]}, Context())
+  assert wakeUps == [dueMs]
+
+def test_scheduler_without_the_lease_sends_the_wake_up_again(scheduler, table):
+  TimerScheduler, sfn, wakeUps = scheduler
+  assert timers.acquire_lease(table, "other")
+  dueMs = timers.add_timer(table, "now", 0)
+  result = TimerScheduler.handler({"Records": [{"body": json.dumps({"due": dueMs})}]}, Context())
+  assert result["response"]["passes"] == 0
+  assert sfn.released == []
+  assert len(wakeUps) == 1 and wakeUps[0] > dueMs
+
+def test_waiter_sends_a_delayed_wake_up(table, monkeypatch):
+  import Waiter
+  from common.clients import client
+  sqs = client("sqs")
+  monkeypatch.setattr(Waiter, "TIMER_QUEUE_URL", sqs.create_queue(QueueName="timers")["QueueUrl"])
+  monkeypatch.setattr(timers, "TIMER_QUEUE_URL", Waiter.TIMER_QUEUE_URL)
+  Waiter.handler({"token": "t", "wait_time": 0}, None)
+  message = sqs.receive_message(QueueUrl=Waiter.TIMER_QUEUE_URL)["Messages"][0]
+  assert json.loads(message["Body"])["due"] == int(timers.next_due(table))
@@ -0,0 +1,337 @@
+from datetime import datetime, timezone
+from typing import Any, Callable
+import argparse, glob, json, os, platform, random, statistics, subprocess, sys, time, tracemalloc
+
+LAMBDA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lambda")
+sys.path.insert(0, os.path.abspath(LAMBDA_DIR))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bench_results")
+
+"""
+  INFO: Benchmarks of the lambda handlers, run against a local AWS stand-in (moto in process with --moto, or a server through AWS_ENDPOINT_URL).
+  - cold import: time to import each handler module in a fresh interpreter (median of --imports runs), the import part of a lambda cold start
+  - warm latency: per call latency of every operation handler and of Parser, TestLoader, StepLogger and StepExecutor, after a first (warm up) call; the fixtures each call needs (eg. the table deleted by DeleteTable) are created before it, outside the timing
+  - allocations: peak and net memory allocated by a warm call (tracemalloc, measured on separate calls so the latencies are not slowed down)
+  - scheduling: build_schedule and init_schedule (Parser scheduling) on synthetic dependency graphs (--graph-sizes, 10 to 100k tests)
+  Results are stored as <results dir>/<commit>.json and compared with the latest other result file (or --compare): a metric more than --tolerance slower is reported as a regression.
+  ? stand-in latencies only compare commits with each other, they are not the latencies of AWS
+
+  Usage:
+    python tools/bench.py --moto [--repeat 20] [--imports 3] [--graph-sizes 10,100,1000,10000,100000] [--only CreateEntry,Parser] [--compare file] [--tolerance 0.2] [--fail-on-regression]
+
+  Output: a json summary with the regressions found
+"""
+
+TABLE = "bench_table"
+LOG_TABLE = "bench_log_table"
+BUCKET = "bench-bucket"
+TOPIC = "bench-topic"
+QUEUE = "bench-queue"
+
+def key_schema(name: str, hashKey: str = "id", sortKey: str | None = None) -> dict[str, Any]:
+  key: dict[str, Any] = {"hash_key": {"name": hashKey, "type": "S"}}
+  if sortKey:
+    key["sort_key"] = {"name": sortKey, "type": "S"}
+  return {"table_name": name, "key": key}
+
+def setup_fixtures():
+  # Shared resources the cases read from, created once
+  from common.clients import client, resource
+  ddb = client("dynamodb")
+  for name, keys in ((TABLE, [("id", "HASH")]), (LOG_TABLE, [("TestGroupID", "HASH"), ("TestScenarioID", "RANGE")]), ("bench_load", [("id", "HASH")])):
+    with_suppressed(lambda: ddb.create_table(
+      TableName=name,
+      KeySchema=[{"AttributeName": attribute, "KeyType": keyType} for attribute, keyType in keys],
+      AttributeDefinitions=[{"AttributeName": attribute, "AttributeType": "S"} for attribute, _ in keys],
+      BillingMode="PAY_PER_REQUEST"
+    ))
+    ddb.get_waiter("table_exists").wait(TableName=name)
+  table = resource("dynamodb").Table(TABLE)
+  with table.batch_writer() as batch:
+    batch.put_item(Item={"id": "fixed", "v": 1})
+    for index in range(100):
+      batch.put_item(Item={"id": f"k{index}", "v": index})
+
+  s3 = client("s3")
+  with_suppressed(lambda: s3.create_bucket(Bucket=BUCKET))
+  s3.put_object(Bucket=BUCKET, Key="fixed.json", Body=json.dumps({"fixed": True}).encode())
+  s3.put_object(Bucket=BUCKET, Key="fixtures.ndjson", Body="".join(json.dumps({"id": f"l{index}", "v": index}) + "\n" for index in range(100)).encode())
+  for index in range(10):
+    s3.put_object(Bucket=BUCKET, Key=f"test{index}.json", Body=json.dumps({"steps": [{"operation": "DoesTableExist", "input": {"table_name": TABLE}}] * 5}).encode())
+
+  client("sns").create_topic(Name=TOPIC)
+  sqs = client("sqs")
+  queueUrl = sqs.create_queue(QueueName=QUEUE)["QueueUrl"]
+  for index in range(0, 100, 10):
+    sqs.send_message_batch(QueueUrl=queueUrl, Entries=[{"Id": str(entry), "MessageBody": f"fixture {index + entry}"} for entry in range(10)])
+
+def with_suppressed(call: Callable[[], Any]):
+  # Fixtures left by a previous run against the same stand-in server
+  try:
+    call()
+  except Exception as e:
+    if "exist" not in str(e).lower() and "owned" not in str(e).lower() and "in use" not in str(e).lower():
+      raise
+
+def _create_table(name: str):
+  from common.clients import client
+  client("dynamodb").create_table(TableName=name, KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}], AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}], BillingMode="PAY_PER_REQUEST")
+
+def _received_handle() -> str:
+  from common.clients import client
+  sqs = client("sqs")
+  queueUrl = sqs.get_queue_url(QueueName=QUEUE)["QueueUrl"]
+  sqs.send_message(QueueUrl=queueUrl, MessageBody="to delete")
+  return sqs.receive_message(QueueUrl=queueUrl, MaxNumberOfMessages=1)["Messages"][0]["ReceiptHandle"]
+
+def _put(call: Callable[[], Any], event: dict[str, Any]) -> dict[str, Any]:
+  call()
+  return event
+
+def cases(run: str) -> dict[str, Callable[[int], dict[str, Any]]]:
+  # Event of the i-th call of each handler, "run" keeps the names unique between runs on the same stand-in
+  from common.clients import client, resource
+  steps = [{"operation": "DoesTableExist", "input": {"table_name": TABLE}}] * 10
+  return {
+    # DDB Test Scenarios
+    "CreateTable": lambda i: key_schema(f"bench_create_{run}_{i}"),
+    "CreateEntry": lambda i: {"table_name": TABLE, "item": {"id": f"e{i}", "v": i}},
+    # GetEntry reads "Key"
+    "GetEntry": lambda i: {"table_name": TABLE, "Key": {"id": "fixed"}},
+    "UpdateEntry": lambda i: {"table_name": TABLE, "key": {"id": "fixed"}, "update_expression": "SET v = :v", "expression_attribute_values": {":v": i}},
+    "DeleteEntry": lambda i: _put(lambda: resource("dynamodb").Table(TABLE).put_item(Item={"id": f"d{i}"}), {"table_name": TABLE, "key": {"id": f"d{i}"}}),
+    "DeleteTable": lambda i: _put(lambda: _create_table(f"bench_delete_{run}_{i}"), {"table_name": f"bench_delete_{run}_{i}"}),
+    "DoesEntryExist": lambda i: {"table_name": TABLE, "item": {"id": "fixed"}},
+    "DoesTableExist": lambda i: {"table_name": TABLE},
+    "LoadEntries": lambda i: {"table_name": "bench_load", "bucket_name": BUCKET, "file_name": "fixtures.ndjson", "segments": 4},
+    "BatchGetEntries": lambda i: {"table_name": TABLE, "keys": [{"id": f"k{index}"} for index in range(100)], "aggregate": {"hash": True}},
+    "QueryEntries": lambda i: {"table_name": TABLE, "key": {"id": "k1"}},
+    "ScanEntries": lambda i: {"table_name": TABLE, "segments": 4},
+    # S3 Test Scenarios
+    "CreateBucket": lambda i: {"bucket_name": f"bench-create-{run}-{i}"},
+    "CreateFile": lambda i: {"bucket_name": BUCKET, "file_name": f"file{i}.json", "file_contents": {"index": i}},
+    "DeleteFile": lambda i: _put(lambda: client("s3").put_object(Bucket=BUCKET, Key=f"delete{i}.json", Body=b"{}"), {"bucket_name": BUCKET, "file_name": f"delete{i}.json"}),
+    "DeleteBucket": lambda i: _put(lambda: client("s3").create_bucket(Bucket=f"bench-delete-{run}-{i}"), {"bucket_name": f"bench-delete-{run}-{i}"}),
+    "DoesBucketExist": lambda i: {"bucket_name": BUCKET},
+    "DoesFileExist": lambda i: {"bucket_name": BUCKET, "file_name": "fixed.json", "contents": "fixed"},
+    "ReadFile": lambda i: {"bucket_name": BUCKET, "file_name": "fixed.json"},
+    # SNS Test Scenarios
+    "CreateTopic": lambda i: {"topic_name": f"bench-create-{run}-{i}"},
+    "DeleteTopic": lambda i: _put(lambda: client("sns").create_topic(Name=f"bench-delete-{run}-{i}"), {"topic_name": f"bench-delete-{run}-{i}"}),
+    "DoesTopicExist": lambda i: {"topic_name": TOPIC},
+    "PublishMessage": lambda i: {"topic_name": TOPIC, "message": f"message {i}"},
+    # SQS Test Scenarios
+    "SendMessage": lambda i: {"queue_name": QUEUE, "message": f"message {i}"},
+    "ReadMessage": lambda i: {"queue_name": QUEUE},
+    "DeleteMessage": lambda i: {"queue_name": QUEUE, "receipt_handle": _received_handle()},
+    "DoesQueueExist": lambda i: {"queue_name": QUEUE},
+    "CreateQueue": lambda i: {"queue_name": f"bench-create-{run}-{i}"},
+    "DeleteQueue": lambda i: _put(lambda: client("sqs").create_queue(QueueName=f"bench-delete-{run}-{i}"), {"queue_name": f"bench-delete-{run}-{i}"}),
+    # Orchestration
+    "Parser": lambda i: {"test_group_id": f"bench-{run}-{i}", "log_table_name": LOG_TABLE, "bucket_name": BUCKET, "test_group": {f"test{index}.json": [f"test{index - 1}.json"] if index % 2 else [] for index in range(10)}},
+    "TestLoader": lambda i: {"test_id": "bench.json", "test_group_id": f"bench-{run}", "steps": steps, "step_id": i % len(steps) - 1},
+    "StepLogger": lambda i: {
+      "log_table_name": LOG_TABLE,
+      "test_group_id": f"bench-{run}",
+      "Payload": {"test": {"table_name": TABLE}, "test_scenario_id": f"T<bench.json>:S<Step{i}>", "type": "DoesTableExist", "log": {"TestGroupID": f"bench-{run}", "TestScenarioID": f"T<bench.json>:S<{i}>", "Status": "START", "LoadedMs": 0}},
+      "testResult": {"Payload": {"status": "SUCCESS", "response": True}}
+    },
+    "StepExecutor": lambda i: {"test_id": f"bench{i}.json", "test_group_id": f"bench-{run}", "log_table_name": LOG_TABLE, "steps": steps, "step_id": -1}
+  }
+
+def handler_of(name: str) -> Callable[[dict[str, Any], Any], Any]:
+  from common.operations import get_handler
+  handler = get_handler(name)
+  if handler is None:
+    handler = __import__(name).handler
+  return handler
+
+def measure(name: str, case: Callable[[int], dict[str, Any]], repeat: int, allocations: int) -> dict[str, Any]:
+  from local_runner import LocalContext
+  handler = handler_of(name)
+  latencies: list[float] = []
+  statuses: dict[str, int] = {}
+  calls = 0
+  def call(timed: bool) -> Any:
+    nonlocal calls
+    event = case(calls)
+    calls += 1
+    start = time.perf_counter()
+    result = handler(event, LocalContext(name, 900))
+    if timed:
+      latencies.append((time.perf_counter() - start) * 1000)
+      status = result.get("status", "-") if isinstance(result, dict) else "-"
+      statuses[status] = statuses.get(status, 0) + 1
+    return result
+
+  # Warm up: imports, clients and caches
+  call(False)
+  for _ in range(repeat):
+    call(True)
+  peaks: list[int] = []
+  nets: list[int] = []
+  for _ in range(allocations):
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    call(False)
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    peaks.append(peak - before)
+    nets.append(after - before)
+  ordered = sorted(latencies)
+  return {
+    "calls": len(latencies),
+    "statuses": statuses,
+    "p50_ms": round(statistics.median(ordered), 3),
+    "p90_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))], 3),
+    "mean_ms": round(statistics.fmean(ordered), 3),
+    "min_ms": round(ordered[0], 3),
+    "alloc_peak_kb": round(statistics.median(peaks) / 1024, 1) if peaks else None,
+    "alloc_net_kb": round(statistics.median(nets) / 1024, 1) if nets else None
+  }
+
+def cold_import(module: str, runs: int) -> dict[str, Any]:
+  # A fresh interpreter for each run, as in a new lambda container
+  code = f"import sys, time; sys.path.insert(0, {os.path.abspath(LAMBDA_DIR)!r}); start = time.perf_counter(); import {module}; print((time.perf_counter() - start) * 1000)"
+  times = [float(subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout) for _ in range(runs)]
+  return {"median_ms": round(statistics.median(times), 3), "min_ms": round(min(times), 3)}
+
+def synthetic_group(size: int, seed: int = 0) -> dict[str, list[str]]:
+  # Each test depends on up to 3 of the 100 tests before it, 1 in 100 tests runs at the end ("*")
+  rng = random.Random(seed)
+  group: dict[str, list[str]] = {}
+  for index in range(size):
+    if index and rng.random() < 0.01:
+      group[f"t{index}.json"] = ["*"]
+      continue
+    earlier = [f"t{other}.json" for other in range(max(0, index - 100), index) if group.get(f"t{other}.json") != ["*"]]
+    group[f"t{index}.json"] = rng.sample(earlier, min(len(earlier), rng.randint(0, 3)))
+  return group
+
+def measure_schedule(size: int) -> dict[str, Any]:
+  from common.logsink import LogSink
+  from common.scheduler import build_schedule, init_schedule
+  group = synthetic_group(size)
+  start = time.perf_counter()
+  schedule = build_schedule(group)
+  built = time.perf_counter()
+  # Records are only buffered, no table is written
+  sink = LogSink(LOG_TABLE, ddb=object())
+  init_schedule(sink, "bench", schedule)
+  initialized = time.perf_counter()
+  return {
+    "tests": size,
+    "dependencies": sum(len(depends) for depends in group.values()),
+    "build_ms": round((built - start) * 1000, 3),
+    "init_ms": round((initialized - built) * 1000, 3),
+    "records": len(sink.buffer)
+  }
+
+def commit_id() -> str:
+  try:
+    commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], check=True, capture_output=True, text=True, cwd=LAMBDA_DIR).stdout.strip()
+    dirty = subprocess.run(["git", "status", "--porcelain", "--", "."], check=True, capture_output=True, text=True, cwd=os.path.join(LAMBDA_DIR, "..")).stdout.strip()
+    return commit + ("-dirty" if dirty else "")
+  except (OSError, subprocess.CalledProcessError):
+    return "unknown"
+
+def metrics(results: dict[str, Any]) -> dict[str, float]:
+  # The numbers compared between runs, lower is better
+  values: dict[str, float] = {}
+  for name, result in results.get("warm", {}).items():
+    values[f"warm.{name}.p50_ms"] = result["p50_ms"]
+    if result.get("alloc_peak_kb") is not None:
+      values[f"alloc.{name}.peak_kb"] = result["alloc_peak_kb"]
+  for name, result in results.get("cold_import", {}).items():
+    values[f"cold_import.{name}.median_ms"] = result["median_ms"]
+  for result in results.get("scheduling", []):
+    values[f'scheduling.{result["tests"]}.ms'] = result["build_ms"] + result["init_ms"]
+  return values
+
+def compare(current: dict[str, Any], previous: dict[str, Any], tolerance: float) -> list[dict[str, Any]]:
+  old = metrics(previous)
+  regressions = []
+  for name, value in metrics(current).items():
+    # Tiny values are noise
+    if name in old and old[name] > 0.05 and value > old[name] * (1 + tolerance):
+      regressions.append({"metric": name, "previous": old[name], "current": value, "change": f"+{(value / old[name] - 1) * 100:.0f}%"})
+  return regressions
+
+def main(argv: list[str] | None = None) -> dict[str, Any]:
+  parser = argparse.ArgumentParser(description="Benchmarks of the lambda handlers")
+  parser.add_argument("--moto", action="store_true", help="run against moto in process")
+  parser.add_argument("--repeat", type=int, default=20, help="timed warm calls per handler")
+  parser.add_argument("--allocations", type=int, default=3, help="calls per handler measured with tracemalloc")
+  parser.add_argument("--imports", type=int, default=3, help="fresh interpreters per cold import measure, 0 to skip")
+  parser.add_argument("--graph-sizes", default="10,100,1000,10000,100000", help="test counts of the scheduling graphs, empty to skip")
+  parser.add_argument("--only", help="comma separated handlers to run (operation or orchestration names)")
+  parser.add_argument("--results-dir", default=RESULTS_DIR)
+  parser.add_argument("--compare", help="result file to compare with, default the latest other one in the results dir")
+  parser.add_argument("--tolerance", type=float, default=0.2, help="slowdown reported as a regression, default 0.2 (20%%)")
+  parser.add_argument("--fail-on-regression", action="store_true", help="exit with status 1 when a regression is found")
+  args = parser.parse_args(argv)
+
+  from common.operations import handler_modules
+  only = set(args.only.split(",")) if args.only else None
+  mock = None
+  if args.moto:
+    from moto import mock_aws
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    os.environ.setdefault("AWS_REGION", os.environ["AWS_DEFAULT_REGION"])
+    mock = mock_aws()
+    mock.start()
+  results: dict[str, Any] = {
+    "commit": commit_id(),
+    "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    "python": platform.python_version(),
+    "stand_in": "moto" if args.moto else os.environ.get("AWS_ENDPOINT_URL", "aws"),
+    "repeat": args.repeat
+  }
+  try:
+    from common import clients
+    clients.reset()
+    # Wait steps are not benchmarked, the Waiter would start the TimerScheduler
+    os.environ.pop("TIMER_QUEUE_URL", None)
+    setup_fixtures()
+    run = str(int(time.time()))
+    results["warm"] = {}
+    for name, case in cases(run).items():
+      if only is None or name in only:
+        results["warm"][name] = measure(name, case, args.repeat, args.allocations)
+  finally:
+    if mock is not None:
+      mock.stop()
+
+  if args.imports:
+    results["cold_import"] = {name: cold_import(module, args.imports) for name, module in handler_modules().items() if only is None or name in only}
+  if args.graph_sizes:
+    results["scheduling"] = [measure_schedule(int(size)) for size in args.graph_sizes.split(",")]
+
+  # Store, then compare with the previous results
+  os.makedirs(args.results_dir, exist_ok=True)
+  path = os.path.join(args.results_dir, f'{results["commit"]}.json')
+  previousPath = args.compare
+  if previousPath is None:
+    others = [other for other in glob.glob(os.path.join(args.results_dir, "*.json")) if os.path.abspath(other) != os.path.abspath(path)]
+    previousPath = max(others, key=os.path.getmtime, default=None)
+  with open(path, "w") as f:
+    json.dump(results, f, indent=2)
+  regressions: list[dict[str, Any]] = []
+  if previousPath is not None:
+    with open(previousPath) as f:
+      regressions = compare(results, json.load(f), args.tolerance)
+
+  summary = {
+    "results": path,
+    "compared_with": previousPath,
+    "regressions": regressions,
+    "warm_p50_ms": {name: result["p50_ms"] for name, result in results["warm"].items()},
+    "cold_import_ms": {name: result["median_ms"] for name, result in results.get("cold_import", {}).items()},
+    "scheduling_ms": {result["tests"]: round(result["build_ms"] + result["init_ms"], 3) for result in results.get("scheduling", [])}
+  }
+  print(json.dumps(summary, indent=2))
+  if regressions and args.fail_on_regression:
+    sys.exit(1)
+  return summary
+
+if __name__ == "__main__":
+  main()
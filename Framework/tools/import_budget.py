@@ -0,0 +1,69 @@
+from typing import Any
+import argparse, json, os, statistics, subprocess, sys
+
+LAMBDA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lambda")
+sys.path.insert(0, os.path.abspath(LAMBDA_DIR))
+from common.operations import handler_modules
+
+"""
+  INFO: Import time budget of the lambda handlers, the part of a cold start spent loading the handler module. Each handler module is imported in fresh interpreters (median of --runs) and checked:
+  - the import takes at most its budget (BUDGETS, DEFAULT_BUDGET_MS otherwise)
+  - boto3/botocore are not loaded by the import, they are loaded with the first client (check common/clients.py)
+  Run it before deploying, or in CI, a failing handler makes the command exit with status 1.
+
+  Usage:
+    python tools/import_budget.py [--runs 5] [--budget-scale 1.0] [--only Parser,CreateEntry]
+    ? --budget-scale adapts the budgets to a slower or faster machine than a lambda container
+
+  Output: a json line per handler {"handler", "module", "import_ms", "budget_ms", "boto3_loaded", "passed"}, then a summary
+"""
+
+DEFAULT_BUDGET_MS = 50
+# Handlers with heavier standard library imports
+BUDGETS: dict[str, float] = {
+  "Parser": 80,
+  "StepExecutor": 80,
+  "LoadEntries": 80,
+  "CreateFile": 80
+}
+def measure(module: str, runs: int) -> tuple[float, bool]:
+  # A fresh interpreter for each run, as in a new lambda container
+  code = (
+    f"import sys, time, json; sys.path.insert(0, {os.path.abspath(LAMBDA_DIR)!r}); start = time.perf_counter(); import {module}; "
+    "print(json.dumps([(time.perf_counter() - start) * 1000, 'boto3' in sys.modules or 'botocore' in sys.modules]))"
+  )
+  results = [json.loads(subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout) for _ in range(runs)]
+  return statistics.median(result[0] for result in results), any(result[1] for result in results)
+
+def main(argv: list[str] | None = None) -> list[dict[str, Any]]:
+  parser = argparse.ArgumentParser(description="Import time budget of the lambda handlers")
+  parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per handler")
+  parser.add_argument("--budget-scale", type=float, default=1.0, help="multiplier of all the budgets")
+  parser.add_argument("--only", help="comma separated handlers to check")
+  args = parser.parse_args(argv)
+
+  only = set(args.only.split(",")) if args.only else None
+  results: list[dict[str, Any]] = []
+  for name, module in handler_modules().items():
+    if only is not None and name not in only:
+      continue
+    importMs, botoLoaded = measure(module, args.runs)
+    budget = BUDGETS.get(name, DEFAULT_BUDGET_MS) * args.budget_scale
+    result = {
+      "handler": name,
+      "module": module,
+      "import_ms": round(importMs, 3),
+      "budget_ms": budget,
+      "boto3_loaded": botoLoaded,
+      "passed": importMs <= budget and not botoLoaded
+    }
+    results.append(result)
+    print(json.dumps(result))
+  failed = [result["handler"] for result in results if not result["passed"]]
+  print(json.dumps({"handlers": len(results), "failed": failed}))
+  if failed:
+    sys.exit(1)
+  return results
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,309 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from collections import deque
+from threading import Event, Lock, Thread
+from typing import Any, Callable
+import argparse, copy, cProfile, glob, json, os, sys, time, uuid
+
+LAMBDA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lambda")
+sys.path.insert(0, os.path.abspath(LAMBDA_DIR))
+
+"""
+  INFO: Runs a whole test group in process, without deploying the stack. Drives the same handlers as the state machine (Parser, IterationLoader, StepExecutor, the operation handlers, StepLogger, TestFinisher, IterationsFinisher) and runs the tests of each iteration on a thread pool.
+  A test starts as soon as its dependencies finish (same schedule as the Await Dependencies state).
+  Wait steps go through the Waiter and the timer table like in the stack, a runner thread runs the timer passes with LocalStepFunctions (a fake step functions client) instead of the TimerScheduler; wait times can be scaled down.
+
+  The handlers use the pooled clients of common/clients.py, so the run can target:
+  - AWS itself (default credentials)
+  - a local stand-in server, eg. `moto_server` or localstack, through AWS_ENDPOINT_URL
+  - moto in process with --moto (test files can be uploaded from a folder with --tests-dir)
+
+  Usage:
+    python tools/local_runner.py <state machine input json> [--moto] [--tests-dir ../test] [--workers 39] [--wait-scale 0] [--profile out.prof]
+
+  Output: a json report with the step results counts and the time spent in each handler (the framework's own overhead)
+"""
+
+class LocalContext:
+  # The parts of the lambda context object used by the handlers
+  def __init__(self, functionName: str, timeout: float):
+    self.function_name = functionName
+    self.aws_request_id = str(uuid.uuid4())
+    self.deadline = time.monotonic() + timeout
+
+  def get_remaining_time_in_millis(self) -> int:
+    return max(0, int((self.deadline - time.monotonic()) * 1000))
+
+class LocalStepFunctions:
+  # Fake step functions client, the task tokens are released to the runner threads waiting for them
+  class exceptions:
+    class TaskTimedOut(Exception):
+      pass
+    class InvalidToken(Exception):
+      pass
+
+  def __init__(self):
+    self.tasks: dict[str, dict[str, Any]] = {}
+    self.lock = Lock()
+
+  def expect(self, token: str) -> dict[str, Any]:
+    with self.lock:
+      self.tasks[token] = {"done": Event(), "output": None}
+      return self.tasks[token]
+
+  def send_task_success(self, taskToken: str, output: str):
+    with self.lock:
+      task = self.tasks.pop(taskToken, None)
+    if task is None:
+      raise self.exceptions.InvalidToken(taskToken)
+    task["output"] = json.loads(output)
+    task["done"].set()
+    return {}
+
+def ensure_timer_table():
+  # The stack creates the timer table, local stand-ins start without it
+  from common.clients import client
+  from common.timers import TIMER_TABLE_NAME
+  ddb = client("dynamodb")
+  try:
+    ddb.describe_table(TableName=TIMER_TABLE_NAME)
+  except ddb.exceptions.ResourceNotFoundException:
+    ddb.create_table(
+      TableName=TIMER_TABLE_NAME,
+      KeySchema=[{"AttributeName": "Shard", "KeyType": "HASH"}, {"AttributeName": "Due", "KeyType": "RANGE"}],
+      AttributeDefinitions=[{"AttributeName": "Shard", "AttributeType": "S"}, {"AttributeName": "Due", "AttributeType": "S"}],
+      BillingMode="PAY_PER_REQUEST"
+    )
+    ddb.get_waiter("table_exists").wait(TableName=TIMER_TABLE_NAME)
+
+def as_json(value: Any) -> Any:
+  # Each state receives a json copy of its input, as in step functions
+  return json.loads(json.dumps(value, default=str))
+
+class LocalRunner:
+  def __init__(self, workers: int = 39, waitScale: float = 1.0, timeout: float = 900, timerTick: float = 0.1):
+    self.workers = workers
+    self.waitScale = waitScale
+    self.timeout = timeout
+    self.timerTick = timerTick
+    self.sfn = LocalStepFunctions()
+    self.timerPasses = 0
+    self.timings: dict[str, dict[str, float]] = {}
+    self.results: dict[str, int] = {}
+    self.lock = Lock()
+
+  def record(self, name: str, start: float):
+    elapsed = (time.perf_counter() - start) * 1000
+    with self.lock:
+      timing = self.timings.setdefault(name, {"calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+      timing["calls"] += 1
+      timing["total_ms"] += elapsed
+      timing["max_ms"] = max(timing["max_ms"], elapsed)
+
+  def invoke(self, name: str, handler: Callable, event: dict[str, Any]) -> Any:
+    start = time.perf_counter()
+    try:
+      return as_json(handler(as_json(event), LocalContext(name, self.timeout)))
+    finally:
+      self.record(name, start)
+
+  def run_operation(self, operation: str, stepInput: dict[str, Any]) -> dict[str, Any]:
+    from common.operations import get_handler, unknown_operation
+    if operation == "Wait":
+      import Waiter
+      start = time.perf_counter()
+      token = str(uuid.uuid4())
+      task = self.sfn.expect(token)
+      self.invoke("Waiter", Waiter.handler, {"token": token, "wait_time": float(stepInput["wait_time"]) * self.waitScale})
+      task["done"].wait()
+      self.record("Wait", start)
+      return task["output"]
+    handler = get_handler(operation)
+    if handler is None:
+      return unknown_operation(operation)
+    return self.invoke(operation, handler, stepInput)
+
+  def count(self, results: dict[str, int]):
+    with self.lock:
+      for status, count in results.items():
+        self.results[status] = self.results.get(status, 0) + count
+
+  def run_test(self, state: dict[str, Any]):
+    import StepExecutor, StepLogger, TestFinisher
+    # Same flow as the Map state iterator: Execute Steps > Choose Test Scenario > (Wait or isolated operation > Log Step Results) > Execute Steps
+    state["Payload"] = {"step_id": -1}
+    while True:
+      state["Payload"] = self.invoke("StepExecutor", StepExecutor.handler, {
+        "test_group_id": state["test_group_id"],
+        "log_table_name": state["log_table_name"],
+        "test_id": state["test_id"],
+        "steps": state["steps"],
+        "step_id": state["Payload"]["step_id"]
+      })
+      self.count(state["Payload"]["results"])
+      if state["Payload"]["type"] == "Completed":
+        state["output"] = self.invoke("TestFinisher", TestFinisher.handler, state)
+        return
+      if state["Payload"]["type"] == "Continue":
+        continue
+      result = self.run_operation(state["Payload"]["type"], copy.deepcopy(state["Payload"]["test"]))
+      self.count({result.get("status", "FAILED") if isinstance(result, dict) else "FAILED": 1})
+      self.invoke("StepLogger", StepLogger.handler, dict(state, testResult={"Payload": result}))
+
+  def run_iteration(self, event: dict[str, Any], tests: list[dict[str, Any]], schedule: dict[str, dict[str, Any]], remaining: dict[str, int]):
+    # remaining is kept across iterations, IterationLoader may run the tail of a large iteration in the next one
+    from common.scheduler import BARRIER
+    byID = {test["test_id"]: test for test in tests}
+    running: dict[Any, str] = {}
+    with ThreadPoolExecutor(max_workers=self.workers) as pool:
+      def start(testID: str):
+        test = byID[testID]
+        state = {
+          "test_id": test["test_id"],
+          "steps": test["steps"],
+          "dependencies": test.get("dependencies", 0),
+          "dependents": test.get("dependents", []),
+          "log_table_name": event["log_table_name"],
+          "test_group_id": event["test_group_id"]
+        }
+        running[pool.submit(self.run_test, state)] = testID
+
+      for testID in byID:
+        if not remaining.get(testID, 0):
+          start(testID)
+      while running:
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+          testID = running.pop(future)
+          # A lambda error stops the execution, as in the state machine
+          future.result()
+          released = deque(schedule.get(testID, {}).get("dependents", []))
+          while released:
+            dependent = released.popleft()
+            remaining[dependent] -= 1
+            if remaining[dependent]:
+              continue
+            if dependent == BARRIER:
+              released.extend(schedule[BARRIER]["dependents"])
+            elif dependent in byID:
+              start(dependent)
+
+  def run_timers(self, stop: Event):
+    # Stands in for the TimerScheduler
+    from common.clients import resource
+    from common.timers import TIMER_TABLE_NAME, run_pass
+    table = resource('dynamodb').Table(TIMER_TABLE_NAME)
+    while not stop.wait(self.timerTick):
+      run_pass(table, self.sfn)
+      self.timerPasses += 1
+
+  def run(self, event: dict[str, Any]) -> dict[str, Any]:
+    stop = Event()
+    timers = Thread(target=self.run_timers, args=(stop,), daemon=True)
+    timers.start()
+    try:
+      return self.run_group(event)
+    finally:
+      stop.set()
+      timers.join()
+
+  def run_group(self, event: dict[str, Any]) -> dict[str, Any]:
+    import IterationLoader, IterationsFinisher, Parser
+    from common.scheduler import build_schedule
+    start = time.perf_counter()
+    schedule = build_schedule(copy.deepcopy(event["test_group"]))
+    remaining = {test: node["dependencies"] for test, node in schedule.items()}
+    state = dict(event)
+    state["Payload"] = self.invoke("Parser", Parser.handler, event)
+    while True:
+      state["Payload"] = self.invoke("IterationLoader", IterationLoader.handler, {
+        "test_group_id": state["test_group_id"],
+        "log_table_name": state["log_table_name"],
+        "iterations": state["Payload"]["iterations"]
+      })
+      if state["Payload"]["completed"]:
+        break
+      self.run_iteration(state, state["Payload"]["tests"], schedule, remaining)
+    state["output"] = self.invoke("IterationsFinisher", IterationsFinisher.handler, state)
+
+    wallTime = time.perf_counter() - start
+    steps = sum(self.results.values())
+    return {
+      "test_group_id": event["test_group_id"],
+      "tests": len([test for test in schedule if test != "*"]),
+      "steps": steps,
+      "results": self.results,
+      "wall_time_s": round(wallTime, 3),
+      "steps_per_s": round(steps / wallTime, 2) if wallTime else None,
+      "timer_passes": self.timerPasses,
+      "handlers": {name: {
+        "calls": timing["calls"],
+        "total_ms": round(timing["total_ms"], 3),
+        "mean_ms": round(timing["total_ms"] / timing["calls"], 3),
+        "max_ms": round(timing["max_ms"], 3)
+      } for name, timing in self.timings.items()}
+    }
+
+def ensure_bucket(bucket: str):
+  from common.clients import client
+  s3 = client("s3")
+  try:
+    s3.create_bucket(Bucket=bucket)
+  except (s3.exceptions.BucketAlreadyOwnedByYou, s3.exceptions.BucketAlreadyExists):
+    pass
+
+def upload_tests(bucket: str, testsDir: str):
+  from common.clients import client
+  s3 = client("s3")
+  ensure_bucket(bucket)
+  for path in glob.glob(os.path.join(testsDir, "*.json")):
+    with open(path, "rb") as f:
+      s3.put_object(Bucket=bucket, Key=os.path.basename(path), Body=f.read())
+
+def main(argv: list[str] | None = None) -> dict[str, Any]:
+  parser = argparse.ArgumentParser(description="Run a test group in process")
+  parser.add_argument("input", help="json file with the state machine input")
+  parser.add_argument("--moto", action="store_true", help="run against moto in process")
+  parser.add_argument("--tests-dir", help="upload the *.json test files of this folder to the input bucket first")
+  parser.add_argument("--workers", type=int, default=39, help="parallel tests, the Map state runs 39")
+  parser.add_argument("--wait-scale", type=float, default=1.0, help="multiplier of the Wait steps duration")
+  parser.add_argument("--payload-bucket", help="offload large payloads to this bucket (created if missing), as the stack does")
+  parser.add_argument("--profile", help="write cProfile stats of the run to this file")
+  args = parser.parse_args(argv)
+
+  with open(args.input) as f:
+    event = json.load(f)
+
+  mock = None
+  if args.moto:
+    from moto import mock_aws
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    os.environ.setdefault("AWS_REGION", os.environ["AWS_DEFAULT_REGION"])
+    mock = mock_aws()
+    mock.start()
+  try:
+    from common import clients
+    clients.reset()
+    # Timer passes are run by the runner, not by a TimerScheduler lambda
+    os.environ.pop("TIMER_QUEUE_URL", None)
+    ensure_timer_table()
+    if args.payload_bucket:
+      # Read by common/claimcheck.py on import
+      os.environ["PAYLOAD_BUCKET"] = args.payload_bucket
+      ensure_bucket(args.payload_bucket)
+    if args.tests_dir:
+      upload_tests(event["bucket_name"], args.tests_dir)
+    runner = LocalRunner(workers=args.workers, waitScale=args.wait_scale)
+    if args.profile:
+      profiler = cProfile.Profile()
+      report = profiler.runcall(runner.run, event)
+      profiler.dump_stats(args.profile)
+    else:
+      report = runner.run(event)
+  finally:
+    if mock is not None:
+      mock.stop()
+  print(json.dumps(report, indent=2))
+  return report
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,75 @@
+from typing import Any
+import argparse, json, modulefinder, os, shutil, sys
+
+LAMBDA_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lambda"))
+BUILD_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lambda_build"))
+sys.path.insert(0, LAMBDA_DIR)
+from common.operations import OPERATIONS, handler_modules
+
+"""
+  INFO: Slim packages of the lambda handlers, each function gets only the files its handler module imports instead of the whole lambda folder (smaller deployment package, faster cold start download and unzip).
+  - the imports of each handler are followed with modulefinder, only the files of the lambda folder are kept (boto3 comes with the runtime)
+  - StepExecutor runs the operation handlers through common/operations.py (imported on first use), its package gets all of them
+  - lambda_build/<handler module>/ is written for every handler, the stack uses it when it exists and the whole lambda folder otherwise (check lib/framework-stack.ts)
+  - lambda_build/<handler module>.json is written last, synth fails when it is older than a file of the lambda folder (stale package)
+  npm run synth/deploy run it before cdk synth/deploy (npm run package alone), lambda_build is rebuilt from scratch every time.
+
+  Usage:
+    python tools/package.py [--only StepExecutor,DynamoDB.CreateEntry]
+
+  Output: a json line per handler module {"module", "files", "bytes"}
+"""
+
+def module_file(module: str) -> str:
+  return os.path.join(LAMBDA_DIR, *module.split(".")) + ".py"
+
+def local_files(module: str) -> set[str]:
+  # Paths of the lambda folder files imported by the module, the module included
+  finder = modulefinder.ModuleFinder(path=[LAMBDA_DIR])
+  finder.run_script(module_file(module))
+  files = {module_file(module)}
+  for found in finder.modules.values():
+    if found.__file__ and os.path.abspath(found.__file__).startswith(LAMBDA_DIR + os.sep):
+      files.add(os.path.abspath(found.__file__))
+  if os.path.join(LAMBDA_DIR, "common", "operations.py") in files:
+    # Operation handlers are imported by name (importlib), modulefinder does not see them
+    for path in set(OPERATIONS.values()):
+      operation = path.rsplit(".", 1)[0]
+      if module_file(operation) not in files:
+        files |= local_files(operation)
+  return files
+
+def package(module: str) -> dict[str, Any]:
+  target = os.path.join(BUILD_DIR, module)
+  files = sorted(local_files(module))
+  for path in files:
+    destination = os.path.join(target, os.path.relpath(path, LAMBDA_DIR))
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    shutil.copy2(path, destination)
+  return {
+    "module": module,
+    "files": len(files),
+    "bytes": sum(os.path.getsize(path) for path in files)
+  }
+
+def main(argv: list[str] | None = None) -> list[dict[str, Any]]:
+  parser = argparse.ArgumentParser(description="Slim packages of the lambda handlers")
+  parser.add_argument("--only", help="comma separated handler modules to package")
+  args = parser.parse_args(argv)
+
+  modules = args.only.split(",") if args.only else sorted(set(handler_modules().values()))
+  if not args.only:
+    shutil.rmtree(BUILD_DIR, ignore_errors=True)
+  results = []
+  for module in modules:
+    shutil.rmtree(os.path.join(BUILD_DIR, module), ignore_errors=True)
+    result = package(module)
+    # The manifest marks the package complete, it is newer than every packaged file
+    with open(os.path.join(BUILD_DIR, f"{module}.json"), "w") as f:
+      json.dump(result, f)
+    results.append(result)
+    print(json.dumps(result))
+  return results
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,264 @@
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Iterable
+import argparse, csv, io, json, math, os, re, sys
+
+LAMBDA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lambda")
+sys.path.insert(0, os.path.abspath(LAMBDA_DIR))
+
+"""
+  INFO: Report of a test group run, built from its records in the log table (all shards, paginated, check common/logkeys.py).
+  The TestScenarioID of each record gives its place in the run:
+    T<Null>:S<Null> start of the group (its Input holds the test_group dependencies), T<Started>:S<n> start of an iteration,
+    T<test>:S<n> start of a step, T<test>:S<operation> result of a step, T<test>:S<Completed> end of a test, T<Completed>:S<Completed> end of the group
+  From them the report rebuilds:
+  - the timeline of each test and its steps (ms from the start of the group)
+  - the critical path: from the last test to finish, back through the dependency that finished last each time (the chain that set the run time)
+  - latency percentiles of each operation (DurationMs, the time from the load of the step to its log for steps without timings, eg. Wait) with the AWS and orchestration (gap) times
+  - the time lost at barriers: at each iteration start and at the "*" barrier, the time between the end of every test and the barrier release
+  ? a test running the same operation twice has a single record of it (the sort key is the same), the last one
+  Inputs and outputs stored as claim check references are read from the payload bucket (check common/claimcheck.py), failed steps get the "message" of their output.
+
+  Usage:
+    python tools/report.py <log table name> <test group id> [--format json|csv|gantt] [--shards 8] [--width 80] [--output file]
+  Use AWS_ENDPOINT_URL for a local stand-in server (eg. `moto_server`).
+
+  Output formats:
+    json: the whole report
+    csv: one row per step (test, operation, status, start_ms, end_ms, duration_ms, aws_ms, aws_calls, gap_ms)
+    gantt: one text bar per test (steps as letters, waits for dependencies as dots), the critical path and the percentiles
+"""
+
+SCENARIO = re.compile(r"^T<(.*)>:S<(.*)>$")
+PERCENTILES = (50, 90, 99)
+
+def number(value: Any) -> float | None:
+  if value is None:
+    return None
+  return float(value) if isinstance(value, Decimal) else value
+
+def iso_ms(timestamp: Any) -> float | None:
+  # ISO-8601 UTC timestamps of the log records, older records used "%D T%H:%M:%S" local times
+  if not isinstance(timestamp, str) or not timestamp.endswith("Z"):
+    return None
+  return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp() * 1000
+
+def percentile(values: list[float], rank: float) -> float | None:
+  # Linear interpolation between the closest ranks
+  if not values:
+    return None
+  ordered = sorted(values)
+  position = (len(ordered) - 1) * rank / 100
+  low, high = math.floor(position), math.ceil(position)
+  return round(ordered[low] + (ordered[high] - ordered[low]) * (position - low), 3)
+
+def dependencies(testGroup: dict[str, list[str]]) -> dict[str, list[str]]:
+  # Direct dependencies of each test, "*" stands for every test not running at the end
+  tests = set(testGroup)
+  for testDepends in testGroup.values():
+    tests.update(depend for depend in testDepends if depend != "*")
+  starTests = {test for test, testDepends in testGroup.items() if "*" in testDepends}
+  return {test: sorted(tests - starTests) if test in starTests else [depend for depend in testGroup.get(test, []) if depend != "*"] for test in tests}
+
+def read_items(tableName: str, testGroupID: str, shards: int) -> list[dict[str, Any]]:
+  from common.logkeys import query_group
+  return list(query_group(tableName, testGroupID, shards=shards))
+
+def build_report(items: Iterable[dict[str, Any]]) -> dict[str, Any]:
+  from common.claimcheck import resolve
+  group: dict[str, Any] = {}
+  iterationStarts: list[float] = []
+  tests: dict[str, dict[str, Any]] = defaultdict(lambda: {"steps": [], "loaded": [], "end": None})
+  for item in items:
+    match = SCENARIO.match(item["TestScenarioID"])
+    if match is None:
+      # Dependency counters (D<test>)
+      continue
+    test, step = match.groups()
+    at = iso_ms(item.get("Timestamp"))
+    if test == "Null":
+      group["start"] = at
+      # The Input of a large group is a claim check reference (Parser)
+      group["input"] = resolve(item.get("Input", {}))
+    elif test == "Started":
+      if at is not None:
+        iterationStarts.append(at)
+    elif test == "Completed":
+      group["end"] = at
+    elif step == "Completed":
+      tests[test]["end"] = at
+    elif step.isdigit():
+      if item.get("LoadedMs") is not None:
+        tests[test]["loaded"].append(number(item["LoadedMs"]))
+    else:
+      loggedMs = number(item.get("LoggedMs")) or at
+      startMs = number(item.get("StartMs"))
+      if startMs is None and loggedMs is not None and item.get("ElapsedMs") is not None:
+        startMs = loggedMs - number(item["ElapsedMs"])
+      tests[test]["steps"].append({
+        "operation": step,
+        "status": item.get("Status"),
+        "start_ms": startMs,
+        "end_ms": number(item.get("EndMs")) or loggedMs,
+        "duration_ms": number(item.get("DurationMs")) if item.get("DurationMs") is not None else number(item.get("ElapsedMs")),
+        "aws_ms": number(item.get("AwsMs")),
+        "aws_calls": number(item.get("AwsCalls")),
+        "gap_ms": number(item.get("GapMs"))
+      })
+      if item.get("Status") == "FAILED":
+        output = resolve(item.get("Output"))
+        tests[test]["steps"][-1]["message"] = output.get("message") if isinstance(output, dict) else None
+
+  # Times relative to the start of the group
+  starts = [time for test in tests.values() for time in test["loaded"]] + [step["start_ms"] for test in tests.values() for step in test["steps"] if step["start_ms"] is not None]
+  origin = group.get("start") or min(starts, default=0)
+  def relative(value: float | None) -> float | None:
+    return None if value is None else round(value - origin, 3)
+
+  timeline: dict[str, dict[str, Any]] = {}
+  for test, data in tests.items():
+    steps = sorted(data["steps"], key=lambda step: step["start_ms"] if step["start_ms"] is not None else math.inf)
+    testStarts = data["loaded"] + [step["start_ms"] for step in steps if step["start_ms"] is not None]
+    testEnds = [step["end_ms"] for step in steps if step["end_ms"] is not None] + ([data["end"]] if data["end"] is not None else [])
+    timeline[test] = {
+      "start_ms": relative(min(testStarts, default=None)),
+      "end_ms": relative(max(testEnds, default=None)),
+      "steps": [dict(step, start_ms=relative(step["start_ms"]), end_ms=relative(step["end_ms"])) for step in steps]
+    }
+    if timeline[test]["start_ms"] is not None and timeline[test]["end_ms"] is not None:
+      timeline[test]["duration_ms"] = round(timeline[test]["end_ms"] - timeline[test]["start_ms"], 3)
+
+  testGroup = group.get("input", {}).get("test_group", {}) if isinstance(group.get("input"), dict) else {}
+  depends = dependencies(testGroup)
+  ended = {test: data["end_ms"] for test, data in timeline.items() if data["end_ms"] is not None}
+
+  # Critical path, walked back from the last test to finish
+  criticalPath: list[dict[str, Any]] = []
+  test = max(ended, key=ended.get, default=None)
+  while test is not None:
+    data = timeline[test]
+    ready = max((ended[depend] for depend in depends.get(test, []) if depend in ended), default=0)
+    criticalPath.insert(0, {
+      "test": test,
+      "start_ms": data["start_ms"],
+      "end_ms": data["end_ms"],
+      "duration_ms": data.get("duration_ms"),
+      # Time between the end of its last dependency (or the group start) and its own start
+      "wait_ms": round(data["start_ms"] - ready, 3) if data["start_ms"] is not None else None
+    })
+    test = max((depend for depend in depends.get(test, []) if depend in ended), key=ended.get, default=None)
+
+  operations: dict[str, dict[str, list[float]]] = defaultdict(lambda: defaultdict(list))
+  for data in timeline.values():
+    for step in data["steps"]:
+      for name in ("duration_ms", "aws_ms", "gap_ms"):
+        if step[name] is not None:
+          operations[step["operation"]][name].append(step[name])
+  latencies = {
+    operation: {
+      "count": len(values["duration_ms"]),
+      **{f"p{rank}_ms": percentile(values["duration_ms"], rank) for rank in PERCENTILES},
+      "max_ms": max(values["duration_ms"], default=None),
+      "aws_p50_ms": percentile(values["aws_ms"], 50),
+      "gap_p50_ms": percentile(values["gap_ms"], 50)
+    } for operation, values in sorted(operations.items())
+  }
+
+  # Barriers: the iteration starts after the first, and the release of the tests running at the end ("*")
+  barriers: list[dict[str, Any]] = [{"kind": "iteration", "at_ms": relative(at)} for at in sorted(iterationStarts)[1:]]
+  starTests = {test for test, testDepends in testGroup.items() if "*" in testDepends}
+  if starTests:
+    before = [ended[test] for test in ended if test not in starTests]
+    if before:
+      barriers.append({"kind": "*", "at_ms": max(before)})
+  barriers.sort(key=lambda barrier: barrier["at_ms"])
+  previous = -math.inf
+  for barrier in barriers:
+    waiting = {test: barrier["at_ms"] - end for test, end in ended.items() if previous < end <= barrier["at_ms"]}
+    barrier["tests"] = len(waiting)
+    barrier["lost_ms"] = round(sum(waiting.values()), 3)
+    barrier["waited_for"] = max(waiting, key=lambda test: ended[test], default=None)
+    previous = barrier["at_ms"]
+
+  return {
+    "tests": len(timeline),
+    "steps": sum(len(data["steps"]) for data in timeline.values()),
+    "wall_time_ms": relative(group["end"]) if group.get("end") is not None else max(ended.values(), default=None),
+    "critical_path": criticalPath,
+    "critical_path_ms": criticalPath[-1]["end_ms"] if criticalPath else None,
+    "latencies": latencies,
+    "barriers": barriers,
+    "barrier_lost_ms": round(sum(barrier["lost_ms"] for barrier in barriers), 3),
+    "timeline": timeline
+  }
+
+def to_csv(report: dict[str, Any]) -> str:
+  out = io.StringIO()
+  columns = ["test", "operation", "status", "start_ms", "end_ms", "duration_ms", "aws_ms", "aws_calls", "gap_ms"]
+  writer = csv.DictWriter(out, fieldnames=columns)
+  writer.writeheader()
+  for test, data in report["timeline"].items():
+    for step in data["steps"]:
+      writer.writerow({"test": test, **{column: step.get(column) for column in columns[1:]}})
+  return out.getvalue()
+
+def to_gantt(report: dict[str, Any], width: int = 80) -> str:
+  timeline = report["timeline"]
+  end = max((data["end_ms"] for data in timeline.values() if data["end_ms"] is not None), default=0) or 1
+  scale = width / end
+  nameWidth = max((len(test) for test in timeline), default=4)
+  legend: dict[str, str] = {}
+  lines = [f'{"test":<{nameWidth}} |{"0 ms":<{width - len(f"{end:.0f} ms")}}{end:.0f} ms|']
+  critical = {step["test"] for step in report["critical_path"]}
+  for test, data in sorted(timeline.items(), key=lambda entry: entry[1]["start_ms"] if entry[1]["start_ms"] is not None else math.inf):
+    bar = [" "] * width
+    if data["start_ms"] is not None:
+      # Dots from the group start to the test start: waiting for dependencies
+      for position in range(int(data["start_ms"] * scale)):
+        bar[position] = "."
+    for step in data["steps"]:
+      if step["start_ms"] is None or step["end_ms"] is None:
+        continue
+      letter = legend.setdefault(step["operation"], chr(ord("A") + len(legend) % 26))
+      first = min(width - 1, int(step["start_ms"] * scale))
+      for position in range(first, max(first + 1, min(width, math.ceil(step["end_ms"] * scale)))):
+        bar[position] = letter if step["status"] == "SUCCESS" else "x"
+    lines.append(f'{test:<{nameWidth}} |{"".join(bar)}|{" *" if test in critical else ""}')
+  lines.append("")
+  lines.append("steps: " + ", ".join(f"{letter} {operation}" for operation, letter in legend.items()) + ", x failed step, . waiting, * critical path")
+  lines.append("critical path: " + " > ".join(f'{step["test"]} ({step["duration_ms"]} ms)' for step in report["critical_path"]))
+  lines.append(f'barriers: {len(report["barriers"])}, time lost {report["barrier_lost_ms"]} ms')
+  lines.append("")
+  lines.append(f'{"operation":<20} {"count":>6} {"p50 ms":>10} {"p90 ms":>10} {"p99 ms":>10} {"max ms":>10}')
+  for operation, latency in report["latencies"].items():
+    lines.append(f'{operation:<20} {latency["count"]:>6} ' + " ".join(f'{latency[name] if latency[name] is not None else "-":>10}' for name in ("p50_ms", "p90_ms", "p99_ms", "max_ms")))
+  return "\n".join(lines) + "\n"
+
+def main(argv: list[str] | None = None) -> dict[str, Any]:
+  from common.logkeys import LOG_SHARDS
+  parser = argparse.ArgumentParser(description="Report of a test group run from the log table")
+  parser.add_argument("table", help="log table name")
+  parser.add_argument("test_group_id", help="test group id of the run")
+  parser.add_argument("--format", choices=["json", "csv", "gantt"], default="json")
+  parser.add_argument("--shards", type=int, default=LOG_SHARDS, help="log shards of the run (LogShards of its start record)")
+  parser.add_argument("--width", type=int, default=80, help="width of the gantt bars")
+  parser.add_argument("--output", help="write the report to this file instead of stdout")
+  args = parser.parse_args(argv)
+
+  report = build_report(read_items(args.table, args.test_group_id, args.shards))
+  if args.format == "csv":
+    text = to_csv(report)
+  elif args.format == "gantt":
+    text = to_gantt(report, args.width)
+  else:
+    text = json.dumps(report, indent=2) + "\n"
+  if args.output:
+    with open(args.output, "w") as f:
+      f.write(text)
+  else:
+    sys.stdout.write(text)
+  return report
+
+if __name__ == "__main__":
+  main()